@@ -0,0 +1,104 @@
+import struct
+
+import numpy as np
+
+# ========================================================================
+#   AUDIO CAPTURE BUFFER
+# ========================================================================
+SILENCE_THRESHOLD = 0.005  # Peak amplitude below this counts as silence
+INITIAL_SECONDS = 30  # Preallocated capacity; doubles if an utterance runs longer
+
+
+class AudioRingBuffer:
+    """
+    Preallocated mono float32 buffer written in place by the sounddevice callback.
+
+    Replaces the old "list of indata.copy() + np.concatenate" approach:
+    - Blocks are copied once, straight into the preallocated array.
+    - Capacity doubles only when an utterance outgrows it (rare).
+    - Peak / energy / trailing-silence stats are updated per block, so
+      stop_and_process() never has to rescan the whole recording.
+    - reset() just rewinds; the memory is reused for the next utterance.
+    """
+
+    def __init__(self, sample_rate, initial_seconds=INITIAL_SECONDS,
+                 silence_threshold=SILENCE_THRESHOLD):
+        self.sample_rate = sample_rate
+        self.silence_threshold = silence_threshold
+        self._data = np.zeros(int(sample_rate * initial_seconds), dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        self.length = 0
+        self.peak = 0.0
+        self.sum_squares = 0.0
+        self.silent_tail = 0  # Samples since the last block louder than the threshold
+
+    def write(self, block):
+        """Appends one (frames, channels) or (frames,) block. Only channel 0 is kept."""
+        samples = block[:, 0] if block.ndim == 2 else block
+        n = len(samples)
+        end = self.length + n
+        if end > len(self._data):
+            self._grow(end)
+        self._data[self.length:end] = samples
+        self.length = end
+
+        # Incremental stats (max/min avoid allocating an np.abs() temporary)
+        block_peak = max(float(samples.max()), -float(samples.min())) if n else 0.0
+        if block_peak > self.peak:
+            self.peak = block_peak
+        self.sum_squares += float(np.dot(samples, samples))
+        if block_peak < self.silence_threshold:
+            self.silent_tail += n
+        else:
+            self.silent_tail = 0
+
+    def _grow(self, needed):
+        capacity = len(self._data)
+        while capacity < needed:
+            capacity *= 2
+        grown = np.zeros(capacity, dtype=np.float32)
+        grown[:self.length] = self._data[:self.length]
+        self._data = grown
+
+    def view(self):
+        """The recorded samples (no copy). Only valid until the next reset()."""
+        return self._data[:self.length]
+
+    @property
+    def duration(self):
+        return self.length / self.sample_rate
+
+    @property
+    def rms(self):
+        return (self.sum_squares / self.length) ** 0.5 if self.length else 0.0
+
+    def is_silent(self):
+        return self.peak < self.silence_threshold
+
+    def to_wav(self):
+        """Encodes the recording as an in-memory 16-bit PCM WAV file."""
+        return encode_wav(self.view(), self.sample_rate)
+
+
+def encode_wav(samples, sample_rate):
+    """
+    Encodes float samples in [-1, 1] as a mono 16-bit PCM WAV.
+
+    The output bytearray is allocated once and the int16 conversion is
+    written directly into it, so no intermediate int16 copy or temp file
+    is created. Returns a bytearray ready to be wrapped in io.BytesIO.
+    """
+    n = len(samples)
+    data_size = n * 2
+    wav = bytearray(44 + data_size)
+    struct.pack_into(
+        "<4sI4s4sIHHIIHH4sI", wav, 0,
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", data_size,
+    )
+    pcm = np.frombuffer(wav, dtype="<i2", count=n, offset=44)
+    np.multiply(samples, 32767, out=pcm, casting="unsafe")
+    return wav
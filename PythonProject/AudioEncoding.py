@@ -0,0 +1,57 @@
+import io
+
+import numpy as np
+
+from AudioBuffer import encode_wav
+
+# ========================================================================
+#   UPLOAD ENCODING
+# ========================================================================
+# FLAC (lossless) and Opus (lossy, speech-grade) are written by the optional
+# 'soundfile' package (pip install soundfile; needs libsndfile >= 1.0.29 for
+# Opus). Without it, or if an encoder fails, uploads fall back to WAV.
+ENCODINGS = ("wav", "flac", "opus")
+FILENAMES = {"wav": "output.wav", "flac": "output.flac", "opus": "output.ogg"}
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)  # The only rates Opus accepts
+
+_warned = set()
+
+
+def _warn_once(key, message):
+    if key not in _warned:
+        _warned.add(key)
+        print(message)
+
+
+def encode_audio(samples, sample_rate, encoding="wav"):
+    """
+    Encodes mono float samples for upload, entirely in memory.
+    Returns (data, encoding_used); encoding_used is "wav" after a fallback.
+    """
+    if encoding == "wav":
+        return encode_wav(samples, sample_rate), "wav"
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown upload encoding '{encoding}' (expected one of {ENCODINGS})")
+
+    try:
+        import soundfile
+    except ImportError:
+        _warn_once("soundfile", f">>> [UPLOAD]: 'soundfile' not installed, sending WAV instead of {encoding}.")
+        return encode_wav(samples, sample_rate), "wav"
+
+    if encoding == "opus" and sample_rate not in OPUS_RATES:
+        _warn_once(("rate", sample_rate), f">>> [UPLOAD]: Opus cannot encode {sample_rate} Hz, sending WAV.")
+        return encode_wav(samples, sample_rate), "wav"
+
+    out = io.BytesIO()
+    try:
+        if encoding == "flac":
+            soundfile.write(out, np.asarray(samples, dtype=np.float32), sample_rate,
+                            format="FLAC", subtype="PCM_16")
+        else:
+            soundfile.write(out, np.asarray(samples, dtype=np.float32), sample_rate,
+                            format="OGG", subtype="OPUS")
+    except Exception as e:
+        _warn_once(("error", encoding), f">>> [UPLOAD]: {encoding} encoder failed ({e}), sending WAV.")
+        return encode_wav(samples, sample_rate), "wav"
+    return out.getvalue(), encoding
@@ -0,0 +1,111 @@
+import numpy as np
+
+from AudioEncoding import encode_audio, FILENAMES
+from Metrics import metrics
+
+# ========================================================================
+#   UPLOAD PREPROCESSING CONFIGURATION
+# ========================================================================
+UPLOAD_SAMPLE_RATE = 16000  # What Whisper resamples to anyway
+TRIM_FRAME_MS = 20  # Energy is measured over frames of this length
+TRIM_THRESHOLD = 0.01  # Frame RMS above this counts as voice...
+TRIM_RELATIVE = 0.1  # ...or above this fraction of the loudest frame's RMS, if that is lower
+TRIM_PADDING = 0.15  # Seconds of quiet kept around the speech
+NORMALIZE_PEAK = 0.9  # Target peak when loudness normalization is on
+MAX_GAIN = 10.0  # Never amplify more than this (would only boost noise)
+FILTER_TAPS = 63  # Length of the anti-aliasing low-pass filter
+
+
+def trim_silence(samples, sample_rate, threshold=TRIM_THRESHOLD, padding=TRIM_PADDING,
+                 relative=TRIM_RELATIVE):
+    """
+    Cuts quiet lead-in and tail. Frame energies are computed in one
+    vectorized step; returns a view (no copy) of the kept range.
+
+    The threshold follows the recording's level (as if it had been
+    normalized first): a quiet speaker that passed AudioBuffer's peak
+    silence gate is trimmed relative to their own loudest frame, not cut
+    away entirely. If nothing counts as voice, nothing is trimmed.
+    """
+    frame = max(1, int(sample_rate * TRIM_FRAME_MS / 1000))
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return samples
+    frames = samples[:n_frames * frame].reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames * frames, axis=1))
+    loudest = float(energy.max())
+    if loudest == 0.0:
+        return samples  # Digital silence: nothing to measure against
+    voiced = np.flatnonzero(energy >= min(threshold, relative * loudest))
+    pad = int(sample_rate * padding)
+    start = max(0, voiced[0] * frame - pad)
+    end = min(len(samples), (voiced[-1] + 1) * frame + pad)
+    return samples[start:end]
+
+
+def lowpass_taps(cutoff, taps=FILTER_TAPS):
+    """Windowed-sinc FIR low-pass. 'cutoff' is a fraction of the input sample rate."""
+    n = np.arange(taps) - (taps - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return (h / h.sum()).astype(np.float32)
+
+
+def resample(samples, sample_rate, target_rate=UPLOAD_SAMPLE_RATE):
+    """
+    Decimates mono float samples to 'target_rate' (e.g. 44.1 kHz -> 16 kHz):
+    low-pass below the new Nyquist frequency, then linear interpolation at
+    the output sample positions.
+    """
+    if target_rate >= sample_rate or len(samples) == 0:
+        return samples
+    filtered = np.convolve(samples, lowpass_taps(0.45 * target_rate / sample_rate), mode="same")
+    n_out = int(len(samples) * target_rate / sample_rate)
+    positions = np.arange(n_out) * (sample_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), filtered).astype(np.float32)
+
+
+def normalize_peak(samples, target_peak=NORMALIZE_PEAK, max_gain=MAX_GAIN):
+    """Scales the samples so their peak reaches 'target_peak'."""
+    peak = max(float(samples.max()), -float(samples.min())) if len(samples) else 0.0
+    if peak == 0.0:
+        return samples
+    return samples * np.float32(min(max_gain, target_peak / peak))
+
+
+def prepare_upload(samples, sample_rate, target_rate=UPLOAD_SAMPLE_RATE, trim=True, normalize=False,
+                   encoding="wav"):
+    """
+    Turns a raw recording into the smallest file worth sending for transcription.
+
+    1. Trim silent edges
+    2. Decimate to 'target_rate' mono
+    3. Optionally normalize loudness
+    4. Encode as WAV, FLAC or Opus (see AudioEncoding.py)
+
+    Returns (data, report). 'report' says how many seconds and bytes were
+    saved compared to uploading the raw recording as a WAV, and which
+    format / filename was actually used.
+    """
+    original_seconds = len(samples) / sample_rate
+    original_bytes = 44 + 2 * len(samples)
+
+    if trim:
+        samples = trim_silence(samples, sample_rate)
+    kept_seconds = len(samples) / sample_rate
+    samples = resample(samples, sample_rate, target_rate)
+    rate = min(sample_rate, target_rate)
+    if normalize:
+        samples = normalize_peak(samples)
+
+    data, encoding = encode_audio(samples, rate, encoding)
+    report = {
+        "seconds_removed": original_seconds - kept_seconds,
+        "bytes_removed": original_bytes - len(data),
+        "upload_bytes": len(data),
+        "sample_rate": rate,
+        "encoding": encoding,
+        "filename": FILENAMES[encoding],
+    }
+    metrics.increment("upload.seconds_removed", report["seconds_removed"])
+    metrics.increment("upload.bytes_removed", report["bytes_removed"])
+    return data, report
@@ -0,0 +1,480 @@
+import queue
+import time
+from threading import Thread, Condition, Event, Lock
+
+import cv2
+import numpy as np
+
+from GestureTracker import GestureTracker, hand_events, format_hands
+from HubProtocol import DEFAULT_SESSION, Kind, encode_gesture_event
+from Metrics import metrics
+
+# ========================================================================
+#   PIPELINE CONFIGURATION
+# ========================================================================
+FRAME_SIZE = (480, 480)  # Every frame is resized to this before inference
+BROADCAST_QUEUE_SIZE = 32  # Gesture strings waiting to be handed to the Hub
+PREVIEW_FPS = 15  # Upper bound on how often the preview window is redrawn
+READ_RETRY_DELAY = 0.05  # Pause after a failed frame read before trying again
+MAX_READ_FAILURES = 40  # Consecutive failed reads (~2 s) before a camera is given up
+
+# --- Adaptive Scheduling ---
+IDLE_AFTER = 2.0  # Seconds without any hand before dropping to the probe rate
+IDLE_FPS = 3  # Recognizer runs per second while idle
+ROI_PADDING = 0.3  # Extra margin around the hands, as a fraction of the box size
+ROI_MIN_SIZE = 160  # Smallest crop (pixels) handed to the recognizer
+
+# MediaPipe is imported where it is first needed, not at module load: the
+# Hub process of the multi-camera mode never runs a recognizer itself.
+WARM_UP_TIMESTAMP = 0  # Live frames are stamped with time.monotonic() ms, always later
+
+
+def blank_image(frame_size=FRAME_SIZE):
+    """A black RGB mp.Image, used to run the recognizer once before real frames arrive."""
+    import mediapipe as mp
+    width, height = frame_size
+    return mp.Image(image_format=mp.ImageFormat.SRGB, data=np.zeros((height, width, 3), np.uint8))
+
+
+def format_result(result):
+    """
+    Turns a MediaPipe GestureRecognizerResult into the string the Robot expects,
+    e.g. "Right_Open_Palm | Left_Victory", or "NONE" when no hand is visible.
+    """
+    return format_hands(hand_events(result))
+
+
+class LatestFrameSlot:
+    """
+    Single-slot buffer between the camera and the recognizer.
+    The camera always overwrites the slot, so inference only ever sees the
+    newest frame and stale frames are dropped instead of queuing up.
+    """
+
+    def __init__(self):
+        self._cond = Condition()
+        self._item = None
+        self.dropped = 0  # Frames overwritten before inference could take them
+
+    def put(self, frame, timestamp_ms):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = (frame, timestamp_ms)
+            self._cond.notify()
+
+    def take(self, timeout=None):
+        """Waits for a frame and empties the slot. Returns None on timeout."""
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def depth(self):
+        return 0 if self._item is None else 1
+
+
+class AdaptiveScheduler:
+    """
+    Decides how often the recognizer runs and on which part of the frame.
+
+    - ACTIVE: a hand was seen recently. Every frame is processed, cropped to a
+      padded box around the landmarks of the last result.
+    - IDLE: no hand for IDLE_AFTER seconds. Only IDLE_FPS full frames per
+      second are probed until a hand shows up again.
+
+    Losing the hands inside a crop falls straight back to the full frame.
+    """
+
+    def __init__(self, frame_size=FRAME_SIZE, idle_after=IDLE_AFTER, idle_fps=IDLE_FPS,
+                 padding=ROI_PADDING, min_size=ROI_MIN_SIZE):
+        self.width, self.height = frame_size
+        self.idle_after = idle_after
+        self.probe_interval = 1.0 / idle_fps
+        self.padding = padding
+        self.min_size = min_size
+
+        self.idle = False
+        self.last_seen = time.monotonic()
+        self.next_probe = 0.0
+        self._roi = None
+
+    @property
+    def mode(self):
+        return "idle" if self.idle else "active"
+
+    def should_run(self, now):
+        """True if this frame should go to the recognizer."""
+        if not self.idle:
+            return True
+        if now < self.next_probe:
+            return False
+        self.next_probe = now + self.probe_interval
+        return True
+
+    def roi(self):
+        """Crop box (x0, y0, x1, y1) in frame pixels, or None for the full frame."""
+        return self._roi
+
+    def update(self, result, roi, now):
+        """
+        Feeds back one recognizer result.
+        'roi' is the crop that result was computed on (None = full frame).
+        """
+        if not result.hand_landmarks:
+            self._roi = None  # Tracking lost: next frame is full-frame
+            if now - self.last_seen > self.idle_after:
+                self.idle = True
+            return
+
+        self.last_seen = now
+        self.idle = False
+
+        # Landmarks are normalized to the image MediaPipe saw; map back to the frame
+        ox, oy = (roi[0], roi[1]) if roi else (0, 0)
+        sw = (roi[2] - roi[0]) if roi else self.width
+        sh = (roi[3] - roi[1]) if roi else self.height
+        xs = [ox + lm.x * sw for hand in result.hand_landmarks for lm in hand]
+        ys = [oy + lm.y * sh for hand in result.hand_landmarks for lm in hand]
+
+        x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+        pad = self.padding * max(x1 - x0, y1 - y0)
+        x0, x1, y0, y1 = x0 - pad, x1 + pad, y0 - pad, y1 + pad
+
+        # Enforce a minimum size around the centre
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        half_w = max(x1 - x0, self.min_size) / 2
+        half_h = max(y1 - y0, self.min_size) / 2
+        box = (max(0, int(cx - half_w)), max(0, int(cy - half_h)),
+               min(self.width, int(cx + half_w)), min(self.height, int(cy + half_h)))
+
+        # A crop covering most of the frame saves nothing
+        area = (box[2] - box[0]) * (box[3] - box[1])
+        self._roi = box if area < 0.8 * self.width * self.height else None
+
+
+class FrameProcessor:
+    """
+    The per-frame work shared by the live pipeline and the offline benchmark:
+
+    resize() -> to_rgb() (crop + BGR->RGB) -> [recognizer] -> finish() (hands)
+
+    It never touches the camera or MediaPipe, so it can be driven by a video
+    file, synthetic frames, or any recognizer with the same result shape.
+    """
+
+    def __init__(self, adaptive=True, frame_size=FRAME_SIZE):
+        self.frame_size = frame_size
+        self.scheduler = AdaptiveScheduler(frame_size) if adaptive else None
+        self.skipped = 0  # Frames not processed because the scheduler is idle
+
+    def should_run(self, now):
+        if self.scheduler and not self.scheduler.should_run(now):
+            self.skipped += 1
+            return False
+        return True
+
+    def resize(self, frame):
+        return cv2.resize(frame, self.frame_size)
+
+    def to_rgb(self, frame):
+        """Crops to the tracked hands (if any) and converts. Returns (rgb, roi)."""
+        roi = self.scheduler.roi() if self.scheduler else None
+        if roi:
+            x0, y0, x1, y1 = roi
+            frame = frame[y0:y1, x0:x1]
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), roi
+
+    def finish(self, result, roi, now):
+        """Feeds the result back to the scheduler and returns its (side, gesture, score) hands."""
+        if self.scheduler:
+            self.scheduler.update(result, roi, now)
+        return hand_events(result)
+
+    @property
+    def mode(self):
+        return self.scheduler.mode if self.scheduler else "off"
+
+
+class BroadcastGate:
+    """
+    Runs per-frame hands through a GestureTracker and forwards to the Hub:
+    - the confirmed gesture string, only when it changed (robot + tape),
+    - an ONSET/OFFSET GESTURE_EVENT per confirmed change (controller triggers).
+    While a replay is overriding the live camera only the gesture string is
+    held back (the robot is busy replaying); events still go out, because
+    the tracker reports each edge only once and a start gesture made during
+    a replay must still start a recording.
+    """
+
+    def __init__(self, server, verbose=True, session=DEFAULT_SESSION, tracker=None):
+        self.server = server
+        self.verbose = verbose
+        self.session = session
+        self.tracker = tracker or GestureTracker()
+        self.last_output = None
+        self.sent = 0  # Gesture strings handed to the Hub
+        self.events_sent = 0  # ...and onset/offset events
+
+    def offer(self, hands, now=None):
+        """Feeds one frame's hands. Returns True if anything was actually sent."""
+        events = self.tracker.update(hands, time.monotonic() if now is None else now)
+        frames = [(Kind.GESTURE_EVENT, encode_gesture_event(*event)) for event in events]
+
+        # --- LOGIC UPDATE: OVERRIDE CHECK ---
+        # If 'override_until' is active (meaning a REPLAY is happening),
+        # we SKIP sending the live gesture string. This prevents the live video
+        # from fighting with the recorded replay data. It is sent once the
+        # override ends, since last_output is only updated when it goes out.
+        final_output = self.tracker.output()
+        if final_output != self.last_output and not self.server.is_overridden(self.session):
+            if self.verbose:
+                print("Gesture:", final_output)
+            frames.append((Kind.GESTURE, final_output))
+            self.last_output = final_output
+        if not frames:
+            return False
+        self.server.send_frames(frames, self.session)
+        self.sent += len(frames) - len(events)
+        self.events_sent += len(events)
+        return True
+
+
+class VideoRecognizer:
+    """
+    Synchronous adapter around a VIDEO-mode MediaPipe GestureRecognizer,
+    used where results are needed in-line (e.g. the benchmark).
+    """
+
+    def __init__(self, recognizer):
+        import mediapipe as mp
+        self.mp = mp
+        self.recognizer = recognizer
+
+    def warm_up(self, frame_size=FRAME_SIZE):
+        """First inference pays for graph set-up; do it on a blank frame. Returns seconds."""
+        started = time.perf_counter()
+        self.recognizer.recognize_for_video(blank_image(frame_size), WARM_UP_TIMESTAMP)
+        return time.perf_counter() - started
+
+    def recognize(self, rgb, timestamp_ms):
+        mp_image = self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=rgb)
+        return self.recognizer.recognize_for_video(mp_image, timestamp_ms)
+
+    def close(self):
+        self.recognizer.close()
+
+
+class GesturePipeline:
+    """
+    Runs gesture detection as three overlapping stages:
+
+    1. Capture   (thread): cap.read() -> LatestFrameSlot
+    2. Inference (thread): resize + convert -> recognizer.recognize_async()
+                           MediaPipe LIVE_STREAM mode calls on_result() when done.
+    3. Broadcast (thread): hands -> BroadcastGate (tracker) -> server.send_frames()
+
+    Camera I/O, inference and networking never wait on each other.
+    queue_depths() shows where frames are piling up.
+
+    With 'adaptive' on, an AdaptiveScheduler lowers the rate while nobody is
+    in view and crops frames to the hands while they are tracked.
+
+    'cap' is anything with a cv2.VideoCapture-style read() method, and the
+    recognizer either engine (GestureRecognizer or LandmarkRecognizer).
+    A 'landmark_tape' records every hand for training landmark templates.
+    """
+
+    def __init__(self, cap, server, adaptive=True, session=DEFAULT_SESSION, landmark_tape=None):
+        self.cap = cap
+        self.server = server
+        self.landmark_tape = landmark_tape
+        self.recognizer = None
+        self.processor = FrameProcessor(adaptive)
+        self.gate = BroadcastGate(server, session=session)
+        self.pending = {}  # timestamp -> (crop used, submit time) for each inference
+        self.pending_lock = Lock()  # Written by the inference thread, cleared by MediaPipe's
+
+        self.frames = LatestFrameSlot()
+        self.outputs = queue.Queue(maxsize=BROADCAST_QUEUE_SIZE)  # (hands, time) per result
+        self.submitted = 0  # Frames handed to MediaPipe (inference thread only)
+        self.completed = 0  # Results returned by MediaPipe (callback thread only)
+        self.inference_dropped = 0  # Frames MediaPipe skipped without a callback
+        self.results_dropped = 0  # Outputs discarded because the broadcast queue was full
+
+        # Latest state, read by the UI thread
+        self.display_frame = None
+        self.display_seq = 0
+        self.latest_output = "NONE"
+
+        self.running = Event()
+        self.threads = []
+        self.warmed_up = Event()
+
+    def warm_up(self, recognizer, timeout=10.0):
+        """
+        Runs the recognizer once on a blank frame before the camera loop
+        starts, so MediaPipe's graph set-up is not paid on the first real
+        gesture. Returns the seconds it took, or None on timeout.
+        """
+        started = time.perf_counter()
+        recognizer.recognize_async(blank_image(self.processor.frame_size), WARM_UP_TIMESTAMP)
+        if not self.warmed_up.wait(timeout):
+            return None
+        elapsed = time.perf_counter() - started
+        metrics.record("pipeline.warm_up", elapsed)
+        return elapsed
+
+    def start(self, recognizer):
+        """'recognizer' must be a LIVE_STREAM GestureRecognizer using self.on_result."""
+        self.recognizer = recognizer
+        self.running.set()
+        for target in (self.capture_loop, self.inference_loop, self.broadcast_loop):
+            thread = Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.running.clear()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        self.threads = []
+
+    # --- STAGE 1: CAPTURE ---
+    def capture_loop(self):
+        failures = 0
+        while self.running.is_set():
+            started = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                # Back off instead of spinning a core; a camera that stays gone (or the
+                # end of a video file) ends capture, the other stages just go idle
+                failures += 1
+                if failures >= MAX_READ_FAILURES:
+                    print(f"No frames from the camera for {failures} reads, capture stopped.")
+                    return
+                time.sleep(READ_RETRY_DELAY)
+                continue
+            failures = 0
+            metrics.record("pipeline.capture", time.perf_counter() - started)
+            self.frames.put(frame, int(time.monotonic() * 1000))
+
+    # --- STAGE 2: INFERENCE ---
+    def inference_loop(self):
+        import mediapipe as mp
+        last_timestamp = WARM_UP_TIMESTAMP
+        while self.running.is_set():
+            item = self.frames.take(timeout=0.1)
+            if item is None:
+                continue
+            frame, timestamp = item
+
+            # While idle, most frames are skipped before any pixel work is done
+            # (the preview then also updates at the probe rate)
+            if not self.processor.should_run(time.monotonic()):
+                continue
+
+            # LIVE_STREAM requires strictly increasing timestamps
+            timestamp = max(timestamp, last_timestamp + 1)
+            last_timestamp = timestamp
+
+            # Resize & Convert for MediaPipe
+            started = time.perf_counter()
+            frame = self.processor.resize(frame)
+            self.display_frame = frame
+            self.display_seq += 1
+
+            rgb, roi = self.processor.to_rgb(frame)
+            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+            submitted_at = time.perf_counter()
+            metrics.record("pipeline.preprocess", submitted_at - started)
+
+            with self.pending_lock:
+                self.pending[timestamp] = (roi, submitted_at)
+            self.submitted += 1
+            self.recognizer.recognize_async(mp_image, timestamp)
+
+    def on_result(self, result, output_image, timestamp_ms):
+        """MediaPipe LIVE_STREAM callback (runs on MediaPipe's own thread)."""
+        if timestamp_ms == WARM_UP_TIMESTAMP:
+            self.warmed_up.set()  # Blank warm-up frame: nothing to broadcast
+            return
+        self.completed += 1
+        with self.pending_lock:
+            roi, submitted_at = self.pending.pop(timestamp_ms, (None, None))
+            # LIVE_STREAM drops frames under load without calling back, and
+            # results arrive in timestamp order: older entries never will
+            stale = [t for t in self.pending if t < timestamp_ms]
+            for t in stale:
+                del self.pending[t]
+        self.inference_dropped += len(stale)
+        if submitted_at is not None:
+            metrics.record("pipeline.inference", time.perf_counter() - submitted_at)
+        now = time.monotonic()
+        if self.landmark_tape is not None:
+            self.landmark_tape.append_result(result, output_image.width, output_image.height, now)
+        hands = self.processor.finish(result, roi, now)
+        self.latest_output = format_hands(hands)
+        try:
+            self.outputs.put_nowait((hands, now))
+        except queue.Full:
+            self.results_dropped += 1
+
+    # --- STAGE 3: BROADCAST ---
+    def broadcast_loop(self):
+        while self.running.is_set():
+            try:
+                hands, seen_at = self.outputs.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.gate.offer(hands, seen_at)
+
+    def queue_depths(self):
+        """Snapshot of how much work is waiting in front of each stage."""
+        return {
+            "capture_slot": self.frames.depth(),
+            "capture_dropped": self.frames.dropped,
+            "inference_in_flight": len(self.pending),
+            "inference_dropped": self.inference_dropped,
+            "broadcast_queue": self.outputs.qsize(),
+            "broadcast_dropped": self.results_dropped,
+            "scheduler": self.processor.mode,
+            "frames_skipped": self.processor.skipped,
+        }
+
+
+class PreviewWindow:
+    """
+    Optional on-screen preview, redrawn at most 'max_fps' times per second.
+
+    It runs on the calling (main) thread because OpenCV's GUI functions are
+    not reliable on other threads, while inference stays on the pipeline
+    threads. A slow display therefore no longer slows down recognition.
+    """
+
+    def __init__(self, pipeline, max_fps=PREVIEW_FPS, title="Gesture Recognition"):
+        self.pipeline = pipeline
+        self.interval = 1.0 / max_fps
+        self.title = title
+
+    def run(self, stop_event):
+        """Draws until 'stop_event' is set. Pressing ESC sets it."""
+        shown_seq = 0
+        while not stop_event.is_set():
+            started = time.monotonic()
+
+            # Draw UI with the newest frame the inference stage has seen
+            if self.pipeline.display_seq != shown_seq:
+                shown_seq = self.pipeline.display_seq
+                frame = self.pipeline.display_frame.copy()
+                cv2.putText(frame, self.pipeline.latest_output, (10, 40),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
+                cv2.imshow(self.title, frame)
+
+            # Sleep inside waitKey for the rest of the frame budget
+            remaining = self.interval - (time.monotonic() - started)
+            if cv2.waitKey(max(1, int(remaining * 1000))) & 0xFF == 27:  # Exit on 'ESC'
+                stop_event.set()
+
+        cv2.destroyAllWindows()
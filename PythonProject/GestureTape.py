@@ -0,0 +1,118 @@
+import time
+from array import array
+
+# ========================================================================
+#   GESTURE TAPE / REPLAY CONFIGURATION
+# ========================================================================
+REPLAY_TICK = 0.05  # FORCE frames due within the same tick go out in one batch
+MIN_STRETCH = 0.5  # Limits on how much a tape may be sped up / slowed down
+MAX_STRETCH = 2.0
+
+
+class GestureTape:
+    """
+    Compact recording of the gestures seen while the user was talking.
+
+    Replaces the old list of {'time', 'gesture'} dicts:
+    - Timestamps come from time.monotonic(), so wall-clock jumps cannot
+      reorder or stretch the recording.
+    - Gesture strings are interned once in 'vocab'; the tape itself is two
+      flat arrays (offset in seconds, gesture code).
+    - Consecutive repeats are collapsed: an entry is only stored when the
+      gesture changes, and holds until the next one.
+    - The first non-"NONE" entry is tracked while recording, so replay does
+      not have to rescan the tape to trim the initial stillness.
+    """
+
+    def __init__(self, origin=None):
+        self.origin = time.monotonic() if origin is None else origin
+        self.times = array("d")  # Seconds since origin at which each run starts
+        self.codes = array("H")  # Index into vocab
+        self.vocab = []
+        self.codes_by_gesture = {}
+        self.first_move = None  # Index of the first entry that is not stillness
+        self.observed = 0  # Raw updates appended, repeats included
+        self.last_seen = 0.0  # Offset of the most recent update
+
+    def intern(self, gesture):
+        code = self.codes_by_gesture.get(gesture)
+        if code is None:
+            code = len(self.vocab)
+            self.vocab.append(gesture)
+            self.codes_by_gesture[gesture] = code
+        return code
+
+    def append(self, gesture, now=None):
+        """Records one gesture update. Repeats of the current gesture only extend its run."""
+        offset = (time.monotonic() if now is None else now) - self.origin
+        self.observed += 1
+        self.last_seen = offset
+        code = self.intern(gesture)
+        if self.codes and self.codes[-1] == code:
+            return
+        if self.first_move is None and "NONE" not in gesture:
+            self.first_move = len(self.codes)
+        self.times.append(offset)
+        self.codes.append(code)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def events(self, trim=True):
+        """Yields (offset, gesture), starting at the first movement if 'trim' is set."""
+        start = 0
+        if trim and self.first_move is not None:
+            start = self.first_move
+        base = self.times[start] if start < len(self.times) else 0.0
+        for i in range(start, len(self.codes)):
+            yield self.times[i] - base, self.vocab[self.codes[i]]
+
+    def span(self, trim=True):
+        """Seconds from the (trimmed) start of the tape to its last update."""
+        if not self.codes:
+            return 0.0
+        start = self.first_move if trim and self.first_move is not None else 0
+        return self.last_seen - self.times[start]
+
+
+def stretch_factor(tape, target_duration, low=MIN_STRETCH, high=MAX_STRETCH):
+    """Factor that makes the trimmed tape last 'target_duration' seconds (clamped)."""
+    span = tape.span()
+    if not target_duration or span <= 0:
+        return 1.0
+    return min(high, max(low, target_duration / span))
+
+
+def schedule(tape, stretch=1.0, tick=REPLAY_TICK):
+    """
+    Groups the tape into (due_offset, [gestures]) batches, one per tick.
+    Offsets are relative to the start of playback and already stretched.
+    """
+    batches = []
+    for offset, gesture in tape.events():
+        slot = int(offset * stretch / tick)
+        if batches and batches[-1][0] == slot:
+            batches[-1][1].append(gesture)
+        else:
+            batches.append((slot, [gesture]))
+    return [(slot * tick, gestures) for slot, gestures in batches]
+
+
+def replay(tape, send_batch, stretch=1.0, tick=REPLAY_TICK, clock=time.monotonic, sleep=time.sleep):
+    """
+    Plays a tape back through send_batch(list_of_gestures).
+
+    Every batch has an absolute deadline measured from one monotonic start
+    time, so sleep() overshoot never accumulates: a late batch is sent
+    immediately and the next one is still due at its original time.
+    Returns the worst lateness observed, in seconds.
+    """
+    start = clock()
+    worst = 0.0
+    for due, gestures in schedule(tape, stretch, tick):
+        delay = start + due - clock()
+        if delay > 0:
+            sleep(delay)
+        worst = max(worst, clock() - start - due)
+        send_batch(gestures)
+    return worst
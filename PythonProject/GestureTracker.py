@@ -0,0 +1,149 @@
+from HubProtocol import ONSET, OFFSET
+from Metrics import metrics
+
+# ========================================================================
+#   GESTURE TRACKING CONFIGURATION
+# ========================================================================
+# At 30 FPS: a clear gesture is confirmed in ~70 ms, an unsure one in
+# ~130 ms, and a hand has to be gone for ~200 ms before it is released.
+CONFIRM_FRAMES = 4  # Consecutive frames a new gesture needs to be confirmed
+FAST_CONFIRM_FRAMES = 2  # ...or this many, if every one scored CONFIRM_SCORE or more
+CONFIRM_SCORE = 0.8
+HOLD_SCORE = 0.5  # Frames scored below this neither confirm nor break a gesture
+RELEASE_FRAMES = 6  # Consecutive frames without the hand before it counts as gone
+
+NO_GESTURE = "None"  # MediaPipe's category for a visible hand without a gesture
+
+
+def hand_events(result):
+    """
+    Compact form of a GestureRecognizerResult: a tuple of
+    (handedness, gesture, score) per detected hand.
+    """
+    hands = []
+    for i, gesture_list in enumerate(result.gestures or []):
+        if result.handedness and len(result.handedness) > i:
+            handed = result.handedness[i][0].category_name
+        else:
+            handed = "Unknown"
+        top = gesture_list[0]
+        hands.append((handed, top.category_name, round(float(top.score), 3)))
+    return tuple(hands)
+
+
+def format_hands(hands):
+    """(handedness, gesture, score) tuples -> "Right_Open_Palm | Left_Victory", or "NONE"."""
+    if not hands:
+        return "NONE"
+    return " | ".join(f"{side}_{gesture}" for side, gesture, _ in hands)
+
+
+class HandTracker:
+    """
+    State machine for one hand side ("Right", "Left").
+
+    The confirmed gesture only changes once a different observation has
+    persisted (CONFIRM_FRAMES in a row, or FAST_CONFIRM_FRAMES if all of
+    them were confident), and a hand is only released after RELEASE_FRAMES
+    frames without it. Single-frame flicker therefore never reaches the
+    output, and the confirmed gesture holds through short dropouts.
+
+    Entering a real gesture emits an ONSET, leaving it an OFFSET;
+    NO_GESTURE and an absent hand emit nothing.
+    """
+
+    def __init__(self, side, confirm_frames=CONFIRM_FRAMES, fast_frames=FAST_CONFIRM_FRAMES,
+                 confirm_score=CONFIRM_SCORE, hold_score=HOLD_SCORE, release_frames=RELEASE_FRAMES):
+        self.side = side
+        self.confirm_frames = confirm_frames
+        self.fast_frames = fast_frames
+        self.confirm_score = confirm_score
+        self.hold_score = hold_score
+        self.release_frames = release_frames
+
+        self.gesture = None  # Confirmed gesture; None = hand not in view
+        self.score = 0.0  # Score the confirmed gesture was accepted with
+        self.since = 0.0  # When it was confirmed
+        self.candidate = None  # Different observation waiting for confirmation
+        self.streak = 0  # Consecutive frames of the candidate
+        self.confident = 0  # ...of which scored at least confirm_score
+        self.candidate_since = 0.0
+        self.candidate_score = 0.0
+
+    def update(self, gesture, score, now):
+        """
+        Feeds one frame. 'gesture' is None when the hand was not detected.
+        Returns a list of (edge, side, gesture, score, held) events.
+        """
+        if gesture is not None and score < self.hold_score:
+            return []  # Too unsure to count either way
+        if gesture == self.gesture:
+            self.candidate, self.streak = None, 0
+            return []
+
+        if self.streak == 0 or gesture != self.candidate:
+            self.candidate, self.streak, self.confident = gesture, 0, 0
+            self.candidate_since, self.candidate_score = now, 0.0
+        self.streak += 1
+        if gesture is not None and score >= self.confirm_score:
+            self.confident += 1
+        self.candidate_score = max(self.candidate_score, score)
+
+        if gesture is None:
+            confirmed = self.streak >= self.release_frames
+        else:
+            confirmed = self.streak >= self.confirm_frames or self.confident >= self.fast_frames
+        if not confirmed:
+            return []
+        return self.confirm(now)
+
+    def confirm(self, now):
+        events = []
+        previous, gesture = self.gesture, self.candidate
+        if previous not in (None, NO_GESTURE):
+            events.append((OFFSET, self.side, previous, self.score, now - self.since))
+        if gesture not in (None, NO_GESTURE):
+            events.append((ONSET, self.side, gesture, self.candidate_score, 0.0))
+            metrics.record("gesture.confirm", now - self.candidate_since)
+
+        self.gesture, self.score, self.since = gesture, self.candidate_score, now
+        self.candidate, self.streak = None, 0
+        return events
+
+
+class GestureTracker:
+    """
+    One HandTracker per hand side, fed with per-frame hands (hand_events()
+    tuples). The confirmed state is what goes to the robot (output()), and
+    the ONSET/OFFSET events are what the controller triggers on.
+    """
+
+    def __init__(self, **thresholds):
+        self.thresholds = thresholds  # Passed to every HandTracker
+        self.hands = {}  # side -> HandTracker
+
+    def update(self, hands, now):
+        """Feeds one frame's hands. Returns the events it caused, in hand order."""
+        seen = {}
+        for side, gesture, score in hands:
+            if side not in seen or score > seen[side][1]:  # Two hands on one side: keep the surer
+                seen[side] = (gesture, score)
+
+        events = []
+        for side in sorted(seen.keys() | self.hands.keys(), reverse=True):
+            tracker = self.hands.get(side)
+            if tracker is None:
+                tracker = self.hands[side] = HandTracker(side, **self.thresholds)
+            gesture, score = seen.get(side, (None, 0.0))
+            events += tracker.update(gesture, score, now)
+        return events
+
+    def confirmed(self):
+        """(side, gesture, score) of every confirmed hand, "Right" before "Left"."""
+        return tuple((side, tracker.gesture, tracker.score)
+                     for side, tracker in sorted(self.hands.items(), reverse=True)
+                     if tracker.gesture is not None)
+
+    def output(self):
+        """Confirmed state in the format the robot expects."""
+        return format_hands(self.confirmed())
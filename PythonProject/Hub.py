@@ -0,0 +1,538 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from threading import Thread, Event
+
+from HubProtocol import (
+    Kind, FrameDecoder, ProtocolError, MAGIC, MODE_FRAMED, MODE_LEGACY,
+    TOPIC_GESTURE, TOPIC_SPEECH, TOPIC_REPLAY, TOPIC_STATS, TOPIC_PRESENCE, TOPIC_OF,
+    DEFAULT_SESSION, LEGACY_TOPICS, FRAMED_TOPICS,
+    detect_mode, encode_batch, parse_hello, parse_legacy, to_legacy,
+)
+from HubTraffic import TrafficRecorder, IN, OUT, OPEN, CLOSE, HUB_CLIENT
+from Metrics import metrics
+
+# ========================================================================
+#   HUB CONFIGURATION
+# ========================================================================
+# How long a new client has to send the framing handshake before it is
+# treated as a plain-text (legacy) client such as the Choregraphe box.
+HANDSHAKE_TIMEOUT = 0.5
+
+# Max guaranteed (SAY/LANG/FORCE) messages waiting for one client.
+# A client that falls this far behind is considered dead and dropped.
+MAX_PENDING = 256
+
+# A single write that cannot be flushed within this time marks the client as stalled.
+SEND_TIMEOUT = 2.0
+
+
+class DeliveryReceipt:
+    """
+    Calls 'callback' once every target channel has flushed (or dropped) its
+    copy, i.e. the bytes were handed to each client's socket. It says nothing
+    about whether the client has read or acted on them.
+    """
+
+    def __init__(self, count, callback):
+        self.remaining = count
+        self.callback = callback
+        if count == 0:
+            callback()
+
+    def done(self):
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.callback()
+
+
+class ClientChannel:
+    """
+    Outbound queue for ONE connected client.
+
+    Two lanes:
+    - 'latest_gesture': live camera state. Latest value wins, so a slow
+      client only ever sees the newest gesture instead of a backlog.
+    - 'pending': guaranteed messages (SAY/LANG/FORCE), delivered in order.
+      Bounded by MAX_PENDING; overflowing it drops the client. An entry may
+      carry a DeliveryReceipt that is completed once it has been flushed
+      to the socket.
+
+    Only the event loop thread touches a channel, so no lock is needed.
+    """
+
+    def __init__(self, writer, mode, address, topics, client_id=0, recorder=None):
+        self.writer = writer
+        self.mode = mode
+        self.address = address
+        self.client_id = client_id  # Identifies the client in traffic logs
+        self.recorder = recorder
+        self.session = DEFAULT_SESSION
+        self.topics = set(topics)  # Only messages on these topics are delivered
+        self.latest_gesture = None  # (text, queued_at)
+        self.pending = deque()  # (kind, text, queued_at, receipt)
+        self.coalesced = 0  # Gesture updates overwritten before they were sent
+        self.sent = 0
+        self.received = 0  # Frames received from this client (its sequence numbers)
+        self.closed = False
+        self.wakeup = asyncio.Event()
+
+    @property
+    def backlog(self):
+        return len(self.pending) + (self.latest_gesture is not None)
+
+    def offer(self, kind, text, guaranteed, queued_at, receipt=None):
+        if self.closed:
+            if receipt:
+                receipt.done()
+            return
+        if not guaranteed:
+            if self.latest_gesture is not None:
+                self.coalesced += 1
+                metrics.increment("hub.gestures_coalesced")
+            self.latest_gesture = (text, queued_at)
+        else:
+            # Keep ordering: a live gesture queued before this message goes first
+            if self.latest_gesture is not None:
+                self.pending.append((Kind.GESTURE,) + self.latest_gesture + (None,))
+                self.latest_gesture = None
+            if len(self.pending) >= MAX_PENDING:
+                print(f"Client {self.address} too slow ({len(self.pending)} pending). Dropping.")
+                metrics.increment("hub.clients_dropped")
+                self.close()
+                if receipt:
+                    receipt.done()
+                return
+            self.pending.append((kind, text, queued_at, receipt))
+        self.wakeup.set()
+
+    def take_batch(self):
+        """Empties both lanes into one list of (kind, text, queued_at, receipt) to write."""
+        batch = list(self.pending)
+        self.pending.clear()
+        if self.latest_gesture is not None:
+            batch.append((Kind.GESTURE,) + self.latest_gesture + (None,))
+            self.latest_gesture = None
+        return batch
+
+    async def run(self):
+        """Writer task: flushes the queue whenever something new is offered."""
+        try:
+            while not self.closed:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                batch = self.take_batch()
+                if not batch:
+                    continue
+
+                if self.mode == MODE_FRAMED:
+                    self.writer.write(encode_batch((kind, text) for kind, text, _, _ in batch))
+                else:
+                    # Legacy robot box expects one plain string per write
+                    for kind, text, _, _ in batch:
+                        self.writer.write(to_legacy(kind, text).encode())
+                        if kind in (Kind.SAY, Kind.LANG):
+                            await asyncio.wait_for(self.writer.drain(), SEND_TIMEOUT)
+                await asyncio.wait_for(self.writer.drain(), SEND_TIMEOUT)
+
+                # Time from send_signal() to the bytes being handed to the OS
+                flushed = time.perf_counter()
+                for kind, text, queued_at, receipt in batch:
+                    metrics.record("hub.send_latency", flushed - queued_at)
+                    if receipt:
+                        receipt.done()
+                    if self.recorder:
+                        self.recorder.record(OUT, kind, self.client_id, text)
+                self.sent += len(batch)
+        except (OSError, asyncio.TimeoutError) as e:
+            print(f"Send to {self.address} failed: {e!r}")
+            metrics.increment("hub.clients_dropped")
+        finally:
+            self.close()
+
+    def stats(self):
+        return {
+            "address": str(self.address),
+            "mode": self.mode,
+            "session": self.session,
+            "topics": sorted(self.topics),
+            "backlog": self.backlog,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+        }
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.wakeup.set()  # Let the writer task exit
+            self.writer.close()
+            # Nothing more will be delivered; do not keep senders waiting
+            for _, _, _, receipt in self.pending:
+                if receipt:
+                    receipt.done()
+            self.pending.clear()
+
+
+class Session:
+    """
+    One robot + controller + camera group. Several sessions can share a
+    Hub; messages never cross from one session to another, and each has
+    its own replay override.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.clients = set()
+        self.override_until = 0  # Timestamp: Ignore camera input until this time
+
+    def stats(self):
+        return {"clients": len(self.clients), "override_until": self.override_until}
+
+
+class SimpleServer:
+    """
+    Acts as the 'Central Hub' or 'Router' for the entire system.
+
+    Responsibilities:
+    1. Accepts connections from:
+       - The Translation Controller (Laptop script)
+       - The NAO Robot (Choregraphe script)
+    2. Routes data by topic (see HubProtocol.py), within a session:
+       - 'gesture': live gesture strings from the camera -> Robot + Laptop.
+       - 'speech': speech commands (SAY/LANG) from Laptop -> Robot.
+       - 'replay': replay commands (FORCE) from Laptop -> Robot.
+       - 'stats': periodic metrics snapshots -> monitors.
+       Clients pick a session and topics with a HELLO frame; until then
+       they are in the default session (plain-text robot box included).
+    3. Handles Priority:
+       - Uses each session's 'override_until' to pause live gesture strings
+         when a recorded gesture sequence is being replayed.
+    4. Speaks two protocols (see HubProtocol.py):
+       - Framed: typed, length-prefixed frames, batched per write.
+       - Legacy: the original plain-text strings, kept for the robot box.
+
+    All networking runs on one asyncio event loop in a background thread.
+    Each client gets its own ClientChannel, so a stalled robot or laptop
+    only backs up its own queue and never blocks the camera loop.
+
+    A STATS frame (or "STATS:" in plain text) is answered, to the asker only,
+    with a JSON snapshot of this process's metrics and per-client queues.
+    """
+
+    def __init__(self, host, port, record_path=None):
+        self.host = host
+        self.port = port
+        self.loop = None
+        self.server = None
+        self.clients = set()  # ClientChannel for every connected device (Robot + Laptop)
+        self.sessions = {DEFAULT_SESSION: Session(DEFAULT_SESSION)}
+        self.client_ids = itertools.count(HUB_CLIENT + 1)
+        # Optional binary log of all traffic, replayable with benchmarks/hub_load.py
+        self.recorder = TrafficRecorder(record_path) if record_path else None
+        self.shutdown_requested = Event()  # Set when a client sends SHUTDOWN
+        self.start_server()
+
+    def start_server(self):
+        """Starts the event loop thread and waits until the port is listening."""
+        ready = Event()
+        self.loop = asyncio.new_event_loop()
+        Thread(target=self.run_loop, args=(ready,), daemon=True).start()
+        ready.wait()
+
+    def run_loop(self, ready):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(asyncio.start_server(
+                self.handle_client, self.host, self.port,
+                reuse_address=True,  # Allows restarting without 'Address already in use' errors
+            ))
+            self.port = self.server.sockets[0].getsockname()[1]  # Resolves port 0
+            print(f"Server listening on {self.host}:{self.port}")
+        except Exception as e:
+            print(f"Failed to start server: {e}")
+            return
+        finally:
+            ready.set()
+        self.loop.run_forever()
+
+    async def handle_client(self, reader, writer):
+        """
+        Runs for each connected client.
+        Listens for incoming messages, mainly commands from 'TranslationController.py'.
+        """
+        address = writer.get_extra_info("peername")
+        print(f"New Connection from {address}")
+        channel = None
+        try:
+            mode, leftover = await self.read_handshake(reader)
+            topics = FRAMED_TOPICS if mode == MODE_FRAMED else LEGACY_TOPICS
+            channel = ClientChannel(writer, mode, address, topics, next(self.client_ids), self.recorder)
+            if self.recorder:
+                self.recorder.record(OPEN, 0, channel.client_id, f"{address} {mode}")
+            self.clients.add(channel)
+            self.join(channel, DEFAULT_SESSION)
+            if mode == MODE_LEGACY:
+                self.announce(channel)  # Framed robots announce themselves with HELLO
+            sender = asyncio.ensure_future(channel.run())
+
+            if mode == MODE_FRAMED:
+                await self.read_framed(reader, leftover, channel)
+            else:
+                await self.read_legacy(reader, leftover, channel)
+            sender.cancel()
+        except (OSError, ProtocolError, UnicodeDecodeError) as e:
+            print(f"Client error: {e}")
+        except asyncio.CancelledError:
+            pass  # Hub is shutting down; fall through to the cleanup
+
+        # Cleanup on disconnect
+        if channel is not None:
+            self.clients.discard(channel)
+            self.leave(channel)
+            channel.close()
+            if self.recorder:
+                self.recorder.record(CLOSE, 0, channel.client_id)
+        else:
+            writer.close()
+        print("Client disconnected.")
+
+    async def read_handshake(self, reader):
+        """
+        Works out which protocol a client speaks.
+        Returns the mode plus any bytes received after the handshake.
+        """
+        pending = b""
+        deadline = self.loop.time() + HANDSHAKE_TIMEOUT
+        while True:
+            try:
+                data = await asyncio.wait_for(reader.read(1024), deadline - self.loop.time())
+            except asyncio.TimeoutError:
+                # Silent clients (only listening) are plain-text receivers
+                return MODE_LEGACY, pending
+            if not data:
+                raise ConnectionResetError("closed during handshake")
+            pending += data
+            mode = detect_mode(pending)
+            if mode == MODE_FRAMED:
+                return mode, pending[len(MAGIC):]
+            if mode == MODE_LEGACY:
+                return mode, pending
+
+    async def read_framed(self, reader, leftover, channel):
+        """Receives typed frames; every read is answered with one batched broadcast."""
+        decoder = FrameDecoder()
+        data = leftover
+        while not channel.closed:
+            if data:
+                frames = decoder.feed(data)
+                if frames:
+                    self.route(frames, channel)
+            data = await reader.read(4096)
+            if not data:
+                break  # Client disconnected
+
+    async def read_legacy(self, reader, leftover, channel):
+        """Receives plain-text commands using the original substring rules."""
+        data = leftover
+        while not channel.closed:
+            if data:
+                command = parse_legacy(data.decode('utf-8'))
+                if command:
+                    self.route([command], channel)
+            data = await reader.read(1024)
+            if not data:
+                break  # Client disconnected
+
+    def join(self, channel, name):
+        """Moves a channel into session 'name', creating the session if needed."""
+        self.leave(channel)
+        session = self.sessions.get(name)
+        if session is None:
+            session = self.sessions[name] = Session(name)
+        session.clients.add(channel)
+        channel.session = name
+
+    def announce(self, channel):
+        """
+        Tells the session that a robot (a 'speech' subscriber) joined. A
+        (re)connected robot is back to its default voice, so controllers
+        must not assume the last LANG they sent still holds.
+        """
+        if TOPIC_SPEECH in channel.topics:
+            self.publish(channel.session, [(TOPIC_PRESENCE, Kind.SPEAKER_JOINED, str(channel.address))],
+                         time.perf_counter(), source=channel)
+
+    def leave(self, channel):
+        session = self.sessions.get(channel.session)
+        if session is None:
+            return
+        session.clients.discard(channel)
+        if not session.clients and session.name != DEFAULT_SESSION:
+            del self.sessions[session.name]
+
+    def route(self, frames, channel):
+        """
+        --- ROUTING LOGIC ---
+        Turns incoming commands from 'channel' into messages published to
+        its session. Runs on the loop thread.
+
+        Framed senders get one cumulative ACK per call, sent once the
+        resulting messages were delivered to every subscriber's socket (not
+        once the robot has acted on them).
+        """
+        outgoing = []  # (topic, kind, text)
+        channel.received += len(frames)
+        if self.recorder:
+            for kind, text in frames:
+                self.recorder.record(IN, kind, channel.client_id, text)
+        for kind, text in frames:
+            # Case 1: Speech / Voice Commands (Laptop -> Robot)
+            # Format: SAY "Hello World", LANG "Spanish"
+            if kind in (Kind.SAY, Kind.LANG):
+                print(f"Relaying {kind.name}: {text}")
+                outgoing.append((TOPIC_SPEECH, kind, text))
+
+            # Case 2: Replay Command (Laptop -> Robot)
+            # Format: FORCE "Right_Open_Palm"
+            # This overrides the live camera for a split second to ensure
+            # the robot mimics the recorded gesture, not the current stillness.
+            elif kind == Kind.FORCE:
+                outgoing.append((TOPIC_REPLAY, Kind.GESTURE, text))
+                # Set a timeout: Ignore camera for 0.3s
+                self.sessions[channel.session].override_until = time.time() + 0.3
+
+            # Case 3: Live gesture from a remote camera process (held back
+            # during a replay), or its onset/offset (always: the controller's
+            # triggers must not lose an edge to a replay)
+            elif kind == Kind.GESTURE:
+                if not self.is_overridden(channel.session):
+                    outgoing.append((TOPIC_GESTURE, kind, text))
+            elif kind == Kind.GESTURE_EVENT:
+                outgoing.append((TOPIC_OF[kind], kind, text))
+
+            # Case 4: Remote stop (replaces pressing ESC on a headless box)
+            elif kind == Kind.SHUTDOWN:
+                print("Shutdown requested by client.")
+                self.shutdown_requested.set()
+
+            # Case 5: Metrics query, answered only to the asker
+            elif kind == Kind.STATS:
+                channel.offer(Kind.STATS, json.dumps(self.stats()), True, time.perf_counter())
+
+            # Case 6: Registration: session + topics this client wants
+            elif kind == Kind.HELLO:
+                try:
+                    name, topics = parse_hello(text)
+                except ProtocolError as e:
+                    print(f"Ignoring HELLO from {channel.address}: {e}")
+                    continue
+                channel.topics = topics
+                self.join(channel, name)
+                self.announce(channel)
+                print(f"{channel.address} joined session '{name}' ({', '.join(sorted(topics)) or 'no topics'})")
+
+        now = time.perf_counter()
+        if channel.mode != MODE_FRAMED:
+            if outgoing:
+                self.publish(channel.session, outgoing, now, source=channel)
+            return
+
+        seq = channel.received
+
+        def on_delivered():
+            channel.offer(Kind.ACK, str(seq), True, now)
+
+        if outgoing:
+            self.publish(channel.session, outgoing, now, source=channel, on_delivered=on_delivered)
+        else:
+            on_delivered()
+
+    def stats(self):
+        """Metrics snapshot plus the state of every session and client queue."""
+        snapshot = metrics.snapshot()
+        snapshot["sessions"] = {name: session.stats() for name, session in self.sessions.items()}
+        snapshot["clients"] = [channel.stats() for channel in self.clients]
+        return snapshot
+
+    def close(self, timeout=2.0):
+        """Stops accepting clients, disconnects everyone and stops the event loop."""
+        future = asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop)
+        try:
+            future.result(timeout)
+        except Exception as e:
+            print(f"Hub shutdown error: {e!r}")
+        if self.recorder:
+            self.recorder.close()
+
+    async def shutdown(self):
+        if self.server is not None:
+            self.server.close()
+        for channel in list(self.clients):
+            channel.close()
+        self.clients.clear()
+
+        # Let every client task unwind before the loop stops
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.call_soon(self.loop.stop)
+
+    def publish(self, session, messages, queued_at, source=None, on_delivered=None):
+        """
+        Queues (topic, kind, text) messages on every client of 'session'
+        subscribed to the topic, except 'source'. Loop thread only.
+
+        Live gestures are coalesced (latest value wins); every other topic is
+        guaranteed. If 'on_delivered' is given, it runs once every guaranteed
+        copy has been flushed.
+        """
+        state = self.sessions.get(session)
+        deliveries = []
+        if state is not None:
+            for topic, kind, text in messages:
+                for channel in state.clients:
+                    if topic in channel.topics and channel is not source and not channel.closed:
+                        deliveries.append((channel, kind, text, topic != TOPIC_GESTURE))
+
+        guaranteed_count = sum(1 for delivery in deliveries if delivery[3])
+        receipt = DeliveryReceipt(guaranteed_count, on_delivered) if on_delivered else None
+        for channel, kind, text, guaranteed in deliveries:
+            channel.offer(kind, text, guaranteed, queued_at, receipt if guaranteed else None)
+
+    def is_overridden(self, session=DEFAULT_SESSION):
+        """True while a replay owns the robot in 'session'. Safe from any thread."""
+        state = self.sessions.get(session)
+        return state is not None and time.time() <= state.override_until
+
+    def send_signal(self, message, kind=Kind.GESTURE, session=DEFAULT_SESSION):
+        """
+        Publishes a message to the subscribers of its topic in 'session'.
+        Used for:
+        - Sending detected gestures to Robot (and the Laptop triggers).
+        - Relaying speech commands to Robot.
+
+        Safe to call from any thread: it only schedules the delivery on the
+        event loop and returns immediately.
+        """
+        self.send_frames([(kind, message)], session)
+
+    def send_frames(self, frames, session=DEFAULT_SESSION):
+        """Publishes several (kind, text) messages at once, from any thread."""
+        messages = [(TOPIC_OF[kind], kind, text) for kind, text in frames]
+        if self.recorder:
+            for kind, text in frames:
+                self.recorder.record(IN, kind, HUB_CLIENT, text)
+        self.loop.call_soon_threadsafe(self.publish, session, messages, time.perf_counter())
+
+    def publish_stats(self):
+        """Sends a metrics snapshot to every 'stats' subscriber, in every session. Any thread."""
+        self.loop.call_soon_threadsafe(self._publish_stats)
+
+    def _publish_stats(self):
+        snapshot = json.dumps(self.stats())
+        now = time.perf_counter()
+        for name in list(self.sessions):
+            self.publish(name, [(TOPIC_STATS, Kind.STATS, snapshot)], now)
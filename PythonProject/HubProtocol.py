@@ -0,0 +1,260 @@
+import json
+import socket
+import struct
+from enum import IntEnum
+
+# ========================================================================
+#   FRAMED WIRE PROTOCOL
+# ========================================================================
+# Every frame on the wire looks like:
+#
+#   [ kind : 1 byte ][ length : 4 bytes, big-endian ][ payload : UTF-8 ]
+#
+# A client opts into framing by sending MAGIC as the very first bytes after
+# connecting. Frames a framed client sends are implicitly numbered 1, 2, 3...
+# and the Hub answers with cumulative ACK frames (payload = last number
+# delivered to the hub sockets), so a sender knows its commands have been
+# written to every subscriber's socket. An ACK does not mean the robot has
+# read or acted on them; the plain-text robot box cannot confirm that.
+# Clients that never send MAGIC (e.g. the Choregraphe box in behavior.xar)
+# stay in the old plain-text mode and keep receiving bare strings like
+# "Right_Open_Palm" or "SAY:Hello".
+
+MAGIC = b"HRI\x01"
+HEADER = struct.Struct("!BI")
+MAX_PAYLOAD = 1 << 20  # 1 MiB is far more than any sentence we will ever say
+
+MODE_LEGACY = "legacy"
+MODE_FRAMED = "framed"
+
+
+class Kind(IntEnum):
+    """Typed message kinds carried by a frame."""
+    GESTURE = 1  # Live gesture string, e.g. "Right_Open_Palm | Left_None"
+    SAY = 2      # Text the robot should speak
+    LANG = 3     # Voice/language the robot should switch to
+    FORCE = 4    # Recorded gesture the robot must replay (overrides camera)
+    SHUTDOWN = 5  # Asks the gesture server to stop cleanly (headless mode)
+    STATS = 6    # Metrics query; the Hub answers the asker with a JSON snapshot
+    ACK = 7      # Hub -> framed client: "your frames up to N were written to the subscribers' sockets"
+    HELLO = 8    # Client -> Hub: JSON {"session", "role", "topics"} registration
+    GESTURE_EVENT = 9  # Confirmed gesture onset/offset, JSON (see encode_gesture_event)
+    SPEAKER_JOINED = 10  # Hub -> session: a client subscribed to 'speech' (a robot) joined; payload = its address
+
+
+# ========================================================================
+#   TOPICS, ROLES AND SESSIONS
+# ========================================================================
+# The Hub only delivers a message to clients subscribed to its topic, and
+# only within the sender's session (one robot + controller + camera set).
+TOPIC_GESTURE = "gesture"  # Live camera gestures
+TOPIC_GESTURE_EVENT = "gesture_event"  # Onset/offset of confirmed gestures (triggers)
+TOPIC_SPEECH = "speech"    # SAY / LANG for the robot
+TOPIC_REPLAY = "replay"    # Recorded gestures replayed on the robot (FORCE)
+TOPIC_STATS = "stats"      # Periodic metrics snapshots
+TOPIC_PRESENCE = "presence"  # A robot (re)connected, so its voice is back to the default
+TOPICS = (TOPIC_GESTURE, TOPIC_GESTURE_EVENT, TOPIC_SPEECH, TOPIC_REPLAY, TOPIC_STATS, TOPIC_PRESENCE)
+
+TOPIC_OF = {
+    Kind.GESTURE: TOPIC_GESTURE,
+    Kind.GESTURE_EVENT: TOPIC_GESTURE_EVENT,
+    Kind.SAY: TOPIC_SPEECH,
+    Kind.LANG: TOPIC_SPEECH,
+    Kind.FORCE: TOPIC_REPLAY,
+    Kind.STATS: TOPIC_STATS,
+    Kind.SPEAKER_JOINED: TOPIC_PRESENCE,
+}
+
+# Topics a client gets when it registers a role without listing topics
+ROLE_TOPICS = {
+    "robot": (TOPIC_GESTURE, TOPIC_SPEECH, TOPIC_REPLAY),
+    "controller": (TOPIC_GESTURE, TOPIC_GESTURE_EVENT, TOPIC_PRESENCE),
+    "camera": (),
+    "monitor": TOPICS,
+}
+
+DEFAULT_SESSION = "default"
+# Clients that never say HELLO: the plain-text robot box keeps getting what
+# a robot needs; other framed clients keep the old "everything" behaviour
+# (minus gesture events and presence, kinds their decoders would not know).
+LEGACY_TOPICS = ROLE_TOPICS["robot"]
+FRAMED_TOPICS = (TOPIC_GESTURE, TOPIC_SPEECH, TOPIC_REPLAY, TOPIC_STATS)
+
+# Edges carried by a GESTURE_EVENT
+ONSET = "onset"  # A gesture was confirmed on a hand
+OFFSET = "offset"  # The confirmed gesture ended (other gesture or hand gone)
+
+
+# Prefixes used by the old plain-text protocol
+LEGACY_PREFIX = {
+    Kind.SAY: "SAY:",
+    Kind.LANG: "LANG:",
+    Kind.FORCE: "FORCE:",
+    Kind.STATS: "STATS:",
+    Kind.HELLO: "HELLO:",
+    Kind.GESTURE_EVENT: "EVENT:",
+}
+
+
+class ProtocolError(ValueError):
+    """Raised when a peer sends bytes that cannot be a valid frame."""
+
+
+def encode_frame(kind, text):
+    """Encodes a single (kind, text) message into one frame."""
+    payload = text.encode("utf-8")
+    if len(payload) > MAX_PAYLOAD:
+        raise ProtocolError(f"Payload too large ({len(payload)} bytes)")
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+def encode_batch(frames):
+    """
+    Encodes several (kind, text) messages into one buffer so they can be
+    written with a single sendall() call.
+    """
+    return b"".join(encode_frame(kind, text) for kind, text in frames)
+
+
+def to_legacy(kind, text):
+    """Renders a message the way the old plain-text protocol expected it."""
+    return LEGACY_PREFIX.get(kind, "") + text
+
+
+def parse_legacy(message):
+    """
+    Interprets a plain-text message using the original substring rules.
+    Returns a (kind, text) tuple, or None if the message is not a command.
+    """
+    for kind in (Kind.SAY, Kind.FORCE, Kind.LANG, Kind.STATS, Kind.HELLO, Kind.GESTURE_EVENT):
+        prefix = LEGACY_PREFIX[kind]
+        if prefix in message:
+            return kind, message.split(prefix, 1)[1]
+    return None
+
+
+def encode_hello(role=None, session=DEFAULT_SESSION, topics=None):
+    """Payload of a HELLO frame. 'topics' overrides the role's default topics."""
+    hello = {"session": session}
+    if role is not None:
+        hello["role"] = role
+    if topics is not None:
+        hello["topics"] = list(topics)
+    return json.dumps(hello)
+
+
+def parse_hello(text):
+    """Returns (session, topics) from a HELLO payload. Raises ProtocolError if invalid."""
+    try:
+        hello = json.loads(text)
+        session = str(hello.get("session", DEFAULT_SESSION))
+        if "topics" in hello:
+            topics = set(hello["topics"])
+        else:
+            topics = set(ROLE_TOPICS[hello["role"]])
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ProtocolError(f"Invalid HELLO {text!r}: {e!r}")
+    unknown = topics.difference(TOPICS)
+    if unknown:
+        raise ProtocolError(f"Unknown topics {sorted(unknown)}")
+    return session, topics
+
+
+def encode_gesture_event(edge, side, gesture, score, held=0.0):
+    """
+    Payload of a GESTURE_EVENT frame, e.g.
+    {"edge": "onset", "hand": "Right", "gesture": "Victory", "score": 0.91, "held": 0.0}.
+    'held' is how long the gesture lasted (offsets only).
+    """
+    return json.dumps({"edge": edge, "hand": side, "gesture": gesture,
+                       "score": round(score, 3), "held": round(held, 3)})
+
+
+def parse_gesture_event(text):
+    """Returns (edge, side, gesture, score, held). Raises ProtocolError if invalid."""
+    try:
+        event = json.loads(text)
+        edge = event["edge"]
+        parsed = (edge, str(event["hand"]), str(event["gesture"]),
+                  float(event.get("score", 0.0)), float(event.get("held", 0.0)))
+    except (ValueError, KeyError, TypeError) as e:
+        raise ProtocolError(f"Invalid gesture event {text!r}: {e!r}")
+    if edge not in (ONSET, OFFSET):
+        raise ProtocolError(f"Unknown gesture edge {edge!r}")
+    return parsed
+
+
+def detect_mode(data):
+    """
+    Decides which protocol a client speaks from the first bytes it sent.
+    Returns MODE_FRAMED, MODE_LEGACY, or None if more bytes are needed.
+    """
+    if data[:len(MAGIC)] == MAGIC:
+        return MODE_FRAMED
+    if MAGIC.startswith(bytes(data)):
+        return None  # Could still turn out to be the handshake
+    return MODE_LEGACY
+
+
+def open_hub_connection(host, port):
+    """Connects to the Hub and announces that this client speaks frames."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.connect((host, port))
+    sock.sendall(MAGIC)
+    return sock
+
+
+class FrameDecoder:
+    """
+    Incremental frame parser.
+
+    TCP may merge several frames into one read or split one frame across
+    reads, so bytes are accumulated in a single reusable bytearray and only
+    complete frames are returned. Consumed bytes are compacted away in place
+    instead of building a new buffer for every read.
+    """
+
+    def __init__(self, max_payload=MAX_PAYLOAD, read_size=4096):
+        self.max_payload = max_payload
+        self._buffer = bytearray()
+        self._scratch = bytearray(read_size)
+        self._scratch_view = memoryview(self._scratch)
+
+    def feed(self, data):
+        """Adds raw bytes and returns the list of complete (kind, text) frames."""
+        self._buffer += data
+        return self._drain()
+
+    def read_from(self, sock):
+        """
+        Performs one recv_into() on the socket and returns the decoded frames.
+        Returns None when the peer has closed the connection.
+        """
+        n = sock.recv_into(self._scratch)
+        if not n:
+            return None
+        return self.feed(self._scratch_view[:n])
+
+    def _drain(self):
+        frames = []
+        buffer = self._buffer
+        offset = 0
+        end = len(buffer)
+
+        while end - offset >= HEADER.size:
+            kind, length = HEADER.unpack_from(buffer, offset)
+            if length > self.max_payload:
+                raise ProtocolError(f"Frame length {length} exceeds limit")
+            start = offset + HEADER.size
+            if end - start < length:
+                break  # Wait for the rest of this frame
+            try:
+                kind = Kind(kind)
+            except ValueError:
+                raise ProtocolError(f"Unknown frame kind {kind}")
+            frames.append((kind, buffer[start:start + length].decode("utf-8")))
+            offset = start + length
+
+        if offset:
+            del buffer[:offset]
+        return frames
@@ -0,0 +1,70 @@
+import struct
+import time
+from threading import Lock
+
+from HubProtocol import Kind
+
+# ========================================================================
+#   HUB TRAFFIC LOG
+# ========================================================================
+# Binary event log written by SimpleServer(record_path=...):
+#
+#   LOG_MAGIC, then one record per event:
+#   [ t : float64 s since start ][ direction : 1 byte ][ kind : 1 byte ]
+#   [ client : uint32 ][ length : uint32 ][ payload : UTF-8 ]
+#
+# Client 0 is the Hub process itself (the in-process camera). Client ids
+# count every connection since start, so a long-running Hub outgrows 16 bits.
+LOG_MAGIC = b"HRILOG\x02"
+RECORD = struct.Struct("!dBBII")
+
+IN = 0  # Frame received from a client (or published by the Hub process)
+OUT = 1  # Message flushed to a client
+OPEN = 2  # Client connected; payload = "address mode"
+CLOSE = 3  # Client disconnected
+DIRECTIONS = {IN: "in", OUT: "out", OPEN: "open", CLOSE: "close"}
+
+HUB_CLIENT = 0
+
+
+class TrafficRecorder:
+    """
+    Appends hub events to a binary log. Thread-safe: the event loop records
+    client traffic, the camera thread records what it publishes.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.file.write(LOG_MAGIC)
+        self.started = time.perf_counter()
+        self.lock = Lock()
+        self.events = 0
+
+    def record(self, direction, kind, client, text=""):
+        payload = text.encode("utf-8")
+        header = RECORD.pack(time.perf_counter() - self.started, direction, kind, client, len(payload))
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(header)
+            self.file.write(payload)
+            self.events += 1
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+def read_log(path):
+    """Yields (t, direction, kind, client, text) for every event in a traffic log."""
+    with open(path, "rb") as f:
+        if f.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise ValueError(f"{path} is not a hub traffic log")
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            t, direction, kind, client, length = RECORD.unpack(header)
+            text = f.read(length).decode("utf-8")
+            yield t, direction, (Kind(kind) if kind else 0), client, text
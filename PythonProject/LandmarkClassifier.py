@@ -0,0 +1,368 @@
+import argparse
+import json
+import time
+from array import array
+
+import numpy as np
+
+from GesturePipeline import FRAME_SIZE, blank_image, WARM_UP_TIMESTAMP
+from GestureTracker import NO_GESTURE
+
+# ========================================================================
+#   LANDMARK CLASSIFIER CONFIGURATION
+# ========================================================================
+# The "landmarks" engine runs only MediaPipe's hand landmark model and
+# classifies the 21 points itself, against templates trained from recorded
+# sessions (see LandmarkTape and the command line at the bottom).
+FEATURE_VERSION = 1  # Bump when landmark_features() changes; old templates are refused
+MIN_SAMPLES = 10  # Gestures with fewer training hands are left out
+RADIUS_PERCENTILE = 95  # A class's radius covers this share of its own training hands
+REJECT_RADIUS = 1.5  # Hands further than this many radii from every class are NO_GESTURE
+TRIM_TRANSITIONS = 0.1  # Seconds dropped around each label change when training
+
+# --- Hand Landmark Layout (MediaPipe) ---
+WRIST = 0
+MIDDLE_MCP = 9
+# Thumb, index, middle, ring, pinky: base joint -> tip
+FINGERS = np.array([[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16], [17, 18, 19, 20]])
+_CHAINS = np.hstack([np.full((5, 1), WRIST), FINGERS])  # Wrist + 4 joints per finger
+_PREV, _JOINT, _NEXT = (_CHAINS[:, i:i + 3].ravel() for i in range(3))  # 3 bends per finger
+
+SIDES = ("Left", "Right", "Unknown")
+
+
+def _unit(v):
+    return v / np.maximum(np.linalg.norm(v, axis=-1, keepdims=True), 1e-6)
+
+
+def landmark_features(points, sides=None):
+    """
+    Feature rows for hands of shape (n, 21, 3), in pixel units. All columns
+    are scale invariant, and left hands are mirrored so one template serves
+    both sides:
+
+    - 15 joint angles (3 per finger, 1 = straight, 0 = fully folded)
+    - 5 finger extension ratios (tip-to-wrist / base-to-wrist)
+    - 4 spreads (cosine between neighbouring finger directions)
+    - thumb-index pinch distance, relative to palm size
+    - palm and thumb direction in the image plane (2 + 2), so "up" and
+      "down" versions of a hand shape stay apart
+    """
+    points = np.asarray(points, np.float32).reshape(-1, 21, 3)
+    if sides is not None:
+        left = np.array([side == "Left" for side in sides], bool)
+        if left.any():
+            points = points.copy()
+            points[left, :, 0] *= -1
+
+    wrist = points[:, WRIST:WRIST + 1]
+    a = _unit(points[:, _PREV] - points[:, _JOINT])
+    b = _unit(points[:, _NEXT] - points[:, _JOINT])
+    angles = np.arccos(np.clip((a * b).sum(-1), -1.0, 1.0)) / np.pi
+
+    tips, bases = points[:, FINGERS[:, 3]], points[:, FINGERS[:, 0]]
+    extension = np.linalg.norm(tips - wrist, axis=-1) / np.maximum(np.linalg.norm(bases - wrist, axis=-1), 1e-6)
+    directions = _unit(tips - bases)
+    spread = (directions[:, :-1] * directions[:, 1:]).sum(-1)
+
+    palm = points[:, MIDDLE_MCP] - points[:, WRIST]
+    pinch = np.linalg.norm(points[:, 4] - points[:, 8], axis=-1) / np.maximum(np.linalg.norm(palm, axis=-1), 1e-6)
+    up = _unit(palm[:, :2])
+    thumb = _unit((tips[:, 0] - bases[:, 0])[:, :2])
+
+    return np.hstack([angles, extension, spread, pinch[:, None], up, thumb]).astype(np.float32)
+
+
+def landmark_array(result, width, height):
+    """
+    (points, sides) from a MediaPipe hand result: points of shape (n, 21, 3)
+    scaled from normalized coordinates to the pixels of the image the
+    result came from, so crops of any aspect ratio give the same angles.
+    """
+    if not result.hand_landmarks:
+        return np.zeros((0, 21, 3), np.float32), []
+    points = np.array([[(lm.x, lm.y, lm.z) for lm in hand] for hand in result.hand_landmarks], np.float32)
+    points *= np.array([width, height, width], np.float32)  # MediaPipe's z is on the x scale
+    sides = []
+    for i in range(len(points)):
+        if result.handedness and len(result.handedness) > i:
+            sides.append(result.handedness[i][0].category_name)
+        else:
+            sides.append("Unknown")
+    return points, sides
+
+
+class LandmarkClassifier:
+    """
+    Nearest-centroid classifier over landmark_features().
+
+    Features are standardized with the training mean / spread, and each
+    gesture keeps one centroid plus a radius (RADIUS_PERCENTILE of its own
+    training distances). Distances are compared in units of each class's
+    radius, and the score falls from 1.0 at the centroid to 0.5 at the
+    radius, which lines up with the GestureTracker thresholds. Hands far
+    from every class come back as NO_GESTURE.
+    """
+
+    def __init__(self, labels, centroids, radii, mean, scale):
+        self.labels = list(labels)
+        self.centroids = np.asarray(centroids, np.float32)
+        self.radii = np.asarray(radii, np.float32)
+        self.mean = np.asarray(mean, np.float32)
+        self.scale = np.asarray(scale, np.float32)
+
+    @classmethod
+    def train(cls, features, labels, min_samples=MIN_SAMPLES):
+        features = np.asarray(features, np.float32)
+        labels = np.asarray(labels)
+        mean = features.mean(0)
+        scale = features.std(0) + 1e-3  # Constant columns must not divide by zero
+        scaled = (features - mean) / scale
+
+        names, centroids, radii = [], [], []
+        for name in sorted(set(labels.tolist())):
+            rows = scaled[labels == name]
+            if len(rows) < min_samples:
+                print(f"Skipping '{name}': only {len(rows)} samples (need {min_samples}).")
+                continue
+            centroid = rows.mean(0)
+            distances = np.linalg.norm(rows - centroid, axis=1)
+            names.append(name)
+            centroids.append(centroid)
+            radii.append(max(float(np.percentile(distances, RADIUS_PERCENTILE)), 1e-3))
+        if not names:
+            raise ValueError("No gesture has enough samples to train on")
+        return cls(names, centroids, radii, mean, scale)
+
+    def classify(self, features):
+        """Returns a (gesture, score) pair per feature row."""
+        features = np.asarray(features, np.float32)
+        if not len(features):
+            return []
+        scaled = (features - self.mean) / self.scale
+        ratio = np.linalg.norm(scaled[:, None, :] - self.centroids[None], axis=-1) / self.radii
+        best = ratio.argmin(1)
+        distance = ratio[np.arange(len(best)), best]
+
+        output = []
+        for index, r in zip(best.tolist(), distance.tolist()):
+            if r > REJECT_RADIUS:
+                output.append((NO_GESTURE, min(1.0, 0.5 * r)))
+            else:
+                output.append((self.labels[index], max(0.0, 1.0 - 0.5 * r)))
+        return output
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({
+                "feature_version": FEATURE_VERSION,
+                "labels": self.labels,
+                "centroids": self.centroids.tolist(),
+                "radii": self.radii.tolist(),
+                "mean": self.mean.tolist(),
+                "scale": self.scale.tolist(),
+            }, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("feature_version") != FEATURE_VERSION:
+            raise ValueError(f"{path} was trained on other features; retrain it from the recorded sessions")
+        return cls(data["labels"], data["centroids"], data["radii"], data["mean"], data["scale"])
+
+
+class Category:
+    """Same fields as a MediaPipe Category, for results built here."""
+
+    def __init__(self, category_name, score):
+        self.category_name = category_name
+        self.score = score
+
+
+class LandmarkResult:
+    """Same shape as a GestureRecognizerResult, so the rest of the pipeline cannot tell the engines apart."""
+
+    def __init__(self, gestures, handedness, hand_landmarks):
+        self.gestures = gestures
+        self.handedness = handedness
+        self.hand_landmarks = hand_landmarks
+
+
+class LandmarkRecognizer:
+    """
+    The "landmarks" engine: MediaPipe's HandLandmarker (no gesture head)
+    followed by a LandmarkClassifier.
+
+    Without 'live_callback' it works like VideoRecognizer (recognize(),
+    VIDEO mode). With one, it works like a LIVE_STREAM GestureRecognizer:
+    recognize_async() results are classified on MediaPipe's thread and
+    handed to live_callback(result, image, timestamp_ms).
+    """
+
+    def __init__(self, classifier, model_path, live_callback=None, num_hands=2):
+        import mediapipe as mp
+        self.mp = mp
+        self.classifier = classifier
+        self.live_callback = live_callback
+
+        vision = mp.tasks.vision
+        options = vision.HandLandmarkerOptions(
+            base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.LIVE_STREAM if live_callback else vision.RunningMode.VIDEO,
+            num_hands=num_hands,
+        )
+        if live_callback:
+            options.result_callback = self.on_landmarks
+        self.landmarker = vision.HandLandmarker.create_from_options(options)
+
+    def classify(self, result, width, height):
+        points, sides = landmark_array(result, width, height)
+        gestures = [[Category(name, score)]
+                    for name, score in self.classifier.classify(landmark_features(points, sides))]
+        return LandmarkResult(gestures, result.handedness, result.hand_landmarks)
+
+    # --- VIDEO mode ---
+    def warm_up(self, frame_size=FRAME_SIZE):
+        """First inference pays for graph set-up; do it on a blank frame. Returns seconds."""
+        started = time.perf_counter()
+        self.landmarker.detect_for_video(blank_image(frame_size), WARM_UP_TIMESTAMP)
+        return time.perf_counter() - started
+
+    def recognize(self, rgb, timestamp_ms):
+        mp_image = self.mp.Image(image_format=self.mp.ImageFormat.SRGB, data=rgb)
+        result = self.landmarker.detect_for_video(mp_image, timestamp_ms)
+        return self.classify(result, rgb.shape[1], rgb.shape[0])
+
+    # --- LIVE_STREAM mode ---
+    def recognize_async(self, mp_image, timestamp_ms):
+        self.landmarker.detect_async(mp_image, timestamp_ms)
+
+    def on_landmarks(self, result, output_image, timestamp_ms):
+        classified = self.classify(result, output_image.width, output_image.height)
+        self.live_callback(classified, output_image, timestamp_ms)
+
+    def close(self):
+        self.landmarker.close()
+
+
+class LandmarkTape:
+    """
+    Hand landmarks of a session, one row per detected hand per frame, kept
+    like a GestureTape: monotonic offsets, interned labels and flat arrays.
+    Saved as .npz and used to train LandmarkClassifier templates.
+
+    'label' tags every hand with a fixed gesture name (recording a new, NAO
+    specific gesture); None keeps the name the running engine gave it.
+    """
+
+    def __init__(self, label=None, origin=None):
+        self.label = label
+        self.origin = time.monotonic() if origin is None else origin
+        self.times = array("d")  # Seconds since origin
+        self.sides = array("B")  # Index into SIDES
+        self.codes = array("H")  # Index into vocab
+        self.points = array("f")  # 21 x 3 floats per row, pixel units
+        self.vocab = []
+        self.codes_by_label = {}
+
+    def __len__(self):
+        return len(self.times)
+
+    def intern(self, label):
+        code = self.codes_by_label.get(label)
+        if code is None:
+            code = len(self.vocab)
+            self.vocab.append(label)
+            self.codes_by_label[label] = code
+        return code
+
+    def append(self, offset, side, label, points):
+        self.times.append(offset)
+        self.sides.append(SIDES.index(side) if side in SIDES else SIDES.index("Unknown"))
+        self.codes.append(self.intern(label))
+        self.points.extend(np.asarray(points, np.float32).ravel().tolist())
+
+    def append_result(self, result, width, height, now=None):
+        """Records every hand of one recognizer result."""
+        offset = (time.monotonic() if now is None else now) - self.origin
+        points, sides = landmark_array(result, width, height)
+        for i, side in enumerate(sides):
+            if self.label is not None:
+                label = self.label
+            elif result.gestures and len(result.gestures) > i:
+                label = result.gestures[i][0].category_name
+            else:
+                continue  # Nothing to learn from an unlabelled hand
+            self.append(offset, side, label, points[i])
+
+    def arrays(self):
+        """(times, sides, labels, points) as NumPy arrays (copies, so recording can go on)."""
+        times = np.array(self.times, np.float64)
+        sides = np.array(SIDES)[np.array(self.sides, np.intp)]
+        labels = np.array(self.vocab or [""])[np.array(self.codes, np.intp)]
+        points = np.array(self.points, np.float32).reshape(-1, 21, 3)
+        return times, sides, labels, points
+
+    def training_set(self, trim=TRIM_TRANSITIONS):
+        """
+        (features, labels) for training. Rows within 'trim' seconds of a
+        label change on the same hand are dropped: around a transition the
+        hand is still moving and the label is unreliable.
+        """
+        times, sides, labels, points = self.arrays()
+        keep = np.ones(len(times), bool)
+        if trim > 0:
+            for side in set(sides.tolist()):
+                rows = np.flatnonzero(sides == side)
+                changes = times[rows[1:][labels[rows[1:]] != labels[rows[:-1]]]]
+                for t in changes:
+                    keep[rows[np.abs(times[rows] - t) < trim]] = False
+        return landmark_features(points[keep], sides[keep]), labels[keep]
+
+    def save(self, path):
+        times, sides, labels, points = self.arrays()
+        np.savez_compressed(path, times=times, sides=sides, labels=labels, points=points)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        tape = cls(origin=0.0)
+        for offset, side, label, points in zip(data["times"], data["sides"], data["labels"], data["points"]):
+            tape.append(float(offset), str(side), str(label), points)
+        return tape
+
+
+def main():
+    """Trains a templates file from one or more recorded landmark sessions."""
+    parser = argparse.ArgumentParser(
+        description="Train landmark gesture templates from sessions recorded with Gestures.RECORD_LANDMARKS.")
+    parser.add_argument("sessions", nargs="+", help="Recorded .npz landmark tapes")
+    parser.add_argument("--out", default="models/gesture_templates.json", help="Templates file to write")
+    parser.add_argument("--labels", nargs="*", help="Only train these gestures (default: all)")
+    parser.add_argument("--trim", type=float, default=TRIM_TRANSITIONS, help="Seconds dropped around label changes")
+    args = parser.parse_args()
+
+    features, labels = [], []
+    for path in args.sessions:
+        session_features, session_labels = LandmarkTape.load(path).training_set(args.trim)
+        features.append(session_features)
+        labels.append(session_labels)
+        print(f"{path}: {len(session_labels)} hands")
+    features, labels = np.vstack(features), np.concatenate(labels)
+    if args.labels:
+        wanted = np.isin(labels, args.labels)
+        features, labels = features[wanted], labels[wanted]
+
+    classifier = LandmarkClassifier.train(features, labels)
+    predicted = np.array([name for name, _ in classifier.classify(features)])
+    for name, radius in zip(classifier.labels, classifier.radii):
+        rows = labels == name
+        print(f"  {name:<16}{rows.sum():>6} samples   radius {radius:5.2f}   "
+              f"training accuracy {np.mean(predicted[rows] == name) * 100:5.1f}%")
+    classifier.save(args.out)
+    print(f"Wrote {len(classifier.labels)} templates to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import json
+import sys
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+# ========================================================================
+#   LOW-OVERHEAD METRICS
+# ========================================================================
+# Histograms use fixed log-spaced buckets (4 per octave, 10 µs .. ~100 s),
+# so recording a sample is one bisect plus a few additions and memory never
+# grows. Percentiles are read back with ~19% bucket resolution, which is
+# plenty to see where the seconds go.
+#
+# Updates are not locked: under the GIL a rare lost increment is an
+# acceptable price for keeping the camera and network hot paths cheap.
+
+BUCKET_BOUNDS = [1e-5 * 2 ** (i / 4) for i in range(94)]
+
+
+class Histogram:
+    """Latency histogram (values in seconds)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """
+        Upper bound of the bucket holding the p-th percentile (seconds),
+        capped at the largest value actually recorded.
+        """
+        if not self.count:
+            return 0.0
+        rank = p / 100.0 * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKET_BOUNDS[index], self.max) if index < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def snapshot(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3),
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class MetricsRegistry:
+    """
+    Named histograms, counters and gauges for one process.
+    Gauges are callables evaluated only when a snapshot is taken.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.started = time.time()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def record(self, name, seconds):
+        self.histogram(name).record(seconds)
+
+    def increment(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def register_gauge(self, name, func):
+        self.gauges[name] = func
+
+    @contextmanager
+    def timer(self, name):
+        """Records how long the 'with' block took."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def snapshot(self):
+        gauges = {}
+        for name, func in list(self.gauges.items()):
+            try:
+                gauges[name] = func()
+            except Exception as e:
+                gauges[name] = f"error: {e!r}"
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "histograms": {name: h.snapshot() for name, h in sorted(self.histograms.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "gauges": gauges,
+        }
+
+
+# One registry per process; every module records into it
+metrics = MetricsRegistry()
+
+
+def serve_http(registry, port, host="127.0.0.1"):
+    """
+    Serves registry.snapshot() as JSON on http://host:port/ from a daemon
+    thread. Used by processes that are not the Hub (e.g. the Laptop).
+    """
+    class StatsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps(registry.snapshot(), indent=2).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep the console for the translation log
+
+    try:
+        httpd = ThreadingHTTPServer((host, port), StatsHandler)
+    except OSError as e:
+        print(f"Stats endpoint unavailable on {host}:{port}: {e}")
+        return None
+    Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f"Stats available at http://{host}:{port}/")
+    return httpd
+
+
+def query_hub(host, port, timeout=2.0):
+    """Sends a STATS frame to the Hub and returns its decoded JSON reply."""
+    from HubProtocol import Kind, FrameDecoder, encode_frame, open_hub_connection
+
+    sock = open_hub_connection(host, port)
+    sock.settimeout(timeout)
+    try:
+        sock.sendall(encode_frame(Kind.STATS, ""))
+        decoder = FrameDecoder()
+        while True:
+            frames = decoder.read_from(sock)
+            if frames is None:
+                raise ConnectionError("Hub closed the connection")
+            for kind, text in frames:
+                if kind == Kind.STATS:
+                    return json.loads(text)
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    # Usage: python Metrics.py [host] [port]
+    hub_host = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1"
+    hub_port = int(sys.argv[2]) if len(sys.argv) > 2 else 8888
+    print(json.dumps(query_hub(hub_host, hub_port), indent=2))
@@ -0,0 +1,224 @@
+import multiprocessing
+import os
+import queue
+import time
+from threading import Thread, Event
+
+from GesturePipeline import FrameProcessor, BroadcastGate, VideoRecognizer, READ_RETRY_DELAY, MAX_READ_FAILURES
+from GestureTracker import GestureTracker, format_hands
+from HubProtocol import DEFAULT_SESSION
+from Metrics import metrics
+
+# ========================================================================
+#   MULTI-CAMERA CONFIGURATION
+# ========================================================================
+EVENT_QUEUE_SIZE = 256  # Hand events waiting for the fusion thread
+HEARTBEAT = 0.25  # Workers repeat an unchanged state this often
+STALE_AFTER = 1.0  # A camera silent for this long no longer votes
+FUSION_STRATEGIES = ("confidence", "vote")
+
+
+def camera_worker(index, source, model_path, events, stop, adaptive=True,
+                  engine="recognizer", templates_path=None):
+    """
+    Runs in its own process: one camera, one VIDEO-mode recognizer
+    ('engine' "recognizer" or "landmarks", as in Gestures.py).
+    Every frame goes through a GestureTracker, and the camera's confirmed
+    hands are pushed as (camera index, time, hands) to 'events' whenever
+    they change, plus a heartbeat every HEARTBEAT seconds so fusion knows
+    it is alive.
+    """
+    import cv2
+    import mediapipe as mp
+
+    # Spread workers over the available cores (Linux only)
+    if hasattr(os, "sched_setaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cores[index % len(cores)]})
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        print(f"[camera {index}] Could not open source {source!r}.")
+        return
+
+    if engine == "landmarks":
+        from LandmarkClassifier import LandmarkClassifier, LandmarkRecognizer
+        recognizer = LandmarkRecognizer(LandmarkClassifier.load(templates_path), model_path)
+    else:
+        vision = mp.tasks.vision
+        options = vision.GestureRecognizerOptions(
+            base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.VIDEO,
+            num_hands=2,
+        )
+        recognizer = VideoRecognizer(vision.GestureRecognizer.create_from_options(options))
+    processor = FrameProcessor(adaptive=adaptive)
+    tracker = GestureTracker()
+    warm_up_time = recognizer.warm_up()
+    print(f"[camera {index}] Started on source {source!r} (pid {os.getpid()}, "
+          f"warm-up {warm_up_time:.2f}s).")
+
+    last_state = None
+    last_sent = 0.0
+    dropped = 0
+    failures = 0
+    try:
+        while not stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                # USB hiccups drop single frames; only a camera that stays gone ends the worker
+                failures += 1
+                if failures >= MAX_READ_FAILURES:
+                    print(f"[camera {index}] No frames from source {source!r} for "
+                          f"{failures} reads, giving up.")
+                    break
+                time.sleep(READ_RETRY_DELAY)
+                continue
+            failures = 0
+            now = time.perf_counter()
+            if not processor.should_run(now):
+                continue
+            rgb, roi = processor.to_rgb(processor.resize(frame))
+            result = recognizer.recognize(rgb, int(now * 1000))
+            tracker.update(processor.finish(result, roi, now), now)
+
+            hands = tracker.confirmed()
+            state = tuple((side, gesture) for side, gesture, _ in hands)
+            if state != last_state or now - last_sent >= HEARTBEAT:
+                try:
+                    events.put_nowait((index, time.time(), hands))
+                    last_state, last_sent = state, now
+                except queue.Full:
+                    dropped += 1
+    finally:
+        recognizer.close()
+        cap.release()
+        print(f"[camera {index}] Stopped ({dropped} events dropped).")
+
+
+class GestureFusion:
+    """
+    Merges the latest confirmed hands of every camera into one
+    (side, gesture, score) tuple per hand side.
+
+    - "confidence": per hand side, the detection with the highest score wins.
+    - "vote": per hand side, the gesture most cameras agree on wins
+      (ties go to the higher summed score).
+    A side only appears if at least one fresh camera sees that hand.
+    """
+
+    def __init__(self, strategy="confidence", stale_after=STALE_AFTER):
+        if strategy not in FUSION_STRATEGIES:
+            raise ValueError(f"Unknown fusion strategy '{strategy}' (expected one of {FUSION_STRATEGIES})")
+        self.strategy = strategy
+        self.stale_after = stale_after
+        self.latest = {}  # camera index -> (time, hands)
+
+    def update(self, camera, seen_at, hands, now=None):
+        self.latest[camera] = (seen_at, hands)
+        return self.fuse(now)
+
+    def fuse(self, now=None):
+        now = time.time() if now is None else now
+        by_side = {}
+        for seen_at, hands in self.latest.values():
+            if now - seen_at > self.stale_after:
+                continue
+            for side, gesture, score in hands:
+                by_side.setdefault(side, []).append((gesture, score))
+
+        output = []
+        for side in sorted(by_side, reverse=True):  # "Right" before "Left", as MediaPipe usually reports
+            candidates = by_side[side]
+            if self.strategy == "confidence":
+                gesture, score = max(candidates, key=lambda c: c[1])
+            else:
+                tally = {}
+                for name, score in candidates:
+                    votes, total = tally.get(name, (0, 0.0))
+                    tally[name] = (votes + 1, total + score)
+                gesture = max(tally, key=tally.get)
+                score = tally[gesture][1] / tally[gesture][0]
+            output.append((side, gesture, score))
+        return tuple(output)
+
+
+class MultiCameraPipeline:
+    """
+    One recognizer process per camera source, fused into one gesture stream.
+
+    Workers run on separate cores (MediaPipe inference is CPU bound and the
+    GIL would serialize it in threads) and send compact hand tuples over a
+    multiprocessing queue. Flicker is already filtered by each worker's
+    GestureTracker; a fusion thread in the Hub process merges the cameras
+    and hands the result to a BroadcastGate whose tracker confirms at once,
+    so override handling and onset/offset events match the single camera.
+
+    Exposes queue_depths() like GesturePipeline, for the STATS gauge.
+    """
+
+    def __init__(self, sources, server, model_path, strategy="confidence",
+                 adaptive=True, session=DEFAULT_SESSION, engine="recognizer", templates_path=None):
+        self.sources = list(sources)
+        self.model_path = model_path
+        self.engine = engine
+        self.templates_path = templates_path
+        self.adaptive = adaptive
+        self.fusion = GestureFusion(strategy)
+        # Inputs are already confirmed per camera: only derive the edges here
+        self.gate = BroadcastGate(server, session=session,
+                                  tracker=GestureTracker(confirm_frames=1, release_frames=1))
+        # 'spawn': MediaPipe / OpenCV threads do not survive fork()
+        self.context = multiprocessing.get_context("spawn")
+        self.events = self.context.Queue(EVENT_QUEUE_SIZE)
+        self.stop_workers = self.context.Event()
+        self.running = Event()
+        self.workers = []
+        self.thread = None
+        self.received = {}  # camera index -> events received
+        self.latest_output = "NONE"
+
+    def start(self):
+        self.running.set()
+        for index, source in enumerate(self.sources):
+            worker = self.context.Process(
+                target=camera_worker, name=f"camera-{index}", daemon=True,
+                args=(index, source, self.model_path, self.events, self.stop_workers, self.adaptive,
+                      self.engine, self.templates_path),
+            )
+            worker.start()
+            self.workers.append(worker)
+        self.thread = Thread(target=self.fusion_loop, daemon=True)
+        self.thread.start()
+
+    def fusion_loop(self):
+        while self.running.is_set():
+            try:
+                camera, seen_at, hands = self.events.get(timeout=HEARTBEAT)
+            except queue.Empty:
+                fused = self.fusion.fuse()  # Let dead cameras expire
+            else:
+                self.received[camera] = self.received.get(camera, 0) + 1
+                metrics.record("pipeline.camera_lag", max(0.0, time.time() - seen_at))
+                fused = self.fusion.update(camera, seen_at, hands)
+            self.latest_output = format_hands(fused)
+            self.gate.offer(fused)
+
+    def stop(self, timeout=2.0):
+        self.running.clear()
+        self.stop_workers.set()
+        if self.thread:
+            self.thread.join(timeout)
+        for worker in self.workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+
+    def queue_depths(self):
+        return {
+            "cameras_alive": sum(worker.is_alive() for worker in self.workers),
+            "events_received": dict(self.received),
+            "fusion": self.fusion.strategy,
+            "latest": self.latest_output,
+        }
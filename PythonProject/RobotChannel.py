@@ -0,0 +1,87 @@
+from threading import Condition, Lock
+
+from HubProtocol import Kind, FrameDecoder, DEFAULT_SESSION, encode_batch, encode_hello, open_hub_connection
+
+# ========================================================================
+#   ROBOT CONTROL CHANNEL
+# ========================================================================
+ACK_TIMEOUT = 3.0  # Seconds to wait for the Hub to confirm delivery to its sockets
+
+
+class RobotChannel:
+    """
+    One long-lived framed connection to the Hub, shared by the gesture
+    receive loop, the speech jobs and the gesture replay.
+
+    Replaces the old "open a socket, send, sleep(0.5), close" per utterance:
+    - send() writes frames under a lock and returns the sequence number of
+      the last one (the Hub numbers our frames 1, 2, 3... implicitly).
+    - The Hub answers with a cumulative ACK once the frames were delivered
+      to the hub socket of every subscriber (the robot); wait_ack() blocks
+      until then.
+
+    The robot side is NOT covered: the Choregraphe box sends nothing back,
+    so no frame confirms that the robot has read a command, switched voice
+    or finished speaking. SAY after LANG relies only on the connection
+    delivering frames in order.
+    - frames() is the receive loop: it consumes ACKs itself and yields
+      every other (kind, text) frame to the caller.
+    """
+
+    def __init__(self, host, port, role="controller", session=DEFAULT_SESSION, topics=None):
+        self.host = host
+        self.port = port
+        self.hello = encode_hello(role, session, topics)
+        self.sock = None
+        self.send_lock = Lock()
+        self.acked = Condition()
+        self.sent_seq = 0
+        self.acked_seq = 0
+        self.closed = False
+
+    def connect(self):
+        """Opens the connection and registers our role, so the Hub only sends what we need."""
+        self.sock = open_hub_connection(self.host, self.port)
+        self.send(Kind.HELLO, self.hello)
+        return self
+
+    def send(self, kind, text):
+        return self.send_batch([(kind, text)])
+
+    def send_batch(self, frames):
+        """Sends several frames in one write. Returns the sequence number of the last one."""
+        frames = list(frames)
+        with self.send_lock:
+            self.sock.sendall(encode_batch(frames))
+            self.sent_seq += len(frames)
+            return self.sent_seq
+
+    def wait_ack(self, seq, timeout=ACK_TIMEOUT):
+        """Blocks until frame 'seq' was delivered to the hub sockets. Returns False on timeout."""
+        with self.acked:
+            return self.acked.wait_for(lambda: self.acked_seq >= seq or self.closed, timeout) \
+                and self.acked_seq >= seq
+
+    def frames(self):
+        """Yields received (kind, text) frames until the Hub disconnects."""
+        decoder = FrameDecoder()
+        try:
+            while True:
+                frames = decoder.read_from(self.sock)
+                if frames is None:
+                    return
+                for kind, text in frames:
+                    if kind == Kind.ACK:
+                        with self.acked:
+                            self.acked_seq = max(self.acked_seq, int(text))
+                            self.acked.notify_all()
+                    else:
+                        yield kind, text
+        finally:
+            with self.acked:
+                self.closed = True
+                self.acked.notify_all()
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
@@ -0,0 +1,103 @@
+import time
+
+from Metrics import metrics
+
+# ========================================================================
+#   STREAMING TTS PLAYBACK
+# ========================================================================
+# The TTS response is requested as raw PCM (24 kHz, 16-bit, mono), so each
+# network chunk can be written straight to the sound card: no MP3 decoder,
+# no temp file, and playback starts with the first chunk instead of the
+# last one.
+TTS_SAMPLE_RATE = 24000
+TTS_CHUNK = 4096  # Bytes read from the response per iteration
+PREBUFFER = 0.15  # Seconds of audio collected before playback starts (absorbs network jitter)
+BYTES_PER_SAMPLE = 2
+
+
+class SpeechPlayer:
+    """
+    Plays OpenAI TTS on the laptop speakers while it streams in.
+
+    - One output stream stays open between sentences (opened by open(),
+      normally during warm-up).
+    - The OpenAI client comes from 'get_client', so its connection pool is
+      reused across utterances.
+    - Finished audio is stored in the optional TranslationCache, so a
+      repeated sentence plays without any request.
+    speak() returns once the sentence has been played.
+    """
+
+    def __init__(self, get_client, cache=None, voice="alloy", model="tts-1"):
+        self.get_client = get_client
+        self.cache = cache
+        self.voice = voice
+        self.model = model
+        self.cache_model = f"{model}/pcm{TTS_SAMPLE_RATE}"  # Keeps PCM apart from older MP3 entries
+        self.stream = None
+
+    def open(self):
+        if self.stream is None:
+            import sounddevice as sd
+            self.stream = sd.RawOutputStream(samplerate=TTS_SAMPLE_RATE, channels=1, dtype="int16")
+            self.stream.start()
+        return self.stream
+
+    def speak(self, text):
+        started = time.perf_counter()
+        self.open()
+
+        audio = self.cache.get_audio(text, self.voice, self.cache_model) if self.cache else None
+        if audio is not None:
+            self.play([audio], started)
+            return
+
+        response_cm = self.get_client().audio.speech.with_streaming_response.create(
+            model=self.model,
+            voice=self.voice,
+            input=text,
+            response_format="pcm",
+        )
+        with response_cm as response:
+            audio = self.play(response.iter_bytes(TTS_CHUNK), started)
+        if self.cache is not None:
+            self.cache.put_audio(text, self.voice, self.cache_model, bytes(audio))
+
+    def play(self, chunks, started):
+        """
+        Writes PCM chunks to the output stream as they arrive and returns
+        all the audio played (for caching). A chunk may end mid-sample;
+        the odd byte is carried over to the next write.
+        """
+        audio = bytearray()
+        pending = bytearray()
+        prebuffer = int(PREBUFFER * TTS_SAMPLE_RATE) * BYTES_PER_SAMPLE
+        playing = False
+
+        for chunk in chunks:
+            audio += chunk
+            pending += chunk
+            if not playing and len(pending) < prebuffer:
+                continue
+            if not playing:
+                playing = True
+                metrics.record("controller.tts_first_audio", time.perf_counter() - started)
+            whole = len(pending) - len(pending) % BYTES_PER_SAMPLE
+            if whole:
+                self.stream.write(bytes(pending[:whole]))
+                del pending[:whole]
+
+        if not playing and audio:
+            metrics.record("controller.tts_first_audio", time.perf_counter() - started)
+        whole = len(pending) - len(pending) % BYTES_PER_SAMPLE
+        if whole:
+            self.stream.write(bytes(pending[:whole]))
+
+        # write() returns once the data is queued; wait for the queue to be heard
+        time.sleep(self.stream.latency)
+        return audio
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
@@ -0,0 +1,175 @@
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Event
+
+import numpy as np
+
+from AudioPreprocessing import prepare_upload, UPLOAD_SAMPLE_RATE
+from Metrics import metrics
+
+# ========================================================================
+#   STREAMING TRANSCRIPTION CONFIGURATION
+# ========================================================================
+VAD_FRAME_MS = 30  # Energy is measured over frames of this length
+VAD_THRESHOLD = 0.01  # RMS above this counts as voice
+MIN_PAUSE = 0.5  # Seconds of quiet that end a segment
+MIN_SEGMENT = 1.5  # Never cut segments shorter than this (Whisper needs context)
+MAX_SEGMENT = 15.0  # Force a cut if someone talks this long without pausing
+PRE_ROLL = 0.2  # Seconds of quiet kept in front of the first word
+POLL_INTERVAL = 0.1  # How often the recording is checked for new pauses
+
+
+class WhisperBackend:
+    """
+    Transcription backend speaking the OpenAI audio API.
+    Point 'base_url' at any OpenAI-compatible server (e.g. a local stand-in
+    such as benchmarks/transcription_standin.py) to test without the cloud.
+    """
+
+    def __init__(self, api_key, base_url=None, model="whisper-1"):
+        from openai import OpenAI  # Deferred: slow to import, and only needed once transcribing
+        self.client = OpenAI(api_key=api_key or "local", base_url=base_url)
+        self.model = model
+
+    def transcribe(self, audio_data, filename="output.wav"):
+        audio_file = io.BytesIO(audio_data)
+        audio_file.name = filename
+        transcription = self.client.audio.transcriptions.create(
+            model=self.model,
+            file=audio_file
+        )
+        return transcription.text.strip()
+
+
+class PauseSegmenter:
+    """
+    Energy-based voice activity detector that splits a growing recording at pauses.
+
+    poll() only looks at samples it has not classified yet: they are reshaped
+    into VAD frames and their RMS is computed in one vectorized step.
+    """
+
+    def __init__(self, sample_rate, threshold=VAD_THRESHOLD, min_pause=MIN_PAUSE,
+                 min_segment=MIN_SEGMENT, max_segment=MAX_SEGMENT, pre_roll=PRE_ROLL):
+        self.frame = int(sample_rate * VAD_FRAME_MS / 1000)
+        self.threshold = threshold
+        self.min_pause = int(sample_rate * min_pause)
+        self.min_segment = int(sample_rate * min_segment)
+        self.max_segment = int(sample_rate * max_segment)
+        self.pre_roll = int(sample_rate * pre_roll)
+
+        self.segment_start = 0
+        self.scanned = 0  # Samples already classified
+        self.last_voiced = None  # End of the last voiced frame in the current segment
+
+    def poll(self, samples):
+        """Returns the (start, end) sample ranges of segments finished since the last call."""
+        n_frames = (len(samples) - self.scanned) // self.frame
+        if n_frames <= 0:
+            return []
+        chunk = samples[self.scanned:self.scanned + n_frames * self.frame].reshape(n_frames, self.frame)
+        voiced = np.sqrt(np.mean(chunk * chunk, axis=1)) >= self.threshold
+
+        segments = []
+        for is_voiced in voiced:
+            end = self.scanned + self.frame
+            self.scanned = end
+
+            if is_voiced:
+                self.last_voiced = end
+                if end - self.segment_start >= self.max_segment:
+                    segments.append((self.segment_start, end))
+                    self.segment_start = end
+            elif self.last_voiced is None:
+                # Still waiting for the first word: trim leading quiet
+                self.segment_start = max(self.segment_start, end - self.pre_roll)
+            elif (end - self.last_voiced >= self.min_pause
+                  and self.last_voiced - self.segment_start >= self.min_segment):
+                cut = self.last_voiced + (end - self.last_voiced) // 2
+                segments.append((self.segment_start, cut))
+                self.segment_start = cut
+                self.last_voiced = None
+        return segments
+
+    def flush(self, length):
+        """Returns the final (start, end) range, or None if it holds no voice."""
+        if self.last_voiced is None or self.last_voiced <= self.segment_start:
+            return None
+        return self.segment_start, length
+
+
+class StreamingTranscriber:
+    """
+    Transcribes an utterance WHILE it is being recorded.
+
+    A polling thread watches the AudioRingBuffer; every time the speaker
+    pauses, the finished segment is encoded and sent to the backend on a
+    small thread pool. When the stop gesture arrives, finish() only has to
+    wait for the last segment instead of the whole recording.
+    """
+
+    def __init__(self, audio_buffer, backend, max_workers=2,
+                 upload_rate=UPLOAD_SAMPLE_RATE, normalize=False, encoding="wav"):
+        self.buffer = audio_buffer
+        self.backend = backend
+        self.upload_rate = upload_rate
+        self.normalize = normalize
+        self.encoding = encoding
+        self.segmenter = PauseSegmenter(audio_buffer.sample_rate)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures = []  # In recording order
+        self.stopped = Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = Thread(target=self.watch, daemon=True)
+        self.thread.start()
+
+    def watch(self):
+        while not self.stopped.wait(POLL_INTERVAL):
+            for start, end in self.segmenter.poll(self.buffer.view()):
+                self.submit(start, end)
+
+    def submit(self, start, end):
+        audio_data, report = prepare_upload(self.buffer.view()[start:end], self.buffer.sample_rate,
+                                          self.upload_rate, normalize=self.normalize,
+                                          encoding=self.encoding)
+        print(f">>> [STREAM]: Segment {len(self.futures) + 1} "
+              f"({(end - start) / self.buffer.sample_rate:.1f}s, {len(audio_data) / 1024:.0f} KB) "
+              f"sent for transcription.")
+        self.futures.append(self.executor.submit(self.transcribe_segment, audio_data, report["filename"]))
+
+    def transcribe_segment(self, audio_data, filename):
+        with metrics.timer("controller.transcribe_segment"):
+            return self.backend.transcribe(audio_data, filename)
+
+    def finish(self):
+        """Call after recording stopped. Returns the full transcript, in order."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+        samples = self.buffer.view()
+        for start, end in self.segmenter.poll(samples):
+            self.submit(start, end)
+        last = self.segmenter.flush(len(samples))
+        if last is None and not self.futures and len(samples):
+            # No frame reached VAD_THRESHOLD (a quiet speaker), but the recording
+            # passed the silence gate: send it whole, prepare_upload() trims it
+            # relative to its own level
+            last = 0, len(samples)
+        if last:
+            self.submit(*last)
+
+        started = time.perf_counter()
+        try:
+            texts = [future.result() for future in self.futures]
+        finally:
+            self.executor.shutdown(wait=False)
+        metrics.record("controller.transcribe_tail", time.perf_counter() - started)
+        return " ".join(text for text in texts if text)
+
+    def cancel(self):
+        self.stopped.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
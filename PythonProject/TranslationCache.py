@@ -0,0 +1,139 @@
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from Metrics import metrics
+
+# ========================================================================
+#   CACHE CONFIGURATION
+# ========================================================================
+MAX_ENTRIES = 2000  # Translations kept (memory + disk)
+MAX_AUDIO_BYTES = 50 * 1024 * 1024  # TTS audio kept on disk
+TEXT_KEY_VERSION = "2"  # Bump when normalize() changes; older keys are never hit again and age out
+
+
+def normalize(text):
+    """
+    '  Hello,   World. ' -> 'hello, world' so trivial variations share an entry.
+    Only trailing periods go: '?' and '!' change the meaning (and intonation)
+    of the translation, so "you are coming?" keeps its own entry.
+    """
+    text = re.sub(r"\s+", " ", text.casefold()).strip()
+    return text.rstrip(".。 ")
+
+
+class TranslationCache:
+    """
+    Two-level cache for translation results and synthesized speech.
+
+    - Text: keyed on (normalized source text, source language, target
+      language, mode). Held in an in-memory LRU (OrderedDict) and mirrored
+      to SQLite so it survives restarts.
+    - Audio: TTS blobs keyed on (exact text, voice, model). Kept only in
+      SQLite and evicted least-recently-used once they exceed max_audio_bytes.
+
+    Hit/miss counters are kept per kind and reported through stats().
+    Safe to use from several threads.
+    """
+
+    def __init__(self, path, max_entries=MAX_ENTRIES, max_audio_bytes=MAX_AUDIO_BYTES):
+        self.max_entries = max_entries
+        self.max_audio_bytes = max_audio_bytes
+        self.lock = Lock()
+        self.text = OrderedDict()  # key -> translation, least recently used first
+        self.counts = {"text_hits": 0, "text_misses": 0, "audio_hits": 0, "audio_misses": 0}
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS text (key TEXT PRIMARY KEY, value TEXT, last_used REAL);
+            CREATE TABLE IF NOT EXISTS audio (key TEXT PRIMARY KEY, data BLOB, size INTEGER, last_used REAL);
+        """)
+        for key, value in self.db.execute("SELECT key, value FROM text ORDER BY last_used"):
+            self.text[key] = value
+        self._evict_text()
+        self.db.commit()
+
+    @staticmethod
+    def text_key(source_text, source_lang, target_lang, mode):
+        return "\x1f".join((TEXT_KEY_VERSION, normalize(source_text), source_lang or "", target_lang or "", mode))
+
+    @staticmethod
+    def audio_key(text, voice, model):
+        return "\x1f".join((text.strip(), voice, model))
+
+    # --- TEXT ---
+    def get_text(self, source_text, source_lang, target_lang, mode):
+        key = self.text_key(source_text, source_lang, target_lang, mode)
+        with self.lock:
+            value = self.text.get(key)
+            if value is None:
+                self._count("text_misses")
+                return None
+            self.text.move_to_end(key)
+            self.db.execute("UPDATE text SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            self._count("text_hits")
+            return value
+
+    def put_text(self, source_text, source_lang, target_lang, mode, value):
+        key = self.text_key(source_text, source_lang, target_lang, mode)
+        with self.lock:
+            self.text[key] = value
+            self.text.move_to_end(key)
+            self.db.execute("INSERT OR REPLACE INTO text VALUES (?, ?, ?)", (key, value, time.time()))
+            self._evict_text()
+            self.db.commit()
+
+    def _evict_text(self):
+        while len(self.text) > self.max_entries:
+            key, _ = self.text.popitem(last=False)
+            self.db.execute("DELETE FROM text WHERE key = ?", (key,))
+
+    # --- AUDIO ---
+    def get_audio(self, text, voice, model):
+        key = self.audio_key(text, voice, model)
+        with self.lock:
+            row = self.db.execute("SELECT data FROM audio WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count("audio_misses")
+                return None
+            self.db.execute("UPDATE audio SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            self._count("audio_hits")
+            return bytes(row[0])
+
+    def put_audio(self, text, voice, model, data):
+        if len(data) > self.max_audio_bytes:
+            return
+        key = self.audio_key(text, voice, model)
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO audio VALUES (?, ?, ?, ?)",
+                            (key, sqlite3.Binary(data), len(data), time.time()))
+            # Drop least recently used blobs until we are back under budget
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM audio").fetchone()[0]
+            if total > self.max_audio_bytes:
+                for old_key, size in self.db.execute(
+                        "SELECT key, size FROM audio ORDER BY last_used").fetchall():
+                    if total <= self.max_audio_bytes:
+                        break
+                    self.db.execute("DELETE FROM audio WHERE key = ?", (old_key,))
+                    total -= size
+            self.db.commit()
+
+    # --- STATS ---
+    def _count(self, name):
+        self.counts[name] += 1
+        metrics.increment(f"cache.{name}")
+
+    def stats(self):
+        with self.lock:
+            audio_entries, audio_bytes = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM audio").fetchone()
+            return dict(self.counts, text_entries=len(self.text),
+                        audio_entries=audio_entries, audio_bytes=audio_bytes)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -1,12 +1,17 @@
-import socket
-import sounddevice as sd
-import numpy as np
-import scipy.io.wavfile as wav
 import threading
 import os
 import time
-import pygame
-from openai import OpenAI
+
+from HubProtocol import Kind, ONSET, ProtocolError, parse_gesture_event
+from Metrics import metrics, serve_http
+from RobotChannel import RobotChannel
+from SpeechPlayer import SpeechPlayer
+from AudioBuffer import AudioRingBuffer
+from AudioPreprocessing import prepare_upload
+from GestureTape import GestureTape, replay, stretch_factor
+from StreamingTranscriber import StreamingTranscriber, WhisperBackend
+from TranslationCache import TranslationCache
+from TranslationJobs import ConversationLanguage, TranslationJob, JobQueue, TRANSCRIBING, TRANSLATING
 
 # ========================================================================
 #   CONFIGURATION
@@ -15,36 +20,73 @@ PC_DEMO_MODE = False  # False = Robot Speaks. True = Laptop Speaks.
 
 HOST = '127.0.0.1'
 PORT = 8888
+SESSION = "default"  # Hub session shared with our robot + camera
 API_KEY = ""
+STATS_HTTP_PORT = 8890  # Local JSON metrics: http://127.0.0.1:8890/
+
+# True = transcribe each phrase at every pause while the user is still talking
+STREAMING_TRANSCRIPTION = True
+# None = OpenAI cloud. Any OpenAI-compatible server works, e.g. "http://127.0.0.1:8000/v1"
+TRANSCRIPTION_BASE_URL = None
+
+# Audio is trimmed and downsampled before upload (small uplink = faster replies)
+UPLOAD_SAMPLE_RATE = 16000
+NORMALIZE_UPLOAD = False  # True = boost quiet speakers to a fixed peak level
+UPLOAD_ENCODING = "flac"  # "wav", "flac" (lossless) or "opus" (smallest); needs 'soundfile'
+
+# Repeated phrases are answered from here (translations + PC demo speech audio)
+CACHE_FILE = "translation_cache.sqlite3"
+
+# True = stretch/squeeze the gesture replay to last as long as the spoken translation
+REPLAY_TIME_STRETCH = True
+SPEECH_CHARS_PER_SECOND = 14  # Rough TTS speaking rate used to estimate that duration
+
+# Utterances transcribed/translated in parallel (speech output stays in order)
+TRANSLATION_WORKERS = 2
+
+# Gestures that drive recording (matched on confirmed onsets, either hand)
+START_ENGLISH_GESTURE = "Pointing_Up"
+START_FOREIGN_GESTURE = "Victory"
+STOP_GESTURE = "ILoveYou"
 
 # LIST OF LANGUAGES NAO ACTUALLY HAS INSTALLED
 SUPPORTED_NAO_LANGUAGES = ["English", "Spanish", "French", "German", "Japanese", "Italian"]
 # ========================================================================
 
-FILENAME = "output.wav"
-SPEECH_FILE = "speech.mp3"
 SAMPLE_RATE = 44100
 
 recording = False
 current_role = None
-audio_buffer = []
-detected_language = None   # <-- FIXED (was Mandarin)
-client_socket = None
-gesture_tape = []
+audio_buffer = None  # Buffer of the recording in progress
+free_buffers = [AudioRingBuffer(SAMPLE_RATE)]  # Buffers no job is using any more
+conversation_language = ConversationLanguage()  # Detected by Foreign jobs, in submission order
+robot_channel = None  # Shared, acknowledged connection to the Hub
+nao_language = None  # Last voice sent to the robot since it (re)connected
+gesture_tape = GestureTape()
 start_record_time = 0
+current_job = None  # TranslationJob for the recording in progress
+job_queue = None
+transcription_backend = None
+translation_cache = None
 
-pygame.mixer.init()
+# sounddevice / openai are imported on first use (see LAZY DEPENDENCIES
+# below), and warm_up() opens everything the configured mode needs before
+# the first gesture arrives.
+audio_stream = None
+openai_client = None
+speech_player = None  # PC demo mode only
 
 
 def audio_callback(indata, frames, time, status):
     if recording:
-        audio_buffer.append(indata.copy())
+        audio_buffer.write(indata)
 
 
 def start_recording(role):
-    global recording, audio_buffer, current_role, gesture_tape, start_record_time
+    global recording, current_role, gesture_tape, start_record_time, audio_buffer, current_job
     if not recording:
         current_role = role
+        detected_language = conversation_language.language  # Earlier jobs may still change it
         if role == "Foreign":
             mode_text = f"{detected_language} -> English"
             trigger_msg = "(Triggered by '2' / Victory)"
@@ -55,118 +97,225 @@ def start_recording(role):
         print(f"\n>>> RECORDING STARTED {trigger_msg}")
         print(f">>> Mode: {mode_text}")
 
+        # Earlier utterances may still be transcribing from their own buffer
+        audio_buffer = free_buffers.pop() if free_buffers else AudioRingBuffer(SAMPLE_RATE)
+        audio_buffer.reset()  # Reuses the preallocated memory
+        gesture_tape = GestureTape()
+
+        transcriber = None
+        if STREAMING_TRANSCRIPTION:
+            transcriber = StreamingTranscriber(audio_buffer, get_transcription_backend(),
+                                               upload_rate=UPLOAD_SAMPLE_RATE,
+                                               normalize=NORMALIZE_UPLOAD,
+                                               encoding=UPLOAD_ENCODING)
+        current_job = TranslationJob(role, audio_buffer, gesture_tape, transcriber)
+
+        try:
+            open_audio_stream()  # Already open after warm_up(); no device start-up here
+        except Exception as e:
+            print(f">>> Microphone Error: {e}")
+            free_buffers.append(audio_buffer)
+            current_job = None
+            return
+
         recording = True
-        audio_buffer = []
-        gesture_tape = []
         start_record_time = time.time()
-        threading.Thread(target=run_audio_stream).start()
+        if transcriber:
+            transcriber.start()
     else:
         print(f">>> Ignored Start Command (Already recording)")
 
 
-def run_audio_stream():
-    with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, callback=audio_callback):
-        while recording:
-            sd.sleep(100)
+# ========================================================================
+#   LAZY DEPENDENCIES
+# ========================================================================
+def open_audio_stream():
+    """
+    Opens the microphone once and keeps it running; audio_callback() only
+    stores samples while 'recording' is set, so starting a recording costs
+    nothing and the first words are never cut off by device start-up.
+    """
+    global audio_stream
+    if audio_stream is None:
+        import sounddevice as sd
+        audio_stream = sd.InputStream(samplerate=SAMPLE_RATE, channels=1, callback=audio_callback)
+        audio_stream.start()
+    return audio_stream
+
+
+def get_openai_client():
+    """One shared OpenAI client (and its connection pool) for all requests."""
+    global openai_client
+    if openai_client is None:
+        from openai import OpenAI
+        openai_client = OpenAI(api_key=API_KEY)
+    return openai_client
+
+
+def get_speech_player():
+    """Streaming TTS player for the laptop speakers. Only PC demo mode needs it."""
+    global speech_player
+    if speech_player is None:
+        speech_player = SpeechPlayer(get_openai_client, get_translation_cache())
+        speech_player.open()
+    return speech_player
+
+
+def warm_up():
+    """
+    Loads what the configured mode needs before the first gesture, instead
+    of on the first utterance: microphone, OpenAI client, transcription
+    backend, translation cache, and the speaker stream in PC demo mode.
+    """
+    steps = [
+        ("audio stream", open_audio_stream),
+        ("openai client", get_openai_client),
+        ("transcription backend", get_transcription_backend),
+        ("translation cache", get_translation_cache),
+    ]
+    if PC_DEMO_MODE:
+        steps.append(("speaker stream", get_speech_player))
+
+    started = time.perf_counter()
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f">>> [WARM-UP]: {name} failed: {e}")
+            continue
+        metrics.record("controller.warm_up", time.perf_counter() - step_started)
+    print(f">>> [WARM-UP]: Ready in {time.perf_counter() - started:.2f}s.")
 
 
 def stop_and_process(stopper_role):
-    global recording
+    """
+    Ends the recording and hands it to the job queue. Returns immediately,
+    so the Hub receive loop keeps reading gestures while it is processed.
+    """
+    global recording, current_job
     if recording:
         print(f">>> STOPPED. Processing...")
         recording = False
-
-        if not audio_buffer:
+        metrics.record("controller.record", time.time() - start_record_time)
+        job, current_job = current_job, None
+
+        # Peak was tracked block by block in the callback
+        if not job.audio_buffer.length or job.audio_buffer.is_silent():
+            if job.audio_buffer.length:
+                print(">>> Silence detected. Ignoring.")
+            if job.transcriber:
+                job.transcriber.cancel()
+            free_buffers.append(job.audio_buffer)
             return
 
-        recording_data = np.concatenate(audio_buffer, axis=0)
-        max_volume = np.max(np.abs(recording_data))
-        if max_volume < 0.005:
-            print(">>> Silence detected. Ignoring.")
-            return
+        if job.role == "Foreign":
+            conversation_language.expect(job)
+        job_queue.submit(job)
 
-        recording_int16 = (recording_data * 32767).astype(np.int16)
-        wav.write(FILENAME, SAMPLE_RATE, recording_int16)
-
-        process_smart_translation()
 
+def process_job(job):
+    """Worker side of a job: transcribe, then translate. Returns (text, voice) or None."""
+    try:
+        job.set_state(TRANSCRIBING)
+        try:
+            original_text = transcribe_recording(job)
+        finally:
+            free_buffers.append(job.audio_buffer)
+        if not original_text:
+            return None
 
-def replay_gestures():
-    if not gesture_tape:
-        return
+        job.set_state(TRANSLATING)
+        return process_smart_translation(original_text, job)
+    finally:
+        # Later English jobs wait for this; a failed detection changes nothing
+        conversation_language.report(job, None)
 
-    print(">>> [REPLAY]: Starting Gesture Replay on Robot...")
-    try:
-        replay_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        replay_socket.connect((HOST, PORT))
 
-        first_move_time = 0
-        found_move = False
-        for record in gesture_tape:
-            if "NONE" not in record['gesture']:
-                first_move_time = record['time']
-                found_move = True
-                break
+def speak_job(job, result):
+    """Ordered side of a job: runs only after every earlier job has spoken."""
+    text, target_lang = result
+    speak_text(text, target_lang, job.gesture_tape)
 
-        if found_move:
-            print(f">>> [REPLAY]: Trimming {first_move_time:.2f}s of initial stillness.")
 
-        start_playback = time.time()
+def get_transcription_backend():
+    global transcription_backend
+    if transcription_backend is None:
+        transcription_backend = WhisperBackend(API_KEY, base_url=TRANSCRIPTION_BASE_URL)
+    return transcription_backend
 
-        for record in gesture_tape:
-            if record['time'] < first_move_time:
-                continue
 
-            adjusted_rel_time = record['time'] - first_move_time
-            target_time = start_playback + adjusted_rel_time
-            sleep_duration = target_time - time.time()
+def transcribe_recording(job):
+    """
+    Returns the transcript of a finished recording ("" on failure).
+    In streaming mode most segments are already done; only the tail is awaited.
+    """
+    try:
+        with metrics.timer("controller.transcribe"):
+            if job.transcriber:
+                return job.transcriber.finish()
+            # In-memory WAV, no output.wav round trip
+            audio_data, report = prepare_upload(job.audio_buffer.view(), SAMPLE_RATE,
+                                                UPLOAD_SAMPLE_RATE, normalize=NORMALIZE_UPLOAD,
+                                                encoding=UPLOAD_ENCODING)
+            print(f">>> [UPLOAD]: Trimmed {report['seconds_removed']:.1f}s, "
+                  f"saved {report['bytes_removed'] / 1024:.0f} KB "
+                  f"({report['upload_bytes'] / 1024:.0f} KB {report['encoding']} sent).")
+            return get_transcription_backend().transcribe(audio_data, report["filename"])
+    except Exception as e:
+        print(f"Transcription Error: {e}")
+        return ""
 
-            if sleep_duration > 0:
-                time.sleep(sleep_duration)
 
-            msg = f"FORCE:{record['gesture']}"
-            replay_socket.sendall(msg.encode())
+def replay_gestures(gesture_tape, spoken_text=None):
+    if not gesture_tape:
+        return
 
-        replay_socket.close()
-        print(">>> [REPLAY]: Finished.")
+    print(">>> [REPLAY]: Starting Gesture Replay on Robot...")
+    try:
+        if gesture_tape.first_move is not None:
+            trimmed = gesture_tape.times[gesture_tape.first_move]
+            print(f">>> [REPLAY]: Trimming {trimmed:.2f}s of initial stillness.")
+
+        stretch = 1.0
+        if REPLAY_TIME_STRETCH and spoken_text:
+            stretch = stretch_factor(gesture_tape, len(spoken_text) / SPEECH_CHARS_PER_SECOND)
+            print(f">>> [REPLAY]: Time-stretch x{stretch:.2f} to match the translation.")
+
+        def send(gestures):
+            robot_channel.send_batch((Kind.FORCE, g) for g in gestures)
+
+        late = replay(gesture_tape, send, stretch)
+        metrics.record("controller.replay_lateness", late)
+        print(f">>> [REPLAY]: Finished ({len(gesture_tape)} changes "
+              f"from {gesture_tape.observed} updates).")
     except Exception as e:
         print(f"Replay Error: {e}")
 
 
-def speak_text(text, target_lang="English"):
+def speak_text(text, target_lang="English", gesture_tape=None):
+    with metrics.timer("controller.speak"):
+        _speak_text(text, target_lang, gesture_tape)
+
+
+def _speak_text(text, target_lang, gesture_tape):
     print(f"\n[ROBOT ACTION REQ] Speaking: '{text}' (Voice: {target_lang})")
 
     if gesture_tape:
-        threading.Thread(target=replay_gestures).start()
+        threading.Thread(target=replay_gestures, args=(gesture_tape, text)).start()
 
     if PC_DEMO_MODE:
         print(">>> [PC DEMO]: Playing audio on Laptop...")
         try:
-            if pygame.mixer.music.get_busy():
-                pygame.mixer.music.stop()
-            pygame.mixer.music.unload()
-            time.sleep(0.1)
-            client = OpenAI(api_key=API_KEY)
-            with client.audio.speech.with_streaming_response.create(
-                model="tts-1",
-                voice="alloy",
-                input=text
-            ) as response:
-                response.stream_to_file(SPEECH_FILE)
-            pygame.mixer.music.load(SPEECH_FILE)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
-            pygame.mixer.music.unload()
+            # Plays while the audio streams in; repeated sentences come from the cache
+            get_speech_player().speak(text)
         except Exception as e:
             print(f"Error: {e}")
 
     else:
+        global nao_language
         print(">>> [NAO MODE]: Sending commands to Hub...")
         try:
-            temp_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            temp_sock.connect((HOST, PORT))
-
             # Select valid NAO voice
             nao_lang_setting = "English"
             for supported in SUPPORTED_NAO_LANGUAGES:
@@ -174,42 +323,65 @@ def speak_text(text, target_lang="English"):
                     nao_lang_setting = supported
                     break
 
-            # Send language
-            lang_msg = f"LANG:{nao_lang_setting}"
-            temp_sock.sendall(lang_msg.encode())
-            time.sleep(0.5)
-
-            # Send speech text
+            # Switch voice only when it changed. LANG and SAY go out in one
+            # write on the ordered connection, so the robot reads LANG first.
+            # Nothing confirms the robot has switched voice or spoken: the
+            # robot box sends no acknowledgement (see RobotChannel).
             clean_text = text.replace("\n", " ").strip()
-            msg = f"SAY:{clean_text}"
-            temp_sock.sendall(msg.encode())
-            temp_sock.close()
+            frames = []
+            if nao_lang_setting != nao_language:
+                frames.append((Kind.LANG, nao_lang_setting))
+            frames.append((Kind.SAY, clean_text))
+            robot_channel.send_batch(frames)
+            nao_language = nao_lang_setting
 
         except Exception as e:
             print(f"Failed to send to robot: {e}")
 
 
-def process_smart_translation():
-    global detected_language
-    try:
-        client = OpenAI(api_key=API_KEY)
+def get_translation_cache():
+    global translation_cache
+    if translation_cache is None:
+        translation_cache = TranslationCache(CACHE_FILE)
+        metrics.register_gauge("cache", translation_cache.stats)
+    return translation_cache
 
-        # TRANSCRIBE
-        with open(FILENAME, "rb") as audio_file:
-            transcription = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file
-            )
-        original_text = transcription.text.strip()
-        if not original_text:
-            return
 
-        print(f"[{current_role} Input]: {original_text}")
+def cached_completion(prompt, original_text, source_lang, target_lang, mode):
+    """
+    Runs a GPT prompt unless the same (normalized) text was already
+    translated with the same languages and mode.
+    """
+    cache = get_translation_cache()
+    result = cache.get_text(original_text, source_lang, target_lang, mode)
+    if result is not None:
+        print(">>> [CACHE]: Reusing previous translation.")
+        return result
+
+    client = get_openai_client()
+    with metrics.timer("controller.translate"):
+        response = client.chat.completions.create(
+            model="gpt-4o",
+            messages=[{"role": "user", "content": prompt}]
+        )
+    result = response.choices[0].message.content
+    cache.put_text(original_text, source_lang, target_lang, mode, result)
+    return result
+
+
+def process_smart_translation(original_text, job):
+    """
+    Translates one transcript according to the job's role.
+    Returns (text_to_speak, voice_language), or None on error.
+    """
+    role = job.role
+    try:
+        print(f"[{role} Input]: {original_text}")
 
         # -------------------------------------------------------------------
         # FOREIGN → ENGLISH MODE
         # -------------------------------------------------------------------
-        if current_role == "Foreign":
+        if role == "Foreign":
             prompt = (
                 f"User said: '{original_text}'. "
                 "1. Identify language. "
@@ -217,11 +389,8 @@ def process_smart_translation():
                 "Return: 'LANGUAGE: [Name] || TRANSLATION: [Text]'"
             )
 
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            result = response.choices[0].message.content
+            # Source language is what we are asking GPT to find out
+            result = cached_completion(prompt, original_text, "auto", "English", "detect")
 
             try:
                 parts = result.split("||")
@@ -229,23 +398,23 @@ def process_smart_translation():
                 translation = parts[1].replace("TRANSLATION:", "").strip()
 
                 # Update detected language if needed
-                if detected_language is None or (new_lang and "English" not in new_lang):
-                    detected_language = new_lang
+                conversation_language.report(job, new_lang)
 
-                speak_text(translation, "English")
+                return translation, "English"
             except:
-                speak_text(result, "English")
-            return
+                return result, "English"
 
         # -------------------------------------------------------------------
         # ENGLISH → FOREIGN MODE
         # -------------------------------------------------------------------
 
+        # Language detected by the Foreign jobs submitted before this one
+        detected_language = conversation_language.language_for(job)
+
         # SAFETY CHECK FIRST (fixes your NoneType bug)
         if detected_language is None:
             print(">>> No foreign language detected yet. Cannot translate English -> Foreign.")
-            speak_text("I have not detected the foreign language yet.", "English")
-            return
+            return "I have not detected the foreign language yet.", "English"
 
         # Check if NAO can speak this language
         is_supported = any(
@@ -259,13 +428,9 @@ def process_smart_translation():
                 f"Translate '{original_text}' into naturally spoken {detected_language}. "
                 "Return ONLY text."
             )
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            final_translation = response.choices[0].message.content
-            speak_text(final_translation, detected_language)
-            return
+            final_translation = cached_completion(
+                prompt, original_text, "English", detected_language, "native")
+            return final_translation, detected_language
 
         # Unsupported language → PHONETIC MODE
         print(f">>> {detected_language} not installed. Using Phonetic Fallback.")
@@ -277,60 +442,68 @@ def process_smart_translation():
             "Return ONLY the phonetic text."
         )
 
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        phonetic_text = response.choices[0].message.content
+        phonetic_text = cached_completion(
+            prompt, original_text, "English", detected_language, "phonetic")
 
         print(f"[Phonetic Output]: {phonetic_text}")
-        speak_text(phonetic_text, "English")
+        return phonetic_text, "English"
 
     except Exception as e:
         print(f"Error: {e}")
+        return None
 
 
 def main():
-    global client_socket, gesture_tape
+    global robot_channel, gesture_tape, job_queue, nao_language
+    serve_http(metrics, STATS_HTTP_PORT)
+    job_queue = JobQueue(process_job, speak_job, workers=TRANSLATION_WORKERS)
+    metrics.register_gauge("jobs", job_queue.stats)
+    warm_up()
     print(f"Connecting to Hub at {HOST}:{PORT}...")
     try:
-        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client_socket.connect((HOST, PORT))
+        robot_channel = RobotChannel(HOST, PORT, role="controller", session=SESSION).connect()
         print("Connected! Controls: 1=English, 2=Foreign, Rock=Stop")
 
-        last_trigger_time = 0
-        debounce_seconds = 1.5
-
-        while True:
-            data = client_socket.recv(1024)
-            if not data:
-                break
-
-            message = data.decode('utf-8')
-            current_time = time.time()
-
-            if recording:
-                relative_time = current_time - start_record_time
-                if "SAY:" not in message and "FORCE:" not in message:
-                    gesture_tape.append({'time': relative_time, 'gesture': message})
-
-            # Debounce triggers
-            if current_time - last_trigger_time > debounce_seconds:
-                if "ILoveYou" in message and recording:
-                    stop_and_process(current_role)
-                    last_trigger_time = current_time
-                elif "Pointing_Up" in message and not recording:
-                    start_recording("English")
-                    last_trigger_time = current_time
-                elif "Victory" in message and not recording:
-                    start_recording("Foreign")
-                    last_trigger_time = current_time
+        for kind, message in robot_channel.frames():
+            # The robot (re)connected with its default voice
+            if kind == Kind.SPEAKER_JOINED:
+                print(f">>> Robot connected ({message}).")
+                nao_language = None
+                continue
+
+            # Confirmed gesture state: recorded for the replay
+            if kind == Kind.GESTURE:
+                if recording:
+                    gesture_tape.append(message)
+                continue
+            if kind != Kind.GESTURE_EVENT:
+                continue
+
+            # Triggers fire once per confirmed onset, so a held gesture
+            # cannot re-trigger and no time-based debounce is needed
+            try:
+                edge, hand, gesture, score, held = parse_gesture_event(message)
+            except ProtocolError as e:
+                print(f"Ignoring gesture event: {e}")
+                continue
+            if edge != ONSET:
+                continue
+            if gesture == STOP_GESTURE and recording:
+                stop_and_process(current_role)
+            elif gesture == START_ENGLISH_GESTURE and not recording:
+                start_recording("English")
+            elif gesture == START_FOREIGN_GESTURE and not recording:
+                start_recording("Foreign")
 
     except Exception as e:
         print(f"Connection Error: {e}")
     finally:
-        if client_socket:
-            client_socket.close()
+        if robot_channel:
+            robot_channel.close()
+        if audio_stream:
+            audio_stream.close()
+        if speech_player:
+            speech_player.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Lock
+
+from Metrics import metrics
+
+# ========================================================================
+#   JOB STATES
+# ========================================================================
+RECORDING = "recording"
+TRANSCRIBING = "transcribing"
+TRANSLATING = "translating"
+SPEAKING = "speaking"
+DONE = "done"
+FAILED = "failed"
+
+
+class TranslationJob:
+    """
+    Everything one utterance needs, captured when its recording starts so
+    the next recording can begin while this one is still being processed.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, role, audio_buffer, gesture_tape, transcriber=None):
+        self.id = next(self._ids)
+        self.role = role
+        self.audio_buffer = audio_buffer
+        self.gesture_tape = gesture_tape
+        self.transcriber = transcriber
+        self.state = RECORDING
+        self.started_at = time.time()
+        self.stopped_at = None
+        self.state_since = time.perf_counter()
+
+    def set_state(self, state):
+        now = time.perf_counter()
+        metrics.record(f"job.{self.state}", now - self.state_since)
+        print(f">>> [JOB {self.id}]: {self.state} -> {state}")
+        self.state = state
+        self.state_since = now
+
+
+class ConversationLanguage:
+    """
+    The foreign language of the conversation, as seen from each job's place
+    in the queue.
+
+    "Foreign" jobs detect it and "English" jobs translate into it. Jobs run
+    in parallel, so an English job waits (language_for()) until every
+    Foreign job submitted before it has reported what it detected; later
+    Foreign jobs do not affect it.
+    """
+
+    def __init__(self, language=None):
+        self.language = language
+        self.changed = Condition()
+        self.pending = set()  # Ids of Foreign jobs that have not reported yet
+
+    def expect(self, job):
+        """Call when a Foreign job is submitted, before any later job."""
+        with self.changed:
+            self.pending.add(job.id)
+
+    def report(self, job, language):
+        """
+        A Foreign job is done detecting. 'language' is None if it failed;
+        an "English" detection does not replace a foreign language.
+        Reporting twice is harmless.
+        """
+        with self.changed:
+            if job.id not in self.pending:
+                return
+            self.pending.discard(job.id)
+            if language is not None and (self.language is None or (language and "English" not in language)):
+                self.language = language
+            self.changed.notify_all()
+
+    def language_for(self, job, timeout=None):
+        """The language as of 'job': waits for earlier Foreign jobs to report."""
+        with self.changed:
+            self.changed.wait_for(lambda: not any(i < job.id for i in self.pending), timeout)
+            return self.language
+
+
+class JobQueue:
+    """
+    Processes finished recordings on a worker pool without blocking the
+    Hub receive loop.
+
+    - process(job) runs on a worker (transcribe + translate, several jobs
+      in parallel) and returns what to say, or None.
+    - speak(job, result) runs on a single speaker thread, strictly in
+      submission order, so translations are never spoken out of order even
+      if a later job finished first. Workers hand their result over and are
+      free for the next job at once; they never wait for their turn.
+    """
+
+    def __init__(self, process, speak, workers=2):
+        self.process = process
+        self.speak = speak
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+        self.speaker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speak")
+        self.turn = Lock()
+        self.next_ticket = 0  # Ticket handed to the next submitted job
+        self.speaking_ticket = 0  # Ticket to hand to the speaker next
+        self.ready = {}  # ticket -> (job, result) processed, waiting for earlier tickets
+        self.active = {}  # job id -> job
+        self.active_lock = Lock()
+
+    def submit(self, job):
+        """Queues a job whose recording has just stopped. Returns immediately."""
+        job.stopped_at = time.time()
+        with self.turn:
+            ticket = self.next_ticket
+            self.next_ticket += 1
+        with self.active_lock:
+            self.active[job.id] = job
+        self.executor.submit(self.run, job, ticket)
+
+    def run(self, job, ticket):
+        result = None
+        try:
+            result = self.process(job)
+        except Exception as e:
+            print(f">>> [JOB {job.id}]: Error: {e}")
+            job.set_state(FAILED)
+
+        # Hand every job whose earlier jobs are all processed to the speaker
+        with self.turn:
+            self.ready[ticket] = (job, result)
+            while self.speaking_ticket in self.ready:
+                self.speaker.submit(self.finish, *self.ready.pop(self.speaking_ticket))
+                self.speaking_ticket += 1
+
+    def finish(self, job, result):
+        """Speaker thread: speaks one job, after every earlier one."""
+        try:
+            if result is not None and job.state != FAILED:
+                job.set_state(SPEAKING)
+                self.speak(job, result)
+                metrics.record("controller.stop_to_speech", time.time() - job.stopped_at)
+            if job.state != FAILED:
+                job.set_state(DONE)
+        except Exception as e:
+            print(f">>> [JOB {job.id}]: Error: {e}")
+            job.set_state(FAILED)
+        finally:
+            with self.active_lock:
+                self.active.pop(job.id, None)
+
+    def stats(self):
+        with self.active_lock:
+            states = [job.state for job in self.active.values()]
+        return {state: states.count(state) for state in set(states)}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        self.speaker.shutdown(wait=True)
@@ -0,0 +1,100 @@
+"""
+Upload encoding benchmark: encode time vs. bytes saved.
+
+Runs recorded utterances (WAV files) or synthetic speech-like audio through
+the upload path once per encoding and prints, per format, the average time
+of encode_audio() alone, of the whole prepare_upload() (trim + resample +
+encode), the upload size and the size relative to the raw 44.1 kHz WAV.
+FLAC/Opus need the optional 'soundfile' package; without it those rows
+show the WAV fallback.
+
+Usage (from the PythonProject folder):
+    python benchmarks/encode_bench.py                       # synthetic utterances
+    python benchmarks/encode_bench.py recordings/*.wav      # your own recordings
+"""
+import argparse
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AudioEncoding import ENCODINGS, encode_audio
+from AudioPreprocessing import prepare_upload, resample, trim_silence, UPLOAD_SAMPLE_RATE
+
+
+def load_wav(path):
+    """Reads a 16-bit PCM WAV into mono float32 samples."""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        pcm = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+        pcm = pcm.reshape(-1, f.getnchannels())[:, 0]
+        return pcm.astype(np.float32) / 32768, f.getframerate()
+
+
+def synthetic_utterance(seconds, sample_rate=44100, seed=0):
+    """Silence, then voiced bursts (harmonics + noise) separated by short pauses."""
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(0, 0.002, int(seconds * sample_rate)).astype(np.float32)
+    t = np.arange(int(0.4 * sample_rate)) / sample_rate
+    position = int(0.8 * sample_rate)
+    while position + len(t) < len(samples) - int(0.8 * sample_rate):
+        pitch = rng.uniform(100, 220)
+        burst = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        burst *= np.hanning(len(t)) * 0.2
+        samples[position:position + len(t)] += burst.astype(np.float32)
+        position += len(t) + int(rng.uniform(0.05, 0.3) * sample_rate)
+    return samples, sample_rate
+
+
+def run(utterances, rate, repeats):
+    # Trimmed and resampled once, so 'encode ms' is the encoder alone
+    prepared = [(resample(trim_silence(samples, sample_rate), sample_rate, rate), min(rate, sample_rate))
+                for samples, sample_rate in utterances]
+
+    print(f"{'format':<8}{'used':<8}{'encode ms':>10}{'upload ms':>10}{'KB':>10}{'raw KB':>10}{'ratio':>8}")
+    for encoding in ENCODINGS:
+        encode_time = upload_time = 0.0
+        total_bytes = 0
+        raw_bytes = 0
+        used = set()
+        for (samples, sample_rate), (ready, ready_rate) in zip(utterances, prepared):
+            for _ in range(repeats):
+                started = time.perf_counter()
+                data, used_encoding = encode_audio(ready, ready_rate, encoding)
+                encode_time += time.perf_counter() - started
+                started = time.perf_counter()
+                prepare_upload(samples, sample_rate, rate, encoding=encoding)
+                upload_time += time.perf_counter() - started
+            total_bytes += len(data)
+            raw_bytes += 44 + 2 * len(samples)
+            used.add(used_encoding)
+
+        calls = len(utterances) * repeats
+        print(f"{encoding:<8}{','.join(sorted(used)):<8}{1000 * encode_time / calls:>10.2f}"
+              f"{1000 * upload_time / calls:>10.2f}"
+              f"{total_bytes / 1024:>10.0f}{raw_bytes / 1024:>10.0f}{raw_bytes / total_bytes:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="16-bit WAV recordings (default: synthetic)")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[3, 8, 20],
+                        help="Lengths of the synthetic utterances")
+    parser.add_argument("--rate", type=int, default=UPLOAD_SAMPLE_RATE, help="Upload sample rate")
+    parser.add_argument("--repeats", type=int, default=5, help="Encodes per utterance and format")
+    args = parser.parse_args()
+
+    if args.files:
+        utterances = [load_wav(path) for path in args.files]
+    else:
+        utterances = [synthetic_utterance(s, seed=i) for i, s in enumerate(args.seconds)]
+    run(utterances, args.rate, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Benchmark for the two gesture engines.
+
+synthetic (default): generates landmark sessions from a simple 3D hand
+    model (finger curls, rotation, scale, noise, left/right hands, and
+    moving transitions between gestures), trains templates on one session
+    and tests on another. Reports per-gesture accuracy and the per-frame
+    cost of feature extraction + classification. Needs no model file.
+tapes: same, on sessions recorded with Gestures.RECORD_LANDMARKS
+    (--train a.npz --test b.npz; without --test, alternate blocks of the
+    training session are held out).
+video: runs both engines on the same frames of a recorded clip (VIDEO
+    mode) and reports per-frame cost of each, plus how often the landmarks
+    engine agrees with the recognizer on the gestures it has templates for.
+
+Usage (from the PythonProject folder):
+    python benchmarks/engine_bench.py
+    python benchmarks/engine_bench.py --train session1.npz --test session2.npz --save models/gesture_templates.json
+    python benchmarks/engine_bench.py --video clip.mp4 --recognizer-model models/gesture_recognizer.task \\
+        --landmark-model models/hand_landmarker.task --templates models/gesture_templates.json
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GesturePipeline import FrameProcessor, VideoRecognizer
+from GestureTracker import hand_events
+from LandmarkClassifier import LandmarkClassifier, LandmarkRecognizer, LandmarkTape, landmark_features
+
+# ========================================================================
+#   SYNTHETIC HANDS
+# ========================================================================
+# Curl per finger (thumb, index, middle, ring, pinky; 0 = straight,
+# 1 = folded) and in-plane rotation in degrees. "Call_Me" stands in for a
+# NAO-specific gesture the canned recognizer does not know.
+SYNTHETIC_GESTURES = {
+    "Open_Palm": ((0, 0, 0, 0, 0), 0),
+    "Closed_Fist": ((1, 1, 1, 1, 1), 0),
+    "Pointing_Up": ((1, 0, 1, 1, 1), 0),
+    "Victory": ((1, 0, 0, 1, 1), 0),
+    "ILoveYou": ((0, 0, 1, 1, 0), 0),
+    "Thumb_Up": ((0, 1, 1, 1, 1), 45),
+    "Thumb_Down": ((0, 1, 1, 1, 1), 225),
+    "Call_Me": ((0, 1, 1, 1, 0), 0),
+}
+
+# Hand model in palm lengths, image axes (y points down), fingers up
+_BASES = np.array([[-0.25, -0.25], [-0.3, -0.95], [-0.05, -1.0], [0.18, -0.95], [0.38, -0.85]])
+_DIRECTIONS = np.radians([-45, -8, 0, 8, 16])  # Base direction of each finger, from vertical
+_SEGMENTS = np.array([[0.35, 0.3, 0.25], [0.45, 0.28, 0.22], [0.5, 0.3, 0.24],
+                      [0.46, 0.28, 0.22], [0.36, 0.22, 0.2]])
+_BENDS = np.radians([[40, 50, 60], [80, 100, 70], [80, 100, 70], [80, 100, 70], [80, 100, 70]])
+
+
+def synthetic_hand(curls, rotation, scale, center, side, rng, noise=0.02):
+    """21 landmarks in pixels for one hand pose."""
+    points = np.zeros((21, 3))
+    for finger in range(5):
+        angle = _DIRECTIONS[finger]
+        u = np.array([np.sin(angle), -np.cos(angle), 0.0])
+        # Fingers fold towards the camera; the thumb folds across the palm
+        fold = np.array([1.0, 0.0, -0.5]) / np.sqrt(1.25) if finger == 0 else np.array([0.0, 0.0, -1.0])
+        position = np.array([*_BASES[finger], 0.0])
+        points[1 + 4 * finger] = position
+        bend = 0.0
+        for joint in range(3):
+            bend += curls[finger] * _BENDS[finger, joint]
+            position = position + _SEGMENTS[finger, joint] * (np.cos(bend) * u + np.sin(bend) * fold)
+            points[2 + 4 * finger + joint] = position
+
+    if side == "Left":
+        points[:, 0] *= -1
+        rotation = -rotation
+    theta = np.radians(rotation)
+    rotate = np.array([[np.cos(theta), -np.sin(theta), 0], [np.sin(theta), np.cos(theta), 0], [0, 0, 1]])
+    points = points @ rotate.T + rng.normal(0, noise, points.shape)
+    return points * scale + np.array([*center, 0.0])
+
+
+def synthetic_session(seed, seconds_each=2.0, cycles=3, fps=30, transition=0.2):
+    """
+    A LandmarkTape cycling through SYNTHETIC_GESTURES with a random hand
+    per run and a moving transition between runs (labelled with the new
+    gesture, as a recognizer would lag into it).
+    """
+    rng = np.random.default_rng(seed)
+    tape = LandmarkTape(origin=0.0)
+    names = list(SYNTHETIC_GESTURES)
+    t, previous = 0.0, None
+    for _ in range(cycles):
+        for name in rng.permutation(names):
+            curls, rotation = SYNTHETIC_GESTURES[name]
+            side = "Left" if rng.random() < 0.3 else "Right"
+            scale = rng.uniform(60, 130)
+            center = rng.uniform(150, 330, 2)
+            for i in range(int(seconds_each * fps)):
+                blend = min(1.0, i / (transition * fps)) if previous else 1.0
+                target = np.clip(np.array(curls) + rng.normal(0, 0.08, 5), 0, 1)
+                mixed = (1 - blend) * np.array(previous) + blend * target if previous else target
+                jitter = rng.normal(0, 8)
+                hand = synthetic_hand(mixed, rotation + jitter, scale, center, side, rng)
+                tape.append(t, side, name, hand)
+                t += 1.0 / fps
+            previous = curls
+    return tape
+
+
+# ========================================================================
+#   MEASUREMENT
+# ========================================================================
+def ms(samples):
+    p50, p95 = np.percentile(np.asarray(samples) * 1000.0, [50, 95])
+    return f"{p50:8.3f} {p95:8.3f}"
+
+
+def split_blocks(tape, block=2.0):
+    """Holds out every other 'block' seconds of one session. Returns (train, test) (features, labels)."""
+    times, sides, labels, points = tape.arrays()
+    features = landmark_features(points, sides)
+    held_out = (times // block).astype(int) % 2 == 1
+    return (features[~held_out], labels[~held_out]), (features[held_out], labels[held_out])
+
+
+def report_accuracy(classifier, features, labels):
+    predicted = np.array([name for name, _ in classifier.classify(features)])
+    print(f"\n{'gesture':<16}{'test hands':>11}{'accuracy':>10}   most confused with")
+    for name in sorted(set(labels.tolist())):
+        rows = labels == name
+        wrong = predicted[rows][predicted[rows] != name]
+        confused = max(set(wrong.tolist()), key=wrong.tolist().count) if len(wrong) else "-"
+        known = "" if name in classifier.labels else " (no template)"
+        print(f"{name:<16}{rows.sum():>11}{np.mean(predicted[rows] == name) * 100:>9.1f}%   {confused}{known}")
+    print(f"{'overall':<16}{len(labels):>11}{np.mean(predicted == labels) * 100:>9.1f}%")
+
+
+def report_cost(classifier, points, sides, repeats=2000):
+    """Per-frame cost of the classifier half of the landmarks engine (1 and 2 hands)."""
+    print(f"\n{'classifier cost':<24}{'p50 ms':>8} {'p95 ms':>8}")
+    for hands in (1, 2):
+        times = []
+        for i in range(repeats):
+            rows = slice((i * hands) % (len(points) - hands), (i * hands) % (len(points) - hands) + hands)
+            started = time.perf_counter()
+            classifier.classify(landmark_features(points[rows], sides[rows]))
+            times.append(time.perf_counter() - started)
+        print(f"{f'per frame, {hands} hand(s)':<24}{ms(times)}")
+    started = time.perf_counter()
+    classifier.classify(landmark_features(points, sides))
+    elapsed = time.perf_counter() - started
+    print(f"batch of {len(points)} hands: {elapsed / len(points) * 1e6:.1f} us per hand")
+
+
+def run_offline(args):
+    if args.train:
+        train_tape = LandmarkTape.load(args.train)
+        test_tape = LandmarkTape.load(args.test) if args.test else None
+    else:
+        train_tape, test_tape = synthetic_session(seed=0), synthetic_session(seed=1)
+        print("Synthetic sessions: train seed 0, test seed 1.")
+
+    if test_tape is None:
+        (train_features, train_labels), (test_features, test_labels) = split_blocks(train_tape)
+    else:
+        train_features, train_labels = train_tape.training_set()
+        test_features, test_labels = test_tape.training_set(trim=0.0)  # Test on every frame
+
+    started = time.perf_counter()
+    classifier = LandmarkClassifier.train(train_features, train_labels)
+    print(f"Trained {len(classifier.labels)} templates on {len(train_labels)} hands "
+          f"in {(time.perf_counter() - started) * 1000:.1f} ms.")
+    if args.save:
+        classifier.save(args.save)
+        print(f"Saved templates to {args.save}.")
+
+    report_accuracy(classifier, test_features, test_labels)
+    _, sides, _, points = (test_tape or train_tape).arrays()
+    report_cost(classifier, points, sides)
+
+
+def run_video(args):
+    import cv2
+    import mediapipe as mp
+    vision = mp.tasks.vision
+    options = vision.GestureRecognizerOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=args.recognizer_model),
+        running_mode=vision.RunningMode.VIDEO, num_hands=2)
+    engines = {
+        "recognizer": VideoRecognizer(vision.GestureRecognizer.create_from_options(options)),
+        "landmarks": LandmarkRecognizer(LandmarkClassifier.load(args.templates), args.landmark_model),
+    }
+    known = set(engines["landmarks"].classifier.labels)
+    for engine in engines.values():
+        engine.warm_up()
+
+    processor = FrameProcessor(adaptive=False)
+    cap = cv2.VideoCapture(args.video)
+    costs = {name: [] for name in engines}
+    agree, compared = {}, {}
+    index = 0
+    while index < args.frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        index += 1
+        rgb, _ = processor.to_rgb(processor.resize(frame))
+        hands = {}
+        for name, engine in engines.items():
+            started = time.perf_counter()
+            result = engine.recognize(rgb, index * 33)
+            costs[name].append(time.perf_counter() - started)
+            hands[name] = dict((side, gesture) for side, gesture, _ in hand_events(result))
+        for side, gesture in hands["recognizer"].items():
+            if gesture in known:
+                compared[gesture] = compared.get(gesture, 0) + 1
+                agree[gesture] = agree.get(gesture, 0) + (hands["landmarks"].get(side) == gesture)
+    cap.release()
+    for engine in engines.values():
+        engine.close()
+
+    print(f"\n{index} frames of {args.video}")
+    print(f"{'engine':<12}{'p50 ms':>8} {'p95 ms':>8}")
+    for name, samples in costs.items():
+        print(f"{name:<12}{ms(samples)}")
+    print(f"\n{'gesture':<16}{'hands':>7}{'agreement':>11}   (reference: recognizer)")
+    for gesture in sorted(compared):
+        print(f"{gesture:<16}{compared[gesture]:>7}{agree[gesture] / compared[gesture] * 100:>10.1f}%")
+    if compared:
+        print(f"{'overall':<16}{sum(compared.values()):>7}"
+              f"{sum(agree.values()) / sum(compared.values()) * 100:>10.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", help="Recorded landmark session to train on (default: synthetic)")
+    parser.add_argument("--test", help="Recorded landmark session to test on")
+    parser.add_argument("--save", help="Write the trained templates here")
+    parser.add_argument("--video", help="Recorded clip: compare both engines frame by frame")
+    parser.add_argument("--recognizer-model", default="models/gesture_recognizer.task")
+    parser.add_argument("--landmark-model", default="models/hand_landmarker.task")
+    parser.add_argument("--templates", default="models/gesture_templates.json")
+    parser.add_argument("--frames", type=int, default=600, help="Max video frames")
+    args = parser.parse_args()
+
+    if args.video:
+        run_video(args)
+    else:
+        run_offline(args)
+
+
+if __name__ == "__main__":
+    main()
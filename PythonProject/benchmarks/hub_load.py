@@ -0,0 +1,329 @@
+"""
+Hub load generator and traffic replay.
+
+load   : simulates N robots, controllers and cameras (optionally spread over
+         several sessions) sending gesture / SAY / FORCE traffic at fixed
+         rates, some robots reading slowly. Reports end-to-end fan-out
+         latency per message type, throughput and the Hub's own counters.
+replay : plays a traffic log recorded with SimpleServer(record_path=...)
+         against a Hub, at 1x or accelerated speed.
+dump   : prints a traffic log as text.
+
+Without --host an in-process Hub is started on a free port (add --record
+to capture the generated traffic as a log). Results can be saved with
+--json and compared against an earlier run with --baseline.
+
+Usage (from the PythonProject folder):
+    python benchmarks/hub_load.py load --robots 4 --controllers 2 --cameras 1 --duration 10
+    python benchmarks/hub_load.py load --slow-readers 2 --json run.json --baseline base.json
+    python benchmarks/hub_load.py load --record traffic.hrilog
+    python benchmarks/hub_load.py replay traffic.hrilog --speed 10
+    python benchmarks/hub_load.py dump traffic.hrilog
+"""
+import argparse
+import itertools
+import json
+import os
+import socket
+import sys
+import time
+from threading import Thread, Event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Hub import SimpleServer
+from HubProtocol import (
+    Kind, FrameDecoder, MAGIC, DEFAULT_SESSION, encode_batch, encode_frame, encode_hello,
+    open_hub_connection, to_legacy,
+)
+from HubTraffic import read_log, DIRECTIONS, IN, OPEN, HUB_CLIENT
+from Metrics import MetricsRegistry, query_hub
+
+# First field of every synthetic payload: which kind of traffic it measures
+TAGS = {"G": "gesture", "S": "say", "F": "force"}
+
+
+class LoadClient:
+    """
+    One synthetic framed client. A reader thread drains everything the Hub
+    sends and records fan-out latency from the send time embedded in each
+    payload ("tag|sender|seq|perf_counter"). Slow clients read small chunks
+    with a pause in between, to exercise the Hub's backpressure handling.
+    """
+
+    def __init__(self, name, host, port, role, session, results, slow_delay=0.0):
+        self.name = name
+        self.sock = open_hub_connection(host, port)
+        self.sock.sendall(encode_frame(Kind.HELLO, encode_hello(role, session)))
+        self.results = results
+        self.slow_delay = slow_delay
+        self.seq = itertools.count(1)
+        self.thread = Thread(target=self.read_loop, daemon=True)
+        self.thread.start()
+
+    def payload(self, tag):
+        return f"{tag}|{self.name}|{next(self.seq)}|{time.perf_counter():.6f}"
+
+    def send(self, kind, tag):
+        self.sock.sendall(encode_frame(kind, self.payload(tag)))
+        self.results.increment(f"sent.{TAGS[tag]}")
+
+    def read_loop(self):
+        decoder = FrameDecoder(read_size=256 if self.slow_delay else 65536)
+        try:
+            while True:
+                frames = decoder.read_from(self.sock)
+                if frames is None:
+                    return
+                now = time.perf_counter()
+                for kind, text in frames:
+                    self.results.increment("received.bytes", len(text) + 5)
+                    parts = text.split("|")
+                    if len(parts) != 4 or parts[0] not in TAGS:
+                        continue
+                    tag = TAGS[parts[0]]
+                    self.results.increment(f"received.{tag}")
+                    self.results.record(f"fanout.{tag}", now - float(parts[3]))
+                if self.slow_delay:
+                    time.sleep(self.slow_delay)
+        except OSError:
+            pass
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def send_at_rate(stop, rate, send):
+    """Calls send() 'rate' times per second on an absolute schedule until 'stop' is set."""
+    if rate <= 0:
+        return
+    interval = 1.0 / rate
+    next_due = time.perf_counter()
+    while not stop.is_set():
+        send()
+        next_due += interval
+        delay = next_due - time.perf_counter()
+        if delay > 0:
+            stop.wait(delay)
+
+
+def print_results(summary, baseline=None):
+    print(f"\n{'metric':<22}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, h in summary["fanout"].items():
+        if not h.get("count"):
+            continue
+        print(f"{name:<22}{h['count']:>8}{h['p50_ms']:>10.3f}{h['p95_ms']:>10.3f}"
+              f"{h['p99_ms']:>10.3f}{h['max_ms']:>10.3f}")
+    print()
+    for name, value in summary["rates"].items():
+        line = f"{name:<22}{value:>12.1f}"
+        if baseline and name in baseline.get("rates", {}):
+            before = baseline["rates"][name]
+            if before:
+                line += f"   ({(value - before) / before * 100:+.1f}% vs baseline)"
+        print(line)
+    if baseline:
+        print()
+        for name, h in summary["fanout"].items():
+            before = baseline.get("fanout", {}).get(name, {})
+            if h.get("count") and before.get("count"):
+                print(f"{name:<22}p95 {before['p95_ms']:.3f} -> {h['p95_ms']:.3f} ms")
+    print(f"\nHub counters: {summary['hub_counters']}")
+
+
+def run_load(args, host, port):
+    results = MetricsRegistry()
+    sessions = [DEFAULT_SESSION] + [f"load-{i}" for i in range(1, args.sessions)]
+    stop = Event()
+    clients = []
+
+    def spawn(prefix, count, role, slow=0):
+        made = []
+        for i in range(count):
+            delay = args.slow_delay if i < slow else 0.0
+            client = LoadClient(f"{prefix}{i}", host, port, role, sessions[i % len(sessions)], results, delay)
+            made.append(client)
+        clients.extend(made)
+        return made
+
+    spawn("robot", args.robots, "robot", slow=args.slow_readers)
+    controllers = spawn("controller", args.controllers, "controller")
+    cameras = spawn("camera", args.cameras, "camera")
+    time.sleep(0.3)  # Let every HELLO land before traffic starts
+
+    senders = []
+    for camera in cameras:
+        senders.append(lambda c=camera: send_at_rate(stop, args.gesture_rate, lambda: c.send(Kind.GESTURE, "G")))
+    for controller in controllers:
+        senders.append(lambda c=controller: send_at_rate(stop, args.say_rate, lambda: c.send(Kind.SAY, "S")))
+        senders.append(lambda c=controller: send_at_rate(stop, args.force_rate, lambda: c.send(Kind.FORCE, "F")))
+    threads = [Thread(target=sender, daemon=True) for sender in senders]
+
+    print(f"Load: {args.robots} robots ({args.slow_readers} slow), {args.controllers} controllers, "
+          f"{args.cameras} cameras, {len(sessions)} session(s) for {args.duration}s...")
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    time.sleep(args.drain)  # Let in-flight messages arrive
+
+    hub_stats = query_hub(host, port)
+    for client in clients:
+        client.close()
+
+    snapshot = results.snapshot()
+    counters = snapshot["counters"]
+    sent = sum(v for k, v in counters.items() if k.startswith("sent."))
+    received = sum(v for k, v in counters.items() if k.startswith("received.") and k != "received.bytes")
+    return {
+        "config": vars(args),
+        "fanout": {name: h for name, h in snapshot["histograms"].items()},
+        "rates": {
+            "sent msg/s": sent / elapsed,
+            "delivered msg/s": received / elapsed,
+            "delivered KB/s": counters.get("received.bytes", 0) / elapsed / 1024,
+        },
+        "counters": counters,
+        "hub_counters": hub_stats.get("counters", {}),
+        "hub_send_latency": hub_stats.get("histograms", {}).get("hub.send_latency", {}),
+    }
+
+
+def run_replay(args, host, port):
+    events = list(read_log(args.log))
+    sent = [e for e in events if e[1] == IN]
+    modes = {e[3]: e[4].rsplit(" ", 1)[-1] for e in events if e[1] == OPEN}
+    client_ids = sorted(set(modes) | {e[3] for e in sent})
+    print(f"Replaying {len(sent)} messages from {len(client_ids)} clients at {args.speed}x...")
+
+    # Every recorded client is reconnected up front so fan-out matches the recording
+    sockets = {}
+    received = {"bytes": 0}
+    for client in client_ids:
+        sock = socket.create_connection((host, port))
+        if modes.get(client, "framed") == "framed":
+            sock.sendall(MAGIC)
+            if client == HUB_CLIENT:
+                # The Hub's own camera is replayed as a remote camera client
+                sock.sendall(encode_frame(Kind.HELLO, encode_hello("camera")))
+        sockets[client] = sock
+        Thread(target=drain, args=(sock, received), daemon=True).start()
+    time.sleep(0.6)  # Longer than the handshake timeout, so legacy clients are registered
+
+    start = time.perf_counter()
+    worst = 0.0
+    origin = sent[0][0] if sent else 0.0
+    for t, _, kind, client, text in sent:
+        due = start + (t - origin) / args.speed
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        worst = max(worst, time.perf_counter() - due)
+        sockets[client].sendall(encode_batch([(kind, text)]) if modes.get(client, "framed") == "framed"
+                                else to_legacy(kind, text).encode())
+    elapsed = time.perf_counter() - start
+    time.sleep(args.drain)
+
+    hub_stats = query_hub(host, port)
+    for sock in sockets.values():
+        sock.close()
+    return {
+        "config": {k: v for k, v in vars(args).items()},
+        "fanout": {"hub.send_latency": hub_stats.get("histograms", {}).get("hub.send_latency", {})},
+        "rates": {
+            "replayed msg/s": len(sent) / elapsed if elapsed else 0.0,
+            "delivered KB/s": received["bytes"] / elapsed / 1024 if elapsed else 0.0,
+            "worst lateness ms": worst * 1000,
+        },
+        "hub_counters": hub_stats.get("counters", {}),
+    }
+
+
+def drain(sock, received):
+    try:
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                return
+            received["bytes"] += len(data)
+    except OSError:
+        pass
+
+
+def dump(path):
+    for t, direction, kind, client, text in read_log(path):
+        name = kind.name if kind else "-"
+        print(f"{t:10.4f}  {DIRECTIONS[direction]:<5} client {client:<4} {name:<8} {text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def hub_options(p):
+        p.add_argument("--host", help="Hub to test (default: start one in-process)")
+        p.add_argument("--port", type=int, default=8888)
+        p.add_argument("--record", help="Record the in-process Hub's traffic to this log")
+        p.add_argument("--drain", type=float, default=1.0, help="Seconds to wait for in-flight messages")
+        p.add_argument("--json", help="Write the results to this file")
+        p.add_argument("--baseline", help="Compare against results saved with --json")
+
+    load = sub.add_parser("load", help="Synthetic robots / controllers / cameras")
+    hub_options(load)
+    load.add_argument("--robots", type=int, default=2)
+    load.add_argument("--controllers", type=int, default=1)
+    load.add_argument("--cameras", type=int, default=1)
+    load.add_argument("--sessions", type=int, default=1, help="Spread clients over this many sessions")
+    load.add_argument("--slow-readers", type=int, default=0, help="Robots that read slowly")
+    load.add_argument("--slow-delay", type=float, default=0.05, help="Pause between reads of a slow robot")
+    load.add_argument("--gesture-rate", type=float, default=30.0, help="Gestures/s per camera")
+    load.add_argument("--say-rate", type=float, default=1.0, help="SAY/s per controller")
+    load.add_argument("--force-rate", type=float, default=1.0,
+                      help="FORCE/s per controller (each pauses live gestures for 0.3s)")
+    load.add_argument("--duration", type=float, default=10.0)
+
+    replay = sub.add_parser("replay", help="Replay a recorded traffic log")
+    hub_options(replay)
+    replay.add_argument("log")
+    replay.add_argument("--speed", type=float, default=1.0, help="2 = twice as fast")
+
+    dump_cmd = sub.add_parser("dump", help="Print a recorded traffic log")
+    dump_cmd.add_argument("log")
+
+    args = parser.parse_args()
+    if args.command == "dump":
+        dump(args.log)
+        return
+
+    server = None
+    host, port = args.host, args.port
+    if host is None:
+        server = SimpleServer("127.0.0.1", 0, record_path=args.record)
+        host, port = "127.0.0.1", server.port
+
+    try:
+        summary = run_load(args, host, port) if args.command == "load" else run_replay(args, host, port)
+    finally:
+        if server:
+            server.close()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(summary, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
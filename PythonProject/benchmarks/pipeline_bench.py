@@ -0,0 +1,243 @@
+"""
+Offline benchmark for the gesture pipeline.
+
+Feeds a recorded video (or synthetic frames) through the same
+resize -> convert -> recognize -> format -> broadcast path that
+detect_gestures() uses, without a webcam. The recognizer is pluggable:
+a StubRecognizer stands in for MediaPipe so no model file is needed.
+
+Reports FPS, p50/p95/p99 latency per stage and bytes broadcast per second,
+and how many messages the gesture tracker sent compared with broadcasting
+every change of the raw per-frame string (--flicker adds one-frame noise
+to the stub, like MediaPipe hesitating between two gestures).
+
+Usage (from the PythonProject folder):
+    python benchmarks/pipeline_bench.py                      # synthetic frames, stub recognizer
+    python benchmarks/pipeline_bench.py --video clip.mp4     # recorded video, stub recognizer
+    python benchmarks/pipeline_bench.py --flicker 0.1        # 10% flickering frames
+    python benchmarks/pipeline_bench.py --video clip.mp4 --model models/gesture_recognizer.task
+"""
+import argparse
+import os
+import sys
+import time
+from threading import Thread
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Hub import SimpleServer
+from HubProtocol import open_hub_connection
+from GesturePipeline import FrameProcessor, BroadcastGate, VideoRecognizer
+from GestureTracker import format_hands
+
+STAGES = ["resize", "convert", "recognize", "format", "broadcast"]
+
+
+# ========================================================================
+#   FRAME SOURCES
+# ========================================================================
+def video_frames(path, limit):
+    """Yields frames from a recorded video file."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open video: {path}")
+    count = 0
+    while count < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        count += 1
+        yield frame
+    cap.release()
+
+
+def synthetic_frames(limit, width=640, height=480, seed=0):
+    """Yields random-noise webcam-sized BGR frames (pre-generated, so generation is not timed)."""
+    rng = np.random.default_rng(seed)
+    pool = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(8)]
+    for i in range(limit):
+        yield pool[i % len(pool)]
+
+
+# ========================================================================
+#   STUB RECOGNIZER
+# ========================================================================
+def _category(name, score=0.9):
+    return SimpleNamespace(category_name=name, score=score)
+
+
+class StubRecognizer:
+    """
+    Stand-in for MediaPipe. Cycles through a script of gestures, switching
+    every 'hold' frames, and can burn a fixed amount of time per call.
+    With 'flicker', that fraction of frames reports a hand as "None" or
+    loses it, at a lower score. Results have the same shape as
+    GestureRecognizerResult.
+    """
+
+    SCRIPT = ["NONE", "Right_Open_Palm", "Right_Pointing_Up", "Right_Victory",
+              "Right_Open_Palm | Left_Closed_Fist", "Right_ILoveYou"]
+
+    def __init__(self, hold=15, latency_ms=0.0, flicker=0.0, seed=0):
+        self.hold = hold
+        self.latency = latency_ms / 1000.0
+        self.flicker = flicker
+        self.rng = np.random.default_rng(seed)
+        self.calls = 0
+
+    def recognize(self, rgb, timestamp_ms):
+        if self.latency:
+            end = time.perf_counter() + self.latency
+            while time.perf_counter() < end:
+                pass
+        output = self.SCRIPT[(self.calls // self.hold) % len(self.SCRIPT)]
+        self.calls += 1
+
+        gestures, handedness, landmarks = [], [], []
+        if output != "NONE":
+            for k, hand in enumerate(output.split(" | ")):
+                side, name = hand.split("_", 1)
+                score = 0.9
+                if self.flicker and self.rng.random() < self.flicker:
+                    if self.rng.random() < 0.5:
+                        continue  # Hand lost for one frame
+                    name, score = "None", 0.6
+                gestures.append([_category(name, score)])
+                handedness.append([_category(side)])
+                cx = 0.35 + 0.3 * k
+                landmarks.append([SimpleNamespace(x=cx + dx, y=0.5 + dx, z=0.0)
+                                  for dx in np.linspace(-0.08, 0.08, 21)])
+        return SimpleNamespace(gestures=gestures, handedness=handedness, hand_landmarks=landmarks)
+
+    def close(self):
+        pass
+
+
+def load_mediapipe(model_path):
+    import mediapipe as mp
+    vision = mp.tasks.vision
+    options = vision.GestureRecognizerOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+        running_mode=vision.RunningMode.VIDEO,
+        num_hands=2,
+    )
+    return VideoRecognizer(vision.GestureRecognizer.create_from_options(options))
+
+
+# ========================================================================
+#   MEASUREMENT
+# ========================================================================
+def count_bytes(sock, totals):
+    """Sink client: counts every byte the Hub broadcasts to it."""
+    while True:
+        try:
+            data = sock.recv(65536)
+        except OSError:
+            break
+        if not data:
+            break
+        totals["bytes"] += len(data)
+
+
+def percentiles(samples):
+    if not samples:
+        return "      -        -        -"
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000.0, [50, 95, 99])
+    return f"{p50:7.3f}  {p95:7.3f}  {p99:7.3f}"
+
+
+def run(frames, recognizer, adaptive, clients, port):
+    server = SimpleServer("127.0.0.1", port)
+    port = server.port
+
+    received = {"bytes": 0}
+    sinks = []
+    for _ in range(clients):
+        sink = open_hub_connection("127.0.0.1", port)
+        Thread(target=count_bytes, args=(sink, received), daemon=True).start()
+        sinks.append(sink)
+    time.sleep(0.2)  # Let the Hub finish the handshakes
+
+    processor = FrameProcessor(adaptive=adaptive)
+    gate = BroadcastGate(server, verbose=False)
+    timings = {stage: [] for stage in STAGES}
+    processed = raw_changes = 0
+    last_raw = None
+
+    clock = time.perf_counter
+    started = clock()
+    for index, frame in enumerate(frames):
+        # Simulated 30 FPS camera clock so the idle scheduler behaves as live
+        now = index / 30.0
+        if not processor.should_run(now):
+            continue
+
+        t0 = clock()
+        frame = processor.resize(frame)
+        t1 = clock()
+        rgb, roi = processor.to_rgb(frame)
+        t2 = clock()
+        result = recognizer.recognize(rgb, index * 33)
+        t3 = clock()
+        hands = processor.finish(result, roi, now)
+        raw = format_hands(hands)
+        t4 = clock()
+        gate.offer(hands, now)
+        t5 = clock()
+        if raw != last_raw:  # What broadcasting every string change would have sent
+            raw_changes += 1
+            last_raw = raw
+
+        for stage, elapsed in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+            timings[stage].append(elapsed)
+        processed += 1
+    elapsed = clock() - started
+
+    time.sleep(0.3)  # Let the last broadcasts drain to the sinks
+    for sink in sinks:
+        sink.close()
+    server.close()
+    recognizer.close()
+
+    print(f"\nFrames processed : {processed} ({processor.skipped} skipped by scheduler)")
+    print(f"Throughput       : {processed / elapsed:.1f} FPS over {elapsed:.2f}s")
+    print(f"Gestures sent    : {gate.sent} confirmed ({raw_changes} raw string changes), "
+          f"{gate.events_sent} onset/offset events")
+    print(f"Bytes broadcast  : {received['bytes']} total, {received['bytes'] / elapsed:.0f} B/s "
+          f"across {clients} client(s)")
+    print(f"\n{'stage':<10}   p50 ms   p95 ms   p99 ms")
+    for stage in STAGES:
+        print(f"{stage:<10} {percentiles(timings[stage])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="Recorded video file (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=600, help="Max frames to process")
+    parser.add_argument("--model", help="Path to gesture_recognizer.task (default: stub recognizer)")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Busy time per stub call")
+    parser.add_argument("--flicker", type=float, default=0.0, help="Fraction of stub frames with one-frame noise")
+    parser.add_argument("--no-adaptive", action="store_true", help="Disable idle rate / ROI cropping")
+    parser.add_argument("--clients", type=int, default=1, help="Sink clients connected to the Hub")
+    parser.add_argument("--port", type=int, default=0, help="Hub port (0 = any free port)")
+    args = parser.parse_args()
+
+    if args.video:
+        frames = video_frames(args.video, args.frames)
+    else:
+        frames = synthetic_frames(args.frames)
+
+    if args.model:
+        recognizer = load_mediapipe(args.model)
+    else:
+        recognizer = StubRecognizer(latency_ms=args.stub_latency_ms, flicker=args.flicker)
+
+    run(frames, recognizer, not args.no_adaptive, args.clients, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Startup-time benchmark.
+
+1. Import time of each project module (and of the heavy libraries behind
+   them), measured in a fresh interpreter per run so nothing is cached.
+2. Time-to-first-gesture (needs --model): import MediaPipe, create the
+   recognizer, then time the first inference (cold, what warm-up pays
+   for) against the following ones (warm).
+
+Usage (from the PythonProject folder):
+    python benchmarks/startup_bench.py
+    python benchmarks/startup_bench.py --model models/gesture_recognizer.task --video clip.mp4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROJECT_MODULES = [
+    "HubProtocol", "Metrics", "Hub", "GesturePipeline", "LandmarkClassifier", "MultiCamera", "Gestures",
+    "StreamingTranscriber", "TranslationController",
+]
+LIBRARIES = ["numpy", "cv2", "mediapipe", "openai", "sounddevice"]
+
+IMPORT_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - started,
+                   "loaded": sorted(m for m in ("mediapipe", "openai", "sounddevice")
+                                    if m in sys.modules)}}))
+"""
+
+FIRST_GESTURE_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+import cv2, numpy as np
+import mediapipe as mp
+t_import = time.perf_counter()
+from GesturePipeline import FrameProcessor, VideoRecognizer, format_result
+vision = mp.tasks.vision
+recognizer = VideoRecognizer(vision.GestureRecognizer.create_from_options(vision.GestureRecognizerOptions(
+    base_options=mp.tasks.BaseOptions(model_asset_path={model!r}),
+    running_mode=vision.RunningMode.VIDEO, num_hands=2)))
+t_create = time.perf_counter()
+
+frames = []
+if {video!r}:
+    cap = cv2.VideoCapture({video!r})
+    while len(frames) < 10:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+if not frames:
+    frames = [np.random.default_rng(i).integers(0, 255, (480, 640, 3), np.uint8) for i in range(10)]
+
+processor = FrameProcessor(adaptive=False)
+times = []
+for i, frame in enumerate(frames):
+    started = time.perf_counter()
+    rgb, roi = processor.to_rgb(processor.resize(frame))
+    result = recognizer.recognize(rgb, i + 1)
+    output = format_result(result)
+    times.append(time.perf_counter() - started)
+    if i == 0:
+        t_first = time.perf_counter()
+        first_output = output
+recognizer.close()
+print(json.dumps({{"import": t_import - t0, "create": t_create - t_import, "first": times[0],
+                   "warm": sorted(times[1:])[len(times[1:]) // 2] if len(times) > 1 else None,
+                   "to_first_gesture": t_first - t0, "first_output": first_output}}))
+"""
+
+
+def run_snippet(code):
+    """Runs code in a fresh interpreter from the project folder. Returns parsed JSON or an error string."""
+    proc = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        error = proc.stderr.strip().splitlines()
+        return error[-1] if error else f"exit code {proc.returncode}"
+    return json.loads(lines[-1])
+
+
+def bench_imports(modules, repeats):
+    print(f"{'module':<24}{'median ms':>10}{'min ms':>10}   heavy libraries loaded")
+    for module in modules:
+        runs = [run_snippet(IMPORT_SNIPPET.format(module=module)) for _ in range(repeats)]
+        failed = [r for r in runs if isinstance(r, str)]
+        if failed:
+            print(f"{module:<24}{'-':>10}{'-':>10}   skipped: {failed[0]}")
+            continue
+        seconds = [r["seconds"] for r in runs]
+        print(f"{module:<24}{statistics.median(seconds) * 1000:>10.1f}{min(seconds) * 1000:>10.1f}"
+              f"   {', '.join(runs[0]['loaded']) or '-'}")
+
+
+def bench_first_gesture(model, video):
+    result = run_snippet(FIRST_GESTURE_SNIPPET.format(model=model, video=video))
+    if isinstance(result, str):
+        print(f"Time-to-first-gesture skipped: {result}")
+        return
+    print("\nTime-to-first-gesture (fresh process)")
+    print(f"  import mediapipe      : {result['import'] * 1000:8.1f} ms")
+    print(f"  create recognizer     : {result['create'] * 1000:8.1f} ms")
+    print(f"  first inference (cold): {result['first'] * 1000:8.1f} ms   <- what warm-up moves to startup")
+    if result["warm"] is not None:
+        print(f"  next inferences (warm): {result['warm'] * 1000:8.1f} ms (median)")
+    print(f"  total to first result : {result['to_first_gesture'] * 1000:8.1f} ms ({result['first_output']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters per module")
+    parser.add_argument("--model", help="Path to gesture_recognizer.task (enables time-to-first-gesture)")
+    parser.add_argument("--video", help="Recorded clip for the first frames (default: random frames)")
+    parser.add_argument("--no-libraries", action="store_true", help="Only time project modules")
+    args = parser.parse_args()
+
+    modules = PROJECT_MODULES if args.no_libraries else LIBRARIES + PROJECT_MODULES
+    bench_imports(modules, args.repeats)
+    if args.model:
+        bench_first_gesture(os.path.abspath(args.model), args.video and os.path.abspath(args.video))
+    else:
+        print("\nTime-to-first-gesture skipped (pass --model).")
+
+
+if __name__ == "__main__":
+    main()
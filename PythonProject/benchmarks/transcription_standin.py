@@ -0,0 +1,89 @@
+"""
+Local stand-in for the OpenAI transcription and speech endpoints.
+
+Answers POST .../audio/transcriptions with {"text": "..."} after a delay
+that grows with the uploaded size, roughly like a real Whisper call, and
+POST .../audio/speech with a tone as raw 24 kHz PCM, streamed in chunks at
+a fixed synthesis rate like the real TTS endpoint. Use it to exercise
+streaming transcription / playback without network access or an API key:
+
+    python benchmarks/transcription_standin.py --port 8000
+    # then in TranslationController.py:
+    #   TRANSCRIPTION_BASE_URL = "http://127.0.0.1:8000/v1"
+"""
+import argparse
+import itertools
+import json
+import math
+import struct
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+SPEECH_RATE = 24000  # Samples per second of the "pcm" response format
+SPEECH_CHUNK = 4800  # Samples per streamed chunk (0.2 s)
+
+
+def make_handler(base_delay, per_mb_delay, speech_delay=0.3, speech_speed=4.0):
+    counter = itertools.count(1)  # next() is atomic across handler threads
+
+    class StandinHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            size = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(size)
+            if self.path.endswith("/audio/speech"):
+                self.stream_speech(json.loads(body).get("input", ""))
+                return
+            if not self.path.endswith("/audio/transcriptions"):
+                self.send_error(404)
+                return
+
+            request_id = next(counter)
+            time.sleep(base_delay + per_mb_delay * size / 1e6)
+            body = json.dumps({"text": f"segment {request_id} ({size} bytes)"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def stream_speech(self, text):
+            """~60 ms of 440 Hz tone per character, generated 'speech_speed' x faster than real time."""
+            samples = int(0.06 * SPEECH_RATE * max(1, len(text)))
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/pcm")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(speech_delay)
+            for start in range(0, samples, SPEECH_CHUNK):
+                n = min(SPEECH_CHUNK, samples - start)
+                pcm = struct.pack(f"<{n}h", *(int(8000 * math.sin(2 * math.pi * 440 * (start + i) / SPEECH_RATE))
+                                              for i in range(n)))
+                self.wfile.write(f"{len(pcm):x}\r\n".encode() + pcm + b"\r\n")
+                self.wfile.flush()
+                time.sleep(n / SPEECH_RATE / speech_speed)
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, format, *args):
+            print(f"[standin] {self.path} {format % args}")
+
+    return StandinHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--base-delay", type=float, default=0.4, help="Seconds per request")
+    parser.add_argument("--per-mb-delay", type=float, default=1.0, help="Extra seconds per MB uploaded")
+    parser.add_argument("--speech-delay", type=float, default=0.3, help="Seconds before the first speech chunk")
+    parser.add_argument("--speech-speed", type=float, default=4.0, help="Speech generated this much faster than real time")
+    args = parser.parse_args()
+
+    handler = make_handler(args.base_delay, args.per_mb_delay, args.speech_delay, args.speech_speed)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), handler)
+    print(f"Transcription stand-in on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Project modules are flat siblings of this folder (like the benchmarks)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,59 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from AudioBuffer import AudioRingBuffer, encode_wav
+
+
+def test_blocks_are_appended_and_stats_tracked():
+    buffer = AudioRingBuffer(1000, initial_seconds=1)
+    buffer.write(np.full((100, 1), 0.5, np.float32))
+    buffer.write(np.full(100, -0.25, np.float32))
+    assert buffer.length == 200
+    assert buffer.duration == pytest.approx(0.2)
+    assert buffer.peak == pytest.approx(0.5)
+    assert buffer.rms == pytest.approx(np.sqrt((0.25 + 0.0625) / 2))
+    assert np.array_equal(buffer.view()[98:102], [0.5, 0.5, -0.25, -0.25])
+
+
+def test_only_the_first_channel_is_kept():
+    buffer = AudioRingBuffer(1000, initial_seconds=1)
+    buffer.write(np.array([[0.1, 0.9], [0.2, 0.9]], np.float32))
+    assert np.allclose(buffer.view(), [0.1, 0.2])
+
+
+def test_buffer_grows_past_its_initial_capacity():
+    buffer = AudioRingBuffer(100, initial_seconds=1)
+    samples = np.linspace(-1, 1, 350, dtype=np.float32)
+    for start in range(0, 350, 50):
+        buffer.write(samples[start:start + 50])
+    assert np.array_equal(buffer.view(), samples)
+
+
+def test_silence_and_silent_tail():
+    buffer = AudioRingBuffer(1000, initial_seconds=1)
+    buffer.write(np.full(100, 0.001, np.float32))
+    assert buffer.is_silent()
+    buffer.write(np.full(100, 0.3, np.float32))
+    buffer.write(np.zeros(50, np.float32))
+    assert not buffer.is_silent()
+    assert buffer.silent_tail == 50
+
+
+def test_reset_reuses_the_memory():
+    buffer = AudioRingBuffer(1000, initial_seconds=1)
+    buffer.write(np.full(100, 0.3, np.float32))
+    data = buffer._data
+    buffer.reset()
+    assert buffer.length == 0 and buffer.peak == 0.0 and buffer.is_silent()
+    assert buffer._data is data
+
+
+def test_wav_encoding():
+    samples = np.array([0.0, 0.5, -0.5, 1.0], np.float32)
+    with wave.open(io.BytesIO(encode_wav(samples, 16000))) as wav:
+        assert (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (1, 2, 16000)
+        pcm = np.frombuffer(wav.readframes(4), "<i2")
+    assert list(pcm) == [0, 16383, -16383, 32767]
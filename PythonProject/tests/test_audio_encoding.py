@@ -0,0 +1,63 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import AudioEncoding
+from AudioBuffer import encode_wav
+from AudioEncoding import encode_audio
+
+SAMPLES = np.linspace(-0.5, 0.5, 1600, dtype=np.float32)
+
+
+def _soundfile(write):
+    module = types.ModuleType("soundfile")
+    module.write = write
+    return module
+
+
+def test_wav_is_encoded_directly():
+    assert encode_audio(SAMPLES, 16000, "wav") == (encode_wav(SAMPLES, 16000), "wav")
+
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        encode_audio(SAMPLES, 16000, "mp3")
+
+
+def test_missing_soundfile_falls_back_to_wav(monkeypatch):
+    monkeypatch.setitem(sys.modules, "soundfile", None)  # Makes the import fail
+    assert encode_audio(SAMPLES, 16000, "flac") == (encode_wav(SAMPLES, 16000), "wav")
+
+
+def test_opus_at_an_unsupported_rate_falls_back_to_wav(monkeypatch):
+    calls = []
+    monkeypatch.setitem(sys.modules, "soundfile", _soundfile(lambda *args, **kwargs: calls.append(kwargs)))
+    assert encode_audio(SAMPLES, 44100, "opus") == (encode_wav(SAMPLES, 44100), "wav")
+    assert calls == []
+
+
+def test_encoder_failure_falls_back_to_wav(monkeypatch):
+    def write(*args, **kwargs):
+        raise RuntimeError("libsndfile too old")
+
+    monkeypatch.setitem(sys.modules, "soundfile", _soundfile(write))
+    assert encode_audio(SAMPLES, 16000, "opus") == (encode_wav(SAMPLES, 16000), "wav")
+
+
+def test_supported_format_uses_soundfile(monkeypatch):
+    def write(out, samples, sample_rate, format, subtype):
+        out.write(f"{format}/{subtype}@{sample_rate}".encode())
+
+    monkeypatch.setitem(sys.modules, "soundfile", _soundfile(write))
+    assert encode_audio(SAMPLES, 16000, "flac") == (b"FLAC/PCM_16@16000", "flac")
+    assert encode_audio(SAMPLES, 16000, "opus") == (b"OGG/OPUS@16000", "opus")
+
+
+def test_fallback_warning_is_printed_once(monkeypatch, capsys):
+    monkeypatch.setattr(AudioEncoding, "_warned", set())
+    monkeypatch.setitem(sys.modules, "soundfile", None)
+    encode_audio(SAMPLES, 16000, "flac")
+    encode_audio(SAMPLES, 16000, "flac")
+    assert capsys.readouterr().out.count("not installed") == 1
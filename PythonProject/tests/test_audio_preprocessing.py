@@ -0,0 +1,59 @@
+import numpy as np
+
+from AudioPreprocessing import normalize_peak, prepare_upload, resample, trim_silence
+from Metrics import metrics
+
+RATE = 16000
+
+
+def _tone(seconds, peak, frequency=440.0, rate=RATE):
+    t = np.arange(int(seconds * rate)) / rate
+    return (peak * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def test_quiet_edges_are_trimmed_with_padding():
+    quiet = np.zeros(RATE, dtype=np.float32)
+    samples = np.concatenate([quiet, _tone(1.0, 0.5), quiet])
+    kept = trim_silence(samples, RATE, padding=0.1)
+    assert abs(len(kept) / RATE - 1.2) < 0.03
+    assert np.shares_memory(kept, samples)  # A view, not a copy
+
+
+def test_quiet_speaker_is_not_trimmed_away():
+    # Peak 0.008 passes AudioBuffer's 0.005 silence gate but its RMS is
+    # below TRIM_THRESHOLD; it must still reach the transcriber.
+    samples = np.concatenate([np.zeros(RATE // 2, dtype=np.float32), _tone(3.0, 0.008)])
+    kept = trim_silence(samples, RATE, padding=0.0)
+    assert abs(len(kept) / RATE - 3.0) < 0.03
+
+
+def test_digital_silence_is_left_untrimmed():
+    samples = np.zeros(RATE, dtype=np.float32)
+    assert len(trim_silence(samples, RATE)) == RATE
+
+
+def test_resample_length_and_anti_aliasing():
+    rate = 44100
+    low, high = _tone(1.0, 0.5, 1000.0, rate), _tone(1.0, 0.5, 12000.0, rate)
+    out_low, out_high = resample(low, rate, 16000), resample(high, rate, 16000)
+    assert len(out_low) == 16000
+    assert out_low.dtype == np.float32
+    assert np.abs(out_low[200:-200]).max() > 0.45  # Passband kept
+    assert np.abs(out_high[200:-200]).max() < 0.05  # Above the new Nyquist: filtered out
+    assert resample(low, 16000, 16000) is low
+
+
+def test_normalize_peak_caps_the_gain():
+    assert np.isclose(np.abs(normalize_peak(_tone(0.1, 0.3))).max(), 0.9, atol=1e-3)
+    assert np.isclose(np.abs(normalize_peak(_tone(0.1, 0.001))).max(), 0.01, atol=1e-4)
+    silent = np.zeros(10, dtype=np.float32)
+    assert normalize_peak(silent) is silent
+
+
+def test_seconds_removed_is_counted():
+    before = metrics.counters.get("upload.seconds_removed", 0)
+    samples = np.concatenate([np.zeros(RATE, dtype=np.float32), _tone(1.0, 0.5)])
+    _, report = prepare_upload(samples, RATE, encoding="wav")
+    assert report["seconds_removed"] > 0.5
+    assert metrics.counters["upload.seconds_removed"] - before == report["seconds_removed"]
+    assert "upload.seconds_removed" not in metrics.histograms
@@ -0,0 +1,169 @@
+import time
+from threading import Thread
+from types import SimpleNamespace
+
+from GesturePipeline import AdaptiveScheduler, BroadcastGate, GesturePipeline, LatestFrameSlot
+from HubProtocol import OFFSET, ONSET, Kind, parse_gesture_event
+
+
+def test_slot_keeps_only_the_newest_frame():
+    slot = LatestFrameSlot()
+    slot.put("frame-1", 1)
+    slot.put("frame-2", 2)
+    assert slot.depth() == 1
+    assert slot.take(timeout=0) == ("frame-2", 2)
+    assert slot.dropped == 1
+    assert slot.depth() == 0
+
+
+def test_take_times_out_on_an_empty_slot():
+    assert LatestFrameSlot().take(timeout=0.01) is None
+
+
+def test_take_wakes_up_when_a_frame_arrives():
+    slot = LatestFrameSlot()
+    taken = []
+    consumer = Thread(target=lambda: taken.append(slot.take(timeout=2.0)))
+    consumer.start()
+    slot.put("frame", 7)
+    consumer.join(2.0)
+    assert taken == [("frame", 7)]
+
+
+# ========================================================================
+#   ADAPTIVE SCHEDULING
+# ========================================================================
+def _result(points=()):
+    """Recognizer result with one hand made of the given normalized (x, y) points."""
+    landmarks = [[SimpleNamespace(x=x, y=y, z=0.0) for x, y in points]] if points else []
+    return SimpleNamespace(gestures=[], handedness=[], hand_landmarks=landmarks)
+
+
+def test_scheduler_goes_idle_and_probes_at_the_idle_rate():
+    scheduler = AdaptiveScheduler(idle_after=2.0, idle_fps=4)
+    scheduler.last_seen = 0.0
+    scheduler.update(_result(), None, 1.0)
+    assert scheduler.mode == "active"
+    scheduler.update(_result(), None, 2.5)
+    assert scheduler.mode == "idle"
+
+    runs = [scheduler.should_run(3.0 + i * 0.05) for i in range(10)]  # 0.5 s at 20 FPS
+    assert sum(runs) == 2  # One probe every 0.25 s
+
+
+def test_scheduler_crops_around_the_hand_and_wakes_up():
+    scheduler = AdaptiveScheduler(frame_size=(480, 480), padding=0.0, min_size=100)
+    scheduler.idle = True
+    scheduler.update(_result([(0.4, 0.4), (0.5, 0.5)]), None, 10.0)
+    assert scheduler.mode == "active"
+    x0, y0, x1, y1 = scheduler.roi()
+    assert (x1 - x0, y1 - y0) == (100, 100)  # 48 px hand grown to the minimum size
+    assert x0 <= 192 and x1 >= 240 and y0 <= 192 and y1 >= 240
+
+
+def test_scheduler_maps_crop_landmarks_back_to_the_frame():
+    scheduler = AdaptiveScheduler(frame_size=(480, 480), padding=0.0, min_size=10)
+    scheduler.update(_result([(0.0, 0.0), (1.0, 1.0)]), (100, 200, 200, 300), 1.0)
+    assert scheduler.roi() == (100, 200, 200, 300)
+
+
+def test_scheduler_uses_the_full_frame_for_big_hands_or_lost_tracking():
+    scheduler = AdaptiveScheduler(frame_size=(480, 480))
+    scheduler.update(_result([(0.05, 0.05), (0.95, 0.95)]), None, 1.0)
+    assert scheduler.roi() is None  # Crop would cover most of the frame
+    scheduler.update(_result([(0.4, 0.4), (0.5, 0.5)]), None, 1.1)
+    assert scheduler.roi() is not None
+    scheduler.update(_result(), scheduler.roi(), 1.2)
+    assert scheduler.roi() is None
+
+
+def test_results_clear_inferences_mediapipe_dropped():
+    pipeline = GesturePipeline(cap=None, server=None, adaptive=False)
+    for timestamp in (1, 2, 3, 4):
+        pipeline.pending[timestamp] = (None, 0.0)
+    pipeline.on_result(_result(), None, 3)
+    assert list(pipeline.pending) == [4]
+    assert pipeline.queue_depths()["inference_in_flight"] == 1
+    assert pipeline.inference_dropped == 2
+
+
+class _FakeServer:
+    def __init__(self):
+        self.overridden = False
+        self.sent = []  # (kind, text) in order
+
+    def is_overridden(self, session):
+        return self.overridden
+
+    def send_frames(self, frames, session):
+        self.sent += frames
+
+
+def _offer(gate, hands, frames, start):
+    for i in range(frames):
+        gate.offer(hands, start + i / 30)
+
+
+def test_gate_sends_events_before_the_changed_string():
+    server = _FakeServer()
+    gate = BroadcastGate(server, verbose=False)
+    _offer(gate, (("Right", "Victory", 0.9),), 5, 0.0)
+    assert server.sent[0] == (Kind.GESTURE, "NONE")  # Initial state, before anything is confirmed
+    assert [kind for kind, _ in server.sent[1:]] == [Kind.GESTURE_EVENT, Kind.GESTURE]
+    assert parse_gesture_event(server.sent[1][1])[:3] == (ONSET, "Right", "Victory")
+    assert server.sent[2][1] == "Right_Victory"
+    assert (gate.sent, gate.events_sent) == (2, 1)
+
+
+def test_override_holds_back_only_the_gesture_string():
+    server = _FakeServer()
+    gate = BroadcastGate(server, verbose=False)
+    _offer(gate, (), 1, 0.0)
+    server.sent.clear()
+
+    # A start gesture confirmed during a replay still reaches the controller
+    server.overridden = True
+    _offer(gate, (("Right", "Victory", 0.9),), 5, 1.0)
+    assert len(server.sent) == 1
+    kind, text = server.sent[0]
+    assert kind == Kind.GESTURE_EVENT
+    assert parse_gesture_event(text)[:3] == (ONSET, "Right", "Victory")
+
+    # The robot gets the live string once the replay is over, without a second onset
+    server.overridden = False
+    _offer(gate, (("Right", "Victory", 0.9),), 30, 2.0)
+    assert server.sent[1:] == [(Kind.GESTURE, "Right_Victory")]
+
+    _offer(gate, (), 6, 3.0)
+    assert [kind for kind, _ in server.sent[2:]] == [Kind.GESTURE_EVENT, Kind.GESTURE]
+    assert parse_gesture_event(server.sent[2][1])[:3] == (OFFSET, "Right", "Victory")
+    assert server.sent[3][1] == "NONE"
+
+
+
+class _Capture:
+    """cv2.VideoCapture stand-in: 'frames' good reads, then failures."""
+
+    def __init__(self, frames=0):
+        self.frames = frames
+        self.reads = 0
+
+    def read(self):
+        self.reads += 1
+        if self.reads <= self.frames:
+            return True, f"frame-{self.reads}"
+        return False, None
+
+
+def test_capture_backs_off_and_gives_up_on_a_dead_camera(monkeypatch):
+    import GesturePipeline as module
+    monkeypatch.setattr(module, "MAX_READ_FAILURES", 5)
+    monkeypatch.setattr(module, "READ_RETRY_DELAY", 0.01)
+    cap = _Capture(frames=2)
+    pipeline = GesturePipeline(cap=cap, server=None, adaptive=False)
+    pipeline.running.set()
+    started = time.perf_counter()
+    pipeline.capture_loop()  # Returns by itself
+    assert cap.reads == 2 + 5
+    assert time.perf_counter() - started >= 4 * 0.01
+    assert pipeline.frames.take(timeout=0)[0] == "frame-2"
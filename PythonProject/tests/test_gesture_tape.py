@@ -0,0 +1,56 @@
+from GestureTape import MAX_STRETCH, MIN_STRETCH, GestureTape, replay, schedule, stretch_factor
+
+
+def _tape(*entries):
+    tape = GestureTape(origin=0.0)
+    for now, gesture in entries:
+        tape.append(gesture, now)
+    return tape
+
+
+def test_repeats_are_collapsed():
+    tape = _tape((0.0, "NONE"), (0.1, "NONE"), (0.2, "Right_Victory"), (0.3, "Right_Victory"), (0.4, "NONE"))
+    assert len(tape) == 3
+    assert tape.observed == 5
+    assert tape.vocab == ["NONE", "Right_Victory"]
+
+
+def test_initial_stillness_is_trimmed():
+    tape = _tape((0.0, "NONE"), (1.0, "Right_Open_Palm"), (1.5, "Left_Victory"), (2.0, "Left_Victory"))
+    assert tape.first_move == 1
+    assert list(tape.events()) == [(0.0, "Right_Open_Palm"), (0.5, "Left_Victory")]
+    assert list(tape.events(trim=False))[0] == (0.0, "NONE")
+    assert tape.span() == 1.0
+    assert tape.span(trim=False) == 2.0
+
+
+def test_stretch_factor_is_clamped():
+    tape = _tape((0.0, "Right_Open_Palm"), (2.0, "Right_Victory"))
+    assert stretch_factor(tape, 3.0) == 1.5
+    assert stretch_factor(tape, 100.0) == MAX_STRETCH
+    assert stretch_factor(tape, 0.1) == MIN_STRETCH
+    assert stretch_factor(tape, None) == 1.0
+    assert stretch_factor(GestureTape(origin=0.0), 3.0) == 1.0
+
+
+def test_schedule_batches_per_tick_and_stretches():
+    tape = _tape((0.0, "A"), (0.01, "B"), (0.2, "C"))
+    assert schedule(tape, tick=0.05) == [(0.0, ["A", "B"]), (0.2, ["C"])]
+    assert schedule(tape, stretch=2.0, tick=0.05) == [(0.0, ["A", "B"]), (0.4, ["C"])]
+
+
+def test_replay_keeps_absolute_deadlines():
+    now = [0.0]
+    sent = []
+
+    def sleep(seconds):
+        now[0] += seconds + 0.03  # Every sleep overshoots
+
+    def send(gestures):
+        sent.append((round(now[0], 3), gestures))
+
+    tape = _tape((0.0, "A"), (0.1, "B"), (0.2, "C"))
+    worst = replay(tape, send, tick=0.05, clock=lambda: now[0], sleep=sleep)
+    assert [gestures for _, gestures in sent] == [["A"], ["B"], ["C"]]
+    assert [due for due, _ in sent] == [0.0, 0.13, 0.23]  # Overshoot does not accumulate
+    assert abs(worst - 0.03) < 1e-9
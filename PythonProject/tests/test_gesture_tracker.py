@@ -0,0 +1,107 @@
+import pytest
+
+from GestureTracker import (CONFIRM_FRAMES, RELEASE_FRAMES, GestureTracker, HandTracker,
+                            format_hands, hand_events)
+from HubProtocol import OFFSET, ONSET
+
+FRAME = 1 / 30
+
+
+def _feed(tracker, gesture, score, frames, start=0.0):
+    """Feeds the same observation for 'frames' frames. Returns the events per frame."""
+    return [tracker.update(gesture, score, start + i * FRAME) for i in range(frames)]
+
+
+def test_unsure_gesture_needs_confirm_frames():
+    tracker = HandTracker("Right")
+    events = _feed(tracker, "Victory", 0.6, CONFIRM_FRAMES)
+    assert events[:-1] == [[]] * (CONFIRM_FRAMES - 1)
+    assert events[-1] == [(ONSET, "Right", "Victory", 0.6, 0.0)]
+    assert tracker.gesture == "Victory"
+
+
+def test_confident_gesture_confirms_fast():
+    tracker = HandTracker("Right")
+    assert _feed(tracker, "Victory", 0.85, 2) == [[], [(ONSET, "Right", "Victory", 0.85, 0.0)]]
+
+
+def test_frames_below_hold_score_are_ignored():
+    tracker = HandTracker("Right")
+    _feed(tracker, "Victory", 0.9, 2)
+    assert _feed(tracker, "Open_Palm", 0.3, 10) == [[]] * 10
+    assert tracker.gesture == "Victory"
+
+    # Nor do they break a streak in progress
+    tracker.update("Open_Palm", 0.6, 1.0)
+    tracker.update("Open_Palm", 0.6, 1.1)
+    tracker.update("Closed_Fist", 0.2, 1.2)
+    tracker.update("Open_Palm", 0.6, 1.3)
+    assert tracker.update("Open_Palm", 0.6, 1.4)[-1][:3] == (ONSET, "Right", "Open_Palm")
+
+
+def test_hand_is_released_after_release_frames():
+    tracker = HandTracker("Right")
+    _feed(tracker, "Victory", 0.9, 2)  # Confirmed at FRAME
+    events = _feed(tracker, None, 0.0, RELEASE_FRAMES, start=1.0)
+    assert events[:-1] == [[]] * (RELEASE_FRAMES - 1)
+    (edge, side, gesture, score, held), = events[-1]
+    assert (edge, side, gesture, score) == (OFFSET, "Right", "Victory", 0.9)
+    assert held == pytest.approx(1.0 + (RELEASE_FRAMES - 1) * FRAME - FRAME)
+    assert tracker.gesture is None
+
+
+def test_short_dropout_keeps_the_gesture():
+    tracker = HandTracker("Right")
+    _feed(tracker, "Victory", 0.9, 2)
+    _feed(tracker, None, 0.0, RELEASE_FRAMES - 1, start=1.0)
+    tracker.update("Victory", 0.9, 1.5)  # Back before release: the streak starts over
+    assert _feed(tracker, None, 0.0, RELEASE_FRAMES - 1, start=2.0) == [[]] * (RELEASE_FRAMES - 1)
+    assert tracker.gesture == "Victory"
+
+
+def test_no_gesture_only_ends_the_previous_one():
+    tracker = HandTracker("Right")
+    _feed(tracker, "Victory", 0.9, 2)
+    events = _feed(tracker, "None", 0.9, 2, start=1.0)
+    assert [edge for edge, *_ in events[-1]] == [OFFSET]
+    assert tracker.gesture == "None"
+
+
+def test_change_on_both_sides_gives_offset_onset_pairs_right_first():
+    tracker = GestureTracker()
+    hands = (("Left", "Closed_Fist", 0.9), ("Right", "Victory", 0.9))
+    tracker.update(hands, 0.0)
+    tracker.update(hands, FRAME)
+    assert tracker.output() == "Right_Victory | Left_Closed_Fist"
+
+    hands = (("Right", "Open_Palm", 0.9), ("Left", "ILoveYou", 0.9))
+    tracker.update(hands, 1.0)
+    events = tracker.update(hands, 1.0 + FRAME)
+    assert [(edge, side, gesture) for edge, side, gesture, _, _ in events] == [
+        (OFFSET, "Right", "Victory"), (ONSET, "Right", "Open_Palm"),
+        (OFFSET, "Left", "Closed_Fist"), (ONSET, "Left", "ILoveYou"),
+    ]
+    assert tracker.output() == "Right_Open_Palm | Left_ILoveYou"
+
+
+def test_two_hands_on_one_side_keep_the_surer():
+    tracker = GestureTracker()
+    hands = (("Right", "Victory", 0.6), ("Right", "Open_Palm", 0.9))
+    tracker.update(hands, 0.0)
+    tracker.update(hands, FRAME)
+    assert tracker.confirmed() == (("Right", "Open_Palm", 0.9),)
+
+
+def test_hand_events_and_format():
+    class Category:
+        def __init__(self, name, score=1.0):
+            self.category_name, self.score = name, score
+
+    class Result:
+        gestures = [[Category("Victory", 0.91234)], [Category("None", 0.5)]]
+        handedness = [[Category("Right")]]
+
+    hands = hand_events(Result())
+    assert hands == (("Right", "Victory", 0.912), ("Unknown", "None", 0.5))
+    assert format_hands(hands) == "Right_Victory | Unknown_None"
+    assert format_hands(()) == "NONE"
@@ -0,0 +1,262 @@
+import asyncio
+import queue
+import threading
+
+import pytest
+
+from Hub import MAX_PENDING, ClientChannel, DeliveryReceipt, SimpleServer
+from HubProtocol import MODE_FRAMED, MODE_LEGACY, TOPICS, FrameDecoder, Kind, encode_gesture_event
+from RobotChannel import RobotChannel
+
+
+class _FakeWriter:
+    """Collects what a ClientChannel writes."""
+
+    def __init__(self):
+        self.writes = []
+        self.closed = False
+
+    def write(self, data):
+        self.writes.append(data)
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def _channel(mode=MODE_FRAMED):
+    writer = _FakeWriter()
+    return ClientChannel(writer, mode, "test", TOPICS), writer
+
+
+def _flush(channel):
+    """Runs the writer task until it has flushed what is queued, then closes the channel."""
+    async def flush():
+        task = asyncio.ensure_future(channel.run())
+        while channel.backlog:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        channel.close()
+        await task
+    asyncio.run(flush())
+
+
+def test_live_gestures_coalesce_to_the_latest():
+    channel, writer = _channel()
+    for gesture in ("Right_Open_Palm", "Right_Victory", "Right_ILoveYou"):
+        channel.offer(Kind.GESTURE, gesture, False, 0.0)
+    assert channel.backlog == 1
+    assert channel.coalesced == 2
+    _flush(channel)
+    assert FrameDecoder().feed(b"".join(writer.writes)) == [(Kind.GESTURE, "Right_ILoveYou")]
+
+
+def test_queued_gesture_goes_before_a_guaranteed_message():
+    channel, writer = _channel()
+    channel.offer(Kind.GESTURE, "Right_Victory", False, 0.0)
+    channel.offer(Kind.SAY, "Hello", True, 0.0)
+    channel.offer(Kind.GESTURE, "Right_Open_Palm", False, 0.0)
+    _flush(channel)
+    assert FrameDecoder().feed(b"".join(writer.writes)) == [
+        (Kind.GESTURE, "Right_Victory"), (Kind.SAY, "Hello"), (Kind.GESTURE, "Right_Open_Palm")]
+
+
+def test_legacy_client_gets_one_plain_string_per_write():
+    channel, writer = _channel(MODE_LEGACY)
+    channel.offer(Kind.LANG, "Spanish", True, 0.0)
+    channel.offer(Kind.SAY, "Hola", True, 0.0)
+    _flush(channel)
+    assert writer.writes == [b"LANG:Spanish", b"SAY:Hola"]
+
+
+def test_receipt_completes_once_every_copy_is_flushed():
+    done = []
+    receipt = DeliveryReceipt(2, lambda: done.append(True))
+    first, _ = _channel()
+    second, _ = _channel()
+    first.offer(Kind.SAY, "Hello", True, 0.0, receipt)
+    second.offer(Kind.SAY, "Hello", True, 0.0, receipt)
+    _flush(first)
+    assert not done
+    _flush(second)
+    assert done == [True]
+
+
+def test_slow_client_is_dropped_at_max_pending():
+    channel, writer = _channel()
+    done = []
+    receipt = DeliveryReceipt(MAX_PENDING + 1, lambda: done.append(True))
+    for i in range(MAX_PENDING + 1):
+        channel.offer(Kind.SAY, str(i), True, 0.0, receipt)
+    assert channel.closed and writer.closed
+    assert channel.backlog == 0
+    assert done == [True]  # Nobody is left waiting for the dropped messages
+
+
+def test_closing_completes_pending_receipts():
+    channel, writer = _channel()
+    done = []
+    channel.offer(Kind.SAY, "Hello", True, 0.0, DeliveryReceipt(1, lambda: done.append("say")))
+    channel.close()
+    assert done == ["say"]
+    channel.offer(Kind.LANG, "Spanish", True, 0.0, DeliveryReceipt(1, lambda: done.append("lang")))
+    assert done == ["say", "lang"]
+    assert writer.writes == []
+
+
+def _listen(channel):
+    """Collects a channel's frames on a background thread."""
+    received = queue.Queue()
+    reader = threading.Thread(target=lambda: [received.put(f) for f in channel.frames()], daemon=True)
+    reader.start()
+    return received, reader
+
+
+def _next_of(received, kind, timeout=2.0):
+    while True:
+        frame_kind, text = received.get(timeout=timeout)
+        if frame_kind == kind:
+            return text
+
+
+def test_robot_joining_is_announced_and_speech_is_acked():
+    server = SimpleServer("127.0.0.1", 0)
+    controller = robot = None
+    try:
+        controller = RobotChannel("127.0.0.1", server.port, role="controller").connect()
+        controller_frames, controller_reader = _listen(controller)
+        assert controller.wait_ack(controller.sent_seq)  # HELLO processed
+
+        robot = RobotChannel("127.0.0.1", server.port, role="robot").connect()
+        robot_frames, robot_reader = _listen(robot)
+        assert _next_of(controller_frames, Kind.SPEAKER_JOINED)
+
+        seq = controller.send(Kind.SAY, "Hola")
+        assert controller.wait_ack(seq)
+        assert _next_of(robot_frames, Kind.SAY) == "Hola"
+    finally:
+        server.close()  # Disconnects both, so their receive loops end cleanly
+        for channel in (controller, robot):
+            if channel:
+                channel.close()
+
+    controller_reader.join(2.0)
+    robot_reader.join(2.0)
+    assert controller.closed and robot.closed
+
+
+@pytest.fixture
+def hub():
+    """A running Hub plus connect(role, session, topics) -> (channel, received frames)."""
+    server = SimpleServer("127.0.0.1", 0)
+    connected = []
+
+    def connect(role, session="default", topics=None):
+        channel = RobotChannel("127.0.0.1", server.port, role=role, session=session, topics=topics).connect()
+        received, reader = _listen(channel)  # Also consumes the ACKs
+        connected.append((channel, reader))
+        assert channel.wait_ack(channel.sent_seq)  # HELLO processed: registered before any traffic
+        return channel, received
+
+    yield server, connect
+    server.close()
+    for channel, reader in connected:
+        channel.close()
+        reader.join(2.0)
+
+
+def _send(channel, kind, text):
+    assert channel.wait_ack(channel.send(kind, text))
+
+
+def _first(received, kinds, timeout=2.0):
+    """First frame of one of 'kinds' (presence announcements are skipped)."""
+    while True:
+        frame = received.get(timeout=timeout)
+        if frame[0] in kinds:
+            return frame
+
+
+def test_sessions_are_isolated(hub):
+    server, connect = hub
+    robot_a, robot_a_frames = connect("robot", "A")
+    robot_b, robot_b_frames = connect("robot", "B")
+    controller_a, _ = connect("controller", "A")
+    controller_b, _ = connect("controller", "B")
+
+    _send(controller_a, Kind.SAY, "for A")  # Flushed before B says anything
+    _send(controller_b, Kind.SAY, "for B")
+    assert _first(robot_b_frames, (Kind.SAY,)) == (Kind.SAY, "for B")
+    assert _first(robot_a_frames, (Kind.SAY,)) == (Kind.SAY, "for A")
+
+
+def test_topics_decide_who_receives_what(hub):
+    server, connect = hub
+    robot, robot_frames = connect("robot")
+    controller, controller_frames = connect("controller")
+    camera, _ = connect("camera")
+
+    event = encode_gesture_event("onset", "Right", "Victory", 0.9)
+    _send(camera, Kind.GESTURE_EVENT, event)  # Controller only
+    _send(camera, Kind.GESTURE, "Right_Victory")  # Both
+    _send(controller, Kind.SAY, "Hello")  # Robot only
+
+    assert _first(controller_frames, (Kind.GESTURE_EVENT, Kind.GESTURE, Kind.SAY)) == (Kind.GESTURE_EVENT, event)
+    assert _first(controller_frames, (Kind.GESTURE_EVENT, Kind.GESTURE, Kind.SAY)) == (Kind.GESTURE, "Right_Victory")
+    assert _first(robot_frames, (Kind.GESTURE_EVENT, Kind.GESTURE, Kind.SAY)) == (Kind.GESTURE, "Right_Victory")
+    assert _first(robot_frames, (Kind.GESTURE_EVENT, Kind.GESTURE, Kind.SAY)) == (Kind.SAY, "Hello")
+    with pytest.raises(queue.Empty):
+        _first(controller_frames, (Kind.SAY,), timeout=0.2)
+
+
+def test_force_overrides_only_its_own_session(hub):
+    server, connect = hub
+    robot_a, robot_a_frames = connect("robot", "A")
+    robot_b, robot_b_frames = connect("robot", "B")
+    controller_a, _ = connect("controller", "A")
+    camera_a, _ = connect("camera", "A")
+    camera_b, _ = connect("camera", "B")
+
+    _send(controller_a, Kind.FORCE, "Right_ILoveYou")
+    assert server.is_overridden("A") and not server.is_overridden("B")
+    _send(camera_a, Kind.GESTURE, "live A")  # Dropped: the replay owns robot A
+    _send(camera_b, Kind.GESTURE, "live B")
+    _send(controller_a, Kind.SAY, "marker")
+
+    kinds = (Kind.GESTURE, Kind.SAY)
+    assert _first(robot_a_frames, kinds) == (Kind.GESTURE, "Right_ILoveYou")
+    assert _first(robot_a_frames, kinds) == (Kind.SAY, "marker")
+    assert _first(robot_b_frames, kinds) == (Kind.GESTURE, "live B")
+
+
+def test_sender_does_not_get_its_own_commands_back(hub):
+    server, connect = hub
+    robot, robot_frames = connect("robot")
+    controller, controller_frames = connect("controller", topics=TOPICS)  # Subscribed to everything
+
+    _send(controller, Kind.SAY, "Hello")
+    _send(controller, Kind.FORCE, "Right_Victory")
+    controller.send(Kind.STATS, "")  # Answered to the asker only, after the two above
+
+    assert _first(robot_frames, (Kind.SAY,)) == (Kind.SAY, "Hello")
+    assert _first(robot_frames, (Kind.GESTURE,)) == (Kind.GESTURE, "Right_Victory")
+    assert _first(controller_frames, (Kind.SAY, Kind.GESTURE, Kind.STATS))[0] == Kind.STATS
+
+
+def test_override_holds_back_live_gestures_but_not_events(hub):
+    server, connect = hub
+    robot, robot_frames = connect("robot")
+    controller, controller_frames = connect("controller")
+    camera, _ = connect("camera")
+
+    _send(controller, Kind.FORCE, "Right_ILoveYou")
+    event = encode_gesture_event("onset", "Right", "Victory", 0.9)
+    _send(camera, Kind.GESTURE, "Right_Victory")  # Robot is replaying: dropped
+    _send(camera, Kind.GESTURE_EVENT, event)  # Controller trigger: delivered
+    _send(controller, Kind.SAY, "marker")
+
+    assert _first(controller_frames, (Kind.GESTURE, Kind.GESTURE_EVENT)) == (Kind.GESTURE_EVENT, event)
+    assert _first(robot_frames, (Kind.GESTURE, Kind.SAY)) == (Kind.GESTURE, "Right_ILoveYou")
+    assert _first(robot_frames, (Kind.GESTURE, Kind.SAY)) == (Kind.SAY, "marker")
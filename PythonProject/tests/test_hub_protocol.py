@@ -0,0 +1,59 @@
+import pytest
+
+from HubProtocol import (
+    Kind, FrameDecoder, ProtocolError, MAGIC, HEADER, MODE_FRAMED, MODE_LEGACY,
+    detect_mode, encode_batch, encode_frame, parse_legacy, to_legacy,
+)
+
+
+def test_frame_round_trip():
+    data = encode_frame(Kind.SAY, "Hola, ¿qué tal?")
+    assert FrameDecoder().feed(data) == [(Kind.SAY, "Hola, ¿qué tal?")]
+
+
+def test_batch_decodes_in_order():
+    frames = [(Kind.GESTURE, "Right_Open_Palm"), (Kind.LANG, "Spanish"), (Kind.SAY, "")]
+    assert FrameDecoder().feed(encode_batch(frames)) == frames
+
+
+def test_frames_split_across_reads():
+    data = encode_batch([(Kind.SAY, "Hello"), (Kind.FORCE, "Right_Victory")])
+    decoder = FrameDecoder()
+    received = []
+    for i in range(len(data)):
+        received += decoder.feed(data[i:i + 1])  # One byte per read
+    assert received == [(Kind.SAY, "Hello"), (Kind.FORCE, "Right_Victory")]
+
+
+def test_partial_frame_waits_for_the_rest():
+    data = encode_frame(Kind.SAY, "Hello world")
+    decoder = FrameDecoder()
+    assert decoder.feed(data[:HEADER.size + 3]) == []
+    assert decoder.feed(data[HEADER.size + 3:]) == [(Kind.SAY, "Hello world")]
+
+
+def test_oversized_frame_is_rejected():
+    decoder = FrameDecoder(max_payload=8)
+    with pytest.raises(ProtocolError):
+        decoder.feed(HEADER.pack(Kind.SAY, 9) + b"x" * 9)
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ProtocolError):
+        FrameDecoder().feed(HEADER.pack(200, 0))
+
+
+def test_detect_mode():
+    assert detect_mode(MAGIC + b"rest") == MODE_FRAMED
+    assert detect_mode(MAGIC[:2]) is None  # Could still be the handshake
+    assert detect_mode(b"Right_Open_Palm") == MODE_LEGACY
+
+
+def test_legacy_round_trip():
+    for kind, text in [(Kind.SAY, "Hello there"), (Kind.LANG, "French"), (Kind.FORCE, "Right_Victory")]:
+        assert parse_legacy(to_legacy(kind, text)) == (kind, text)
+
+
+def test_plain_gesture_is_not_a_legacy_command():
+    assert to_legacy(Kind.GESTURE, "Right_Open_Palm") == "Right_Open_Palm"
+    assert parse_legacy("Right_Open_Palm | Left_None") is None
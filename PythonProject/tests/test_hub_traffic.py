@@ -0,0 +1,33 @@
+import pytest
+
+from HubProtocol import Kind
+from HubTraffic import CLOSE, IN, OPEN, OUT, TrafficRecorder, read_log
+
+
+def test_log_reads_back_in_order(tmp_path):
+    path = str(tmp_path / "traffic.bin")
+    recorder = TrafficRecorder(path)
+    recorder.record(OPEN, 0, 70000, "('127.0.0.1', 5000) framed")  # Past 16-bit client ids
+    recorder.record(IN, Kind.SAY, 70000, "¿Qué tal?")
+    recorder.record(OUT, Kind.GESTURE, 1, "Right_Victory")
+    recorder.record(CLOSE, 0, 70000)
+    recorder.close()
+    recorder.record(IN, Kind.SAY, 1, "after close")  # Ignored
+
+    events = list(read_log(path))
+    assert [(direction, kind, client, text) for _, direction, kind, client, text in events] == [
+        (OPEN, 0, 70000, "('127.0.0.1', 5000) framed"),
+        (IN, Kind.SAY, 70000, "¿Qué tal?"),
+        (OUT, Kind.GESTURE, 1, "Right_Victory"),
+        (CLOSE, 0, 70000, ""),
+    ]
+    times = [t for t, *_ in events]
+    assert times == sorted(times)
+    assert recorder.events == 4
+
+
+def test_other_files_are_refused(tmp_path):
+    path = tmp_path / "not_a_log.bin"
+    path.write_bytes(b"HRILOG\x01" + b"\x00" * 20)  # Old 16-bit client format
+    with pytest.raises(ValueError):
+        list(read_log(str(path)))
@@ -0,0 +1,138 @@
+import json
+
+import numpy as np
+import pytest
+
+from GestureTracker import NO_GESTURE
+from LandmarkClassifier import LandmarkClassifier, LandmarkTape, landmark_features
+
+FEATURES = landmark_features(np.zeros((1, 21, 3))).shape[1]
+
+
+def _clusters(rng, per_class=40, spread=0.05):
+    """Feature rows around three well separated centres."""
+    centres = {"Victory": 0.2, "Open_Palm": 0.5, "Closed_Fist": 0.8}
+    rows, labels = [], []
+    for name, centre in centres.items():
+        rows.append(rng.normal(centre, spread, (per_class, FEATURES)))
+        labels += [name] * per_class
+    return np.vstack(rows).astype(np.float32), np.array(labels)
+
+
+def test_train_and_classify():
+    rng = np.random.default_rng(0)
+    features, labels = _clusters(rng)
+    classifier = LandmarkClassifier.train(features, labels)
+    assert classifier.labels == ["Closed_Fist", "Open_Palm", "Victory"]
+
+    test_features, test_labels = _clusters(rng, per_class=10)
+    results = classifier.classify(test_features)
+    assert [name for name, _ in results] == test_labels.tolist()
+    assert all(0.5 <= score <= 1.0 for _, score in results[:5])
+
+    far = np.full((1, FEATURES), 5.0, np.float32)
+    assert classifier.classify(far)[0][0] == NO_GESTURE
+    assert classifier.classify(np.zeros((0, FEATURES))) == []
+
+
+def test_rare_gestures_are_skipped():
+    rng = np.random.default_rng(1)
+    features, labels = _clusters(rng)
+    labels[:35] = "Rare"  # Leaves 5 "Victory" rows
+    classifier = LandmarkClassifier.train(features, labels, min_samples=10)
+    assert "Victory" not in classifier.labels
+    with pytest.raises(ValueError):
+        LandmarkClassifier.train(features[:5], labels[:5], min_samples=10)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    rng = np.random.default_rng(2)
+    features, labels = _clusters(rng)
+    classifier = LandmarkClassifier.train(features, labels)
+    path = tmp_path / "templates.json"
+    classifier.save(path)
+    loaded = LandmarkClassifier.load(path)
+    assert loaded.labels == classifier.labels
+    assert loaded.classify(features[::7]) == pytest.approx(classifier.classify(features[::7]))
+
+    data = json.loads(path.read_text())
+    data["feature_version"] = -1
+    path.write_text(json.dumps(data))
+    with pytest.raises(ValueError):
+        LandmarkClassifier.load(path)
+
+
+def test_features_ignore_position_and_scale_and_mirror_left_hands():
+    rng = np.random.default_rng(3)
+    hand = rng.normal(0, 50, (1, 21, 3)).astype(np.float32)
+    moved = hand * 2.5 + np.array([300.0, 120.0, 0.0], np.float32)
+    assert landmark_features(moved) == pytest.approx(landmark_features(hand), abs=1e-4)
+
+    mirrored = hand.copy()
+    mirrored[..., 0] *= -1
+    assert landmark_features(mirrored, ["Left"]) == pytest.approx(landmark_features(hand, ["Right"]), abs=1e-5)
+
+
+def _hand(value):
+    return np.full((21, 3), value, np.float32)
+
+
+def test_tape_save_and_load_round_trip(tmp_path):
+    tape = LandmarkTape(origin=0.0)
+    tape.append(0.0, "Right", "Victory", _hand(1.0))
+    tape.append(0.5, "Left", "Open_Palm", _hand(2.0))
+    tape.append(1.0, "Sideways", "Victory", _hand(3.0))  # Unknown sides are kept as "Unknown"
+    path = str(tmp_path / "session.npz")
+    tape.save(path)
+
+    times, sides, labels, points = LandmarkTape.load(path).arrays()
+    assert times.tolist() == [0.0, 0.5, 1.0]
+    assert sides.tolist() == ["Right", "Left", "Unknown"]
+    assert labels.tolist() == ["Victory", "Open_Palm", "Victory"]
+    assert points.shape == (3, 21, 3)
+    assert points[1, 0, 0] == 2.0
+
+
+def test_arrays_are_copies():
+    tape = LandmarkTape(origin=0.0)
+    tape.append(0.0, "Right", "Victory", _hand(1.0))
+    _, _, _, points = tape.arrays()
+    tape.append(0.1, "Right", "Victory", _hand(2.0))  # Recording goes on
+    assert len(points) == 1 and len(tape) == 2
+
+
+def test_training_set_drops_rows_around_label_changes():
+    tape = LandmarkTape(origin=0.0)
+    for i in range(10):
+        tape.append(i * 0.1, "Right", "Victory" if i < 5 else "Open_Palm", _hand(1.0 + i))
+        tape.append(i * 0.1, "Left", "Closed_Fist", _hand(1.0 + i))
+    features, labels = tape.training_set(trim=0.15)
+    # Rows at 0.4, 0.5 and 0.6 s on the right hand are dropped; the left hand never changes
+    assert labels.tolist().count("Victory") == 4
+    assert labels.tolist().count("Open_Palm") == 3
+    assert labels.tolist().count("Closed_Fist") == 10
+    assert len(features) == len(labels)
+
+
+def test_append_result_labels_hands():
+    def landmarks(x):
+        return [type("Landmark", (), {"x": x, "y": 0.5, "z": 0.0})() for _ in range(21)]
+
+    def category(name):
+        return [type("Category", (), {"category_name": name, "score": 0.9})()]
+
+    result = type("Result", (), {
+        "hand_landmarks": [landmarks(0.25), landmarks(0.75)],
+        "handedness": [category("Right"), category("Left")],
+        "gestures": [category("Victory")],  # Second hand has no gesture
+    })()
+
+    tape = LandmarkTape(origin=0.0)
+    tape.append_result(result, 640, 480, now=1.0)
+    times, sides, labels, points = tape.arrays()
+    assert (times.tolist(), sides.tolist(), labels.tolist()) == ([1.0], ["Right"], ["Victory"])
+    assert points[0, 0].tolist() == [160.0, 240.0, 0.0]
+
+    fixed = LandmarkTape(label="Call_Me", origin=0.0)
+    fixed.append_result(result, 640, 480, now=1.0)
+    assert fixed.arrays()[2].tolist() == ["Call_Me", "Call_Me"]
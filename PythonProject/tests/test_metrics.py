@@ -0,0 +1,49 @@
+import pytest
+
+from Metrics import Histogram, MetricsRegistry
+
+
+def test_empty_histogram():
+    histogram = Histogram()
+    assert histogram.percentile(50) == 0.0
+    assert histogram.snapshot() == {"count": 0}
+
+
+def test_percentiles_fall_in_the_right_bucket():
+    histogram = Histogram()
+    for ms in range(1, 101):  # 1 .. 100 ms
+        histogram.record(ms / 1000)
+    assert histogram.count == 100
+    assert histogram.percentile(50) == pytest.approx(0.050, rel=0.2)
+    assert histogram.percentile(95) == pytest.approx(0.095, rel=0.2)
+    assert histogram.snapshot()["mean_ms"] == pytest.approx(50.5)
+
+
+def test_percentile_never_exceeds_the_max():
+    histogram = Histogram()
+    for _ in range(100):
+        histogram.record(0.0503)
+    assert histogram.percentile(95) == 0.0503
+    assert histogram.percentile(99) <= histogram.max
+
+
+def test_values_beyond_the_last_bucket():
+    histogram = Histogram()
+    histogram.record(1000.0)
+    assert histogram.percentile(50) == 1000.0
+
+
+def test_registry_snapshot():
+    registry = MetricsRegistry()
+    with registry.timer("work"):
+        pass
+    registry.increment("bytes", 10)
+    registry.increment("bytes", 5)
+    registry.register_gauge("depth", lambda: 3)
+    registry.register_gauge("broken", lambda: 1 / 0)
+
+    snapshot = registry.snapshot()
+    assert snapshot["histograms"]["work"]["count"] == 1
+    assert snapshot["counters"] == {"bytes": 15}
+    assert snapshot["gauges"]["depth"] == 3
+    assert snapshot["gauges"]["broken"].startswith("error:")
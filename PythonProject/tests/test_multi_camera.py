@@ -0,0 +1,37 @@
+import pytest
+
+from MultiCamera import GestureFusion
+
+
+def test_confidence_picks_the_surest_camera_per_side():
+    fusion = GestureFusion("confidence")
+    fusion.update(0, 10.0, (("Right", "Open_Palm", 0.7),), now=10.0)
+    fused = fusion.update(1, 10.0, (("Right", "Victory", 0.9), ("Left", "Closed_Fist", 0.6)), now=10.0)
+    assert fused == (("Right", "Victory", 0.9), ("Left", "Closed_Fist", 0.6))
+
+
+def test_vote_prefers_agreement_then_total_score():
+    fusion = GestureFusion("vote")
+    fusion.update(0, 10.0, (("Right", "Open_Palm", 0.6),), now=10.0)
+    fusion.update(1, 10.0, (("Right", "Open_Palm", 0.7),), now=10.0)
+    fused = fusion.update(2, 10.0, (("Right", "Victory", 0.95),), now=10.0)
+    side, gesture, score = fused[0]
+    assert (side, gesture) == ("Right", "Open_Palm")
+    assert score == pytest.approx(0.65)
+
+    fusion = GestureFusion("vote")
+    fusion.update(0, 10.0, (("Right", "Open_Palm", 0.6),), now=10.0)
+    assert fusion.update(1, 10.0, (("Right", "Victory", 0.9),), now=10.0)[0][1] == "Victory"
+
+
+def test_stale_cameras_no_longer_vote():
+    fusion = GestureFusion("confidence", stale_after=1.0)
+    fusion.update(0, 10.0, (("Right", "Victory", 0.9),), now=10.0)
+    fusion.update(1, 10.8, (("Right", "Open_Palm", 0.6),), now=10.8)
+    assert fusion.fuse(now=11.5) == (("Right", "Open_Palm", 0.6),)
+    assert fusion.fuse(now=12.0) == ()
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        GestureFusion("average")
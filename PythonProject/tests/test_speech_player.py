@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from SpeechPlayer import BYTES_PER_SAMPLE, PREBUFFER, TTS_SAMPLE_RATE, SpeechPlayer
+
+PREBUFFER_BYTES = int(PREBUFFER * TTS_SAMPLE_RATE) * BYTES_PER_SAMPLE
+
+
+class _Stream:
+    latency = 0.0
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+
+def _player(client=None, cache=None):
+    player = SpeechPlayer(lambda: client, cache=cache)
+    player.stream = _Stream()  # open() keeps it; no sound card needed
+    return player
+
+
+def _pcm(n_bytes):
+    return bytes(i % 251 for i in range(n_bytes))
+
+
+def test_odd_bytes_are_carried_to_the_next_write():
+    pcm = _pcm(3 * PREBUFFER_BYTES + 1)
+    chunks = [pcm[i:i + 1001] for i in range(0, len(pcm), 1001)]  # Odd sizes split samples
+    player = _player()
+    audio = player.play(chunks, started=0.0)
+
+    writes = player.stream.writes
+    assert bytes(audio) == pcm
+    assert all(len(write) % BYTES_PER_SAMPLE == 0 for write in writes)
+    assert b"".join(writes) == pcm[:-1]  # The final lone byte is not half a sample on the speaker
+
+
+def test_playback_waits_for_the_prebuffer():
+    pcm = _pcm(2 * PREBUFFER_BYTES)
+    chunks = [pcm[i:i + 1000] for i in range(0, len(pcm), 1000)]
+    player = _player()
+    player.play(chunks, started=0.0)
+    assert len(player.stream.writes[0]) >= PREBUFFER_BYTES
+    assert b"".join(player.stream.writes) == pcm
+
+
+def test_short_sentence_is_played_at_the_end():
+    player = _player()
+    player.play([b"\x01\x02", b"\x03"], started=0.0)
+    assert player.stream.writes == [b"\x01\x02"]
+
+
+class _Cache:
+    def __init__(self, audio=None):
+        self.audio = audio
+        self.stored = []
+
+    def get_audio(self, text, voice, model):
+        return self.audio
+
+    def put_audio(self, text, voice, model, audio):
+        self.stored.append((text, model, audio))
+
+
+def test_cache_hit_plays_without_a_request():
+    cached = _pcm(PREBUFFER_BYTES + 10)
+    player = _player(client=None, cache=_Cache(cached))  # Any request would fail on None
+    player.speak("Hola")
+    assert b"".join(player.stream.writes) == cached
+
+
+def test_streamed_audio_is_cached():
+    pcm = _pcm(PREBUFFER_BYTES + 11)
+    requests = []
+
+    @contextmanager
+    def create(**kwargs):
+        requests.append(kwargs)
+        yield SimpleNamespace(iter_bytes=lambda size: (pcm[i:i + size] for i in range(0, len(pcm), size)))
+
+    speech = SimpleNamespace(with_streaming_response=SimpleNamespace(create=create))
+    client = SimpleNamespace(audio=SimpleNamespace(speech=speech))
+    cache = _Cache()
+    player = _player(client, cache)
+    player.speak("Hola")
+
+    assert requests[0]["response_format"] == "pcm"
+    assert cache.stored == [("Hola", player.cache_model, pcm)]
+    assert b"".join(player.stream.writes) == pcm[:-1]
@@ -0,0 +1,85 @@
+import numpy as np
+
+from AudioBuffer import AudioRingBuffer
+from StreamingTranscriber import PauseSegmenter, StreamingTranscriber
+
+RATE = 1000  # 30-sample VAD frames keep the arithmetic readable
+
+
+def _audio(*parts):
+    """('voice' | 'quiet', seconds) parts -> float32 samples."""
+    chunks = [np.full(int(seconds * RATE), 0.2 if kind == "voice" else 0.0, np.float32)
+              for kind, seconds in parts]
+    return np.concatenate(chunks)
+
+
+def test_cuts_at_a_pause_and_trims_leading_quiet():
+    samples = _audio(("quiet", 1), ("voice", 2), ("quiet", 1), ("voice", 2))
+    segmenter = PauseSegmenter(RATE)
+    [(start, cut)] = segmenter.poll(samples)
+    assert 1000 - 200 - 30 <= start <= 1000  # PRE_ROLL kept before the first word
+    assert 3000 < cut < 4000  # Inside the pause
+    start, end = segmenter.flush(len(samples))
+    assert cut <= start <= 4000 - 200 and end == len(samples)  # Next segment's lead-in trimmed too
+
+
+def test_short_phrases_are_not_cut():
+    samples = _audio(("voice", 0.5), ("quiet", 1), ("voice", 0.5))
+    segmenter = PauseSegmenter(RATE)
+    assert segmenter.poll(samples) == []
+    assert segmenter.flush(len(samples)) == (0, len(samples))
+
+
+def test_long_speech_is_cut_at_max_segment():
+    segmenter = PauseSegmenter(RATE, max_segment=5.0)
+    [(start, end)] = segmenter.poll(_audio(("voice", 8)))
+    assert start == 0 and 5000 <= end < 5030
+
+
+def test_polling_in_pieces_gives_the_same_segments():
+    samples = _audio(("quiet", 0.5), ("voice", 2), ("quiet", 1), ("voice", 2), ("quiet", 1), ("voice", 1))
+    at_once = PauseSegmenter(RATE).poll(samples)
+    segmenter = PauseSegmenter(RATE)
+    pieces = []
+    for end in range(100, len(samples) + 100, 100):  # Recording grows 0.1 s at a time
+        pieces += segmenter.poll(samples[:end])
+    assert pieces == at_once and len(pieces) == 2
+
+
+def test_flush_without_voice():
+    samples = _audio(("quiet", 2))
+    segmenter = PauseSegmenter(RATE)
+    assert segmenter.poll(samples) == []
+    assert segmenter.flush(len(samples)) is None
+
+
+class _Backend:
+    def __init__(self):
+        self.uploads = []
+
+    def transcribe(self, audio_data, filename):
+        self.uploads.append(audio_data)
+        return f"segment {len(self.uploads)}"
+
+
+def _recording(samples, rate=16000):
+    buffer = AudioRingBuffer(rate)
+    buffer.write(samples[:, None])
+    return buffer
+
+
+def test_quiet_speaker_is_still_transcribed():
+    # Peak 0.008 passes the 0.005 silence gate; no VAD frame reaches VAD_THRESHOLD
+    t = np.arange(3 * 16000) / 16000
+    buffer = _recording((0.008 * np.sin(2 * np.pi * 220 * t)).astype(np.float32))
+    assert not buffer.is_silent()
+    backend = _Backend()
+    assert StreamingTranscriber(buffer, backend).finish() == "segment 1"
+    assert len(backend.uploads[0]) > 2 * 16000 * 2  # Most of the 3 s went up
+
+
+def test_voiced_recording_is_sent_in_segments():
+    backend = _Backend()
+    samples = np.concatenate([np.full(32000, 0.2, np.float32), np.zeros(16000, np.float32),
+                              np.full(32000, 0.2, np.float32)])
+    assert StreamingTranscriber(_recording(samples), backend).finish() == "segment 1 segment 2"
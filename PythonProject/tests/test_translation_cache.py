@@ -0,0 +1,53 @@
+from TranslationCache import TranslationCache, normalize
+
+
+def test_normalize_ignores_case_spacing_and_final_period():
+    assert normalize("  Hello,   World. ") == "hello, world"
+    assert normalize("hello, world") == normalize("HELLO, WORLD.")
+
+
+def test_questions_keep_their_own_entry():
+    assert normalize("you are coming?") != normalize("you are coming.")
+    assert normalize("¿vienes?") == "¿vienes?"
+    assert normalize("来る？") == "来る？"
+
+
+def test_text_round_trip_and_persistence(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = TranslationCache(path)
+    assert cache.get_text("Hello.", "English", "Spanish", "native") is None
+    cache.put_text("Hello.", "English", "Spanish", "native", "Hola.")
+    assert cache.get_text("  hello ", "English", "Spanish", "native") == "Hola."
+    assert cache.get_text("Hello", "English", "French", "native") is None
+    assert cache.get_text("Hello?", "English", "Spanish", "native") is None
+    cache.close()
+
+    reopened = TranslationCache(path)
+    assert reopened.get_text("Hello", "English", "Spanish", "native") == "Hola."
+    stats = reopened.stats()
+    assert (stats["text_hits"], stats["text_misses"], stats["text_entries"]) == (1, 0, 1)
+    reopened.close()
+
+
+def test_least_recently_used_text_is_evicted(tmp_path):
+    cache = TranslationCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put_text("one", "en", "es", "native", "uno")
+    cache.put_text("two", "en", "es", "native", "dos")
+    cache.get_text("one", "en", "es", "native")  # "two" is now the oldest
+    cache.put_text("three", "en", "es", "native", "tres")
+    assert cache.get_text("two", "en", "es", "native") is None
+    assert cache.get_text("one", "en", "es", "native") == "uno"
+    assert cache.get_text("three", "en", "es", "native") == "tres"
+    cache.close()
+
+
+def test_audio_budget_evicts_oldest_blobs(tmp_path):
+    cache = TranslationCache(str(tmp_path / "cache.sqlite3"), max_audio_bytes=10)
+    cache.put_audio("a", "alloy", "tts-1", b"x" * 6)
+    cache.put_audio("b", "alloy", "tts-1", b"y" * 6)
+    assert cache.get_audio("a", "alloy", "tts-1") is None
+    assert cache.get_audio("b", "alloy", "tts-1") == b"y" * 6
+    cache.put_audio("too big", "alloy", "tts-1", b"z" * 11)
+    assert cache.get_audio("too big", "alloy", "tts-1") is None
+    assert cache.stats()["audio_bytes"] == 6
+    cache.close()
@@ -0,0 +1,105 @@
+import threading
+import time
+
+from TranslationJobs import DONE, FAILED, ConversationLanguage, JobQueue, TranslationJob
+
+
+def _job(role="English"):
+    return TranslationJob(role, audio_buffer=None, gesture_tape=None)
+
+
+def test_jobs_speak_in_submission_order():
+    delays = [0.15, 0.0, 0.05, 0.0]
+    jobs = [_job() for _ in delays]
+    delay_of = {job.id: delay for job, delay in zip(jobs, delays)}
+    spoken = []
+
+    def process(job):
+        time.sleep(delay_of[job.id])
+        return job.id
+
+    queue = JobQueue(process, lambda job, result: spoken.append(result), workers=4)
+    for job in jobs:
+        queue.submit(job)
+    queue.shutdown()
+    assert spoken == [job.id for job in jobs]
+    assert all(job.state == DONE for job in jobs)
+    assert queue.stats() == {}
+
+
+def test_failed_and_empty_jobs_do_not_block_later_ones():
+    first, second, third = _job(), _job(), _job()
+
+    def process(job):
+        if job is first:
+            raise RuntimeError("transcription failed")
+        return None if job is second else "text"
+
+    spoken = []
+    queue = JobQueue(process, lambda job, result: spoken.append(job), workers=2)
+    for job in (first, second, third):
+        queue.submit(job)
+    queue.shutdown()
+    assert spoken == [third]
+    assert (first.state, second.state, third.state) == (FAILED, DONE, DONE)
+
+
+def test_worker_is_free_while_an_earlier_job_speaks():
+    first, second = _job(), _job()
+    speaking = threading.Event()
+    release = threading.Event()
+    processed = []
+
+    def process(job):
+        processed.append(job)
+        return "text"
+
+    def speak(job, result):
+        if job is first:
+            speaking.set()
+            release.wait(2.0)
+
+    queue = JobQueue(process, speak, workers=1)
+    queue.submit(first)
+    assert speaking.wait(2.0)
+    queue.submit(second)  # The only worker must not be stuck behind the speech
+    deadline = time.time() + 2.0
+    while second not in processed and time.time() < deadline:
+        time.sleep(0.01)
+    assert second in processed
+    assert not release.is_set()
+    release.set()
+    queue.shutdown()
+    assert second.state == DONE
+
+
+def test_english_job_waits_for_earlier_detection():
+    language = ConversationLanguage()
+    foreign, english = _job("Foreign"), _job("English")
+    language.expect(foreign)
+    seen = []
+    reader = threading.Thread(target=lambda: seen.append(language.language_for(english)))
+    reader.start()
+    time.sleep(0.05)
+    assert not seen  # Still waiting for the Foreign job
+    language.report(foreign, "Spanish")
+    reader.join(2.0)
+    assert seen == ["Spanish"]
+
+
+def test_later_detection_does_not_affect_earlier_jobs():
+    language = ConversationLanguage("Spanish")
+    english, foreign = _job("English"), _job("Foreign")
+    language.expect(foreign)
+    assert language.language_for(english, timeout=0.5) == "Spanish"
+
+
+def test_failed_or_english_detection_keeps_the_language():
+    language = ConversationLanguage("French")
+    first, second = _job("Foreign"), _job("Foreign")
+    language.expect(first)
+    language.expect(second)
+    language.report(first, None)
+    language.report(second, "English")
+    language.report(second, "German")  # Second report of the same job is ignored
+    assert language.language_for(_job(), timeout=0.5) == "French"